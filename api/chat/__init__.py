@@ -1,68 +1,48 @@
+import base64
 import json
+import logging
 import os
-import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import azure.functions as func
-from openai import AzureOpenAI, OpenAI
+
+from shared_code import (
+    access,
+    clients,
+    compaction,
+    doc_store,
+    embedding,
+    image_store,
+    jobs,
+    map_reduce,
+    model_registry,
+    model_stats,
+    prompt_layout,
+    retrieval,
+    warmup,
+)
 
 
 REQUIRED_ENV_VARS = ["AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_KEY"]
 MAX_DOCUMENT_CONTEXT_CHARS = 12000
 MAX_IMAGE_CONTEXT_CHARS = 5000
-
-MODEL_REGISTRY = {
-    "gpt-35-turbo": {
-        "kind": "chat_completions",
-        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
-        "key_env": "AZURE_OPENAI_KEY",
-        "api_version": "2025-03-01-preview",
-    },
-    "gpt-5-chat": {
-        "kind": "responses_text",
-        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
-        "key_env": "AZURE_OPENAI_KEY",
-        "api_version": "2025-03-01-preview",
-    },
-    "model-router": {
-        "kind": "chat_completions",
-        "endpoint_env": "MODEL_ROUTER_ENDPOINT",
-        "key_env": "MODEL_ROUTER_KEY",
-        "fallback_endpoint_env": "AZURE_OPENAI_ENDPOINT",
-        "fallback_key_env": "AZURE_OPENAI_KEY",
-        "api_version": "2025-01-01-preview",
-        "api_version_env": "MODEL_ROUTER_API_VERSION",
-    },
-    "FLUX.1-Kontext-pro": {
-        "kind": "images_generate",
-        "endpoint_env": "FLUX_ENDPOINT",
-        "key_env": "FLUX_KEY",
-        "fallback_endpoint_env": "AZURE_OPENAI_ENDPOINT",
-        "fallback_key_env": "AZURE_OPENAI_KEY",
-        "api_version": "2025-04-01-preview",
-        "api_version_env": "FLUX_API_VERSION",
-    },
-    "read-doc": {
-        "kind": "image_to_text",
-        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
-        "key_env": "AZURE_OPENAI_KEY",
-        "api_version": "2025-03-01-preview",
-    },
-}
-
-
-def _tenant_from_issuer(issuer: str | None) -> str | None:
-    if not issuer:
-        return None
-
-    marker = "login.microsoftonline.com/"
-    if marker not in issuer:
-        return None
-
-    tail = issuer.split(marker, 1)[1]
-    tenant = tail.split("/", 1)[0].strip().lower()
-    return tenant or None
-
+DOCUMENT_TOP_K = 4
+LIBRARY_TOP_K = 6
+CHAT_MODES = {"", "map-reduce"}
+DOCUMENT_INSTRUCTIONS = (
+    "Use the provided document context when answering. "
+    "If the answer is not in the context, say so clearly."
+)
+SUMMARY_MODEL_KINDS = {"chat_completions", "responses_text"}
+HISTORY_SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the existing summary with the new messages. Keep facts, decisions, numbers, names, "
+    "file names and open questions; drop small talk. Reply with the updated summary only."
+)
+MAX_BATCH_ITEMS = 200
+DEFAULT_BATCH_CONCURRENCY = 8
 
 def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
     return func.HttpResponse(
@@ -72,100 +52,6 @@ def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.Http
     )
 
 
-def _get_claim(claims: list[dict[str, str]], key: str) -> str | None:
-    for claim in claims:
-        if claim.get("typ") == key:
-            return claim.get("val")
-    return None
-
-
-def _first_claim(claims: list[dict[str, str]], keys: list[str]) -> str | None:
-    for key in keys:
-        value = _get_claim(claims, key)
-        if value:
-            return value
-    return None
-
-
-def _extract_identity(req: func.HttpRequest) -> tuple[str | None, str | None, str | None]:
-    raw = req.headers.get("x-ms-client-principal")
-    if not raw:
-        return None, None, None
-
-    try:
-        decoded = base64.b64decode(raw).decode("utf-8")
-        principal = json.loads(decoded)
-    except Exception:
-        return None, None, None
-
-    claims = principal.get("claims", [])
-    tenant_id = _first_claim(
-        claims,
-        [
-            "tid",
-            "http://schemas.microsoft.com/identity/claims/tenantid",
-            "tenantid",
-        ],
-    )
-    if not tenant_id:
-        tenant_id = _tenant_from_issuer(_first_claim(claims, ["iss"]))
-    user_upn = (
-        _first_claim(
-            claims,
-            [
-                "preferred_username",
-                "http://schemas.xmlsoap.org/ws/2005/05/identity/claims/upn",
-                "upn",
-                "email",
-                "name",
-            ],
-        )
-        or principal.get("userDetails")
-    )
-    provider = principal.get("identityProvider")
-    return tenant_id, (user_upn.lower() if user_upn else None), provider
-
-
-def _decode_jwt_payload(token: str) -> dict[str, Any] | None:
-    parts = token.split(".")
-    if len(parts) < 2:
-        return None
-
-    payload = parts[1]
-    padding = "=" * (-len(payload) % 4)
-
-    try:
-        decoded = base64.urlsafe_b64decode(payload + padding).decode("utf-8")
-        data = json.loads(decoded)
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
-
-
-def _extract_identity_from_aad_tokens(req: func.HttpRequest) -> tuple[str | None, str | None]:
-    token = req.headers.get("x-ms-token-aad-id-token") or req.headers.get("x-ms-token-aad-access-token")
-    if not token:
-        return None, None
-
-    payload = _decode_jwt_payload(token)
-    if not payload:
-        return None, None
-
-    tenant_id = payload.get("tid")
-    if not tenant_id:
-        tenant_id = _tenant_from_issuer(str(payload.get("iss") or ""))
-    user_upn = (
-        payload.get("preferred_username")
-        or payload.get("upn")
-        or payload.get("email")
-    )
-
-    return (
-        str(tenant_id).lower() if tenant_id else None,
-        str(user_upn).lower() if user_upn else None,
-    )
-
-
 def _validate_env() -> str | None:
     missing = [name for name in REQUIRED_ENV_VARS if not os.getenv(name)]
     if missing:
@@ -177,40 +63,62 @@ def _build_messages(
     history: list[dict[str, str]],
     prompt: str,
     document_context: str = "",
+    layout: str = prompt_layout.LEGACY,
+    context_is_stable: bool = False,
 ) -> list[dict[str, str]]:
-    messages = [item for item in history if item.get("role") in {"user", "assistant", "system"}]
-
     safe_document_context = (document_context or "").strip()[:MAX_DOCUMENT_CONTEXT_CHARS]
-    if safe_document_context:
-        messages.insert(
-            0,
-            {
-                "role": "system",
-                "content": (
-                    "Use the provided document context when answering. "
-                    "If the answer is not in the context, say so clearly.\n\n"
-                    f"Document context:\n{safe_document_context}"
-                ),
-            },
-        )
+    return prompt_layout.build_messages(
+        history,
+        prompt,
+        DOCUMENT_INSTRUCTIONS,
+        "Document context",
+        stable_context=safe_document_context if context_is_stable else "",
+        variable_context="" if context_is_stable else safe_document_context,
+        layout=layout,
+    )
 
-    messages.append({"role": "user", "content": prompt})
-    return messages
 
+def _stored_document_context(
+    owner: str | None,
+    document_id: str,
+    prompt: str,
+    layout: str = prompt_layout.LEGACY,
+) -> tuple[str, bool] | None:
+    """Context text and whether it is the same for every prompt (the whole document) rather than retrieved chunks."""
 
-def _resolve_model_client(model: str) -> tuple[AzureOpenAI, dict[str, str]]:
-    config = MODEL_REGISTRY[model]
+    document = doc_store.default_store().load(owner, document_id)
+    if document is None:
+        return None
 
-    endpoint = os.getenv(config["endpoint_env"]) or os.getenv(config.get("fallback_endpoint_env", ""))
-    key = os.getenv(config["key_env"]) or os.getenv(config.get("fallback_key_env", ""))
-    api_version = os.getenv(config.get("api_version_env", "")) or config["api_version"]
+    chunks = document.get("chunks") or []
+    whole_document = retrieval.format_context(document, list(range(len(chunks))))
+    if layout == prompt_layout.STABLE and len(whole_document) <= MAX_DOCUMENT_CONTEXT_CHARS:
+        return whole_document, True
 
-    client = AzureOpenAI(
-        api_key=key,
-        azure_endpoint=endpoint,
-        api_version=api_version,
-    )
-    return client, config
+    query_vector = None
+    if any(document.get("embeddings") or []):
+        try:
+            vectors, _ = embedding.create_embeddings(embedding.resolve_settings(), [prompt])
+            query_vector = vectors[0]
+        except embedding.EmbeddingError as ex:
+            logging.warning("Prompt embedding failed, using lexical retrieval only: %s", ex)
+
+    indices = retrieval.rank_chunks(document, prompt, DOCUMENT_TOP_K, query_vector)
+    return retrieval.format_context(document, indices), False
+
+
+def _library_context(decision: access.AccessDecision, prompt: str) -> tuple[str | None, str | None]:
+    """Library context, and the reason when retrieval failed so the reply can say it answered without the library."""
+
+    from shared_code import vector_index
+
+    try:
+        vectors, _ = embedding.create_embeddings(embedding.resolve_settings(), [prompt])
+        results = vector_index.index_for(decision.tenant_id, decision.user_upn).search(vectors[0], LIBRARY_TOP_K)
+    except (embedding.EmbeddingError, ValueError) as ex:
+        logging.warning("Library retrieval failed: %s", ex)
+        return None, str(ex)
+    return retrieval.format_library_context(results), None
 
 
 def _normalize_openai_base_url(url: str) -> str:
@@ -233,12 +141,21 @@ def _extract_image_from_response(response: Any) -> str | None:
             if image_url:
                 return image_url
             if b64:
-                return f"data:image/png;base64,{b64}"
+                return _store_generated_image(b64)
             if item_type in {"output_image", "image"} and image_url:
                 return image_url
     return None
 
 
+def _store_generated_image(b64: str) -> str:
+    try:
+        image_hash = image_store.default_store().put(base64.b64decode(b64))
+    except Exception as ex:
+        logging.warning("Could not store generated image, returning it inline: %s", ex)
+        return f"data:image/png;base64,{b64}"
+    return f"/api/images/{image_hash}"
+
+
 def _latest_user_prompt(messages: list[dict[str, str]]) -> str:
     for message in reversed(messages):
         if message.get("role") == "user":
@@ -310,26 +227,43 @@ def _extract_image_from_images_api_response(response: Any) -> str | None:
     if image_url:
         return image_url
     if b64:
-        return f"data:image/png;base64,{b64}"
+        return _store_generated_image(b64)
     return None
 
 
-def _chat_with_openai(model: str, messages: list[dict[str, str]]) -> dict[str, str]:
-    client, config = _resolve_model_client(model)
+def warm_up() -> None:
+    for model, config in model_registry.MODEL_REGISTRY.items():
+        if config["kind"] == "images_generate":
+            flux_endpoint = os.getenv("FLUX_ENDPOINT") or os.getenv("AZURE_OPENAI_ENDPOINT") or ""
+            flux_key = os.getenv("FLUX_KEY") or os.getenv("AZURE_OPENAI_KEY")
+            if flux_endpoint and flux_key:
+                clients.openai_client(_normalize_openai_base_url(flux_endpoint), flux_key)
+            continue
+        if os.getenv(config["endpoint_env"]) or os.getenv(config.get("fallback_endpoint_env", "")):
+            model_registry.resolve_client(model)
+
+
+def _chat_with_openai(model: str, messages: list[dict[str, str]]) -> dict[str, Any]:
+    with model_stats.default_stats().timed(model):
+        return _call_model(model, messages)
+
+
+def _call_model(model: str, messages: list[dict[str, str]]) -> dict[str, Any]:
+    client, config = model_registry.resolve_client(model)
     kind = config["kind"]
 
     if kind == "image_to_text":
         delegate = (os.getenv("READ_DOC_CHAT_MODEL") or "gpt-35-turbo").strip() or "gpt-35-turbo"
         if delegate == model:
             return {"type": "text", "text": "Server misconfiguration: READ_DOC_CHAT_MODEL cannot be 'read-doc'."}
-        if delegate not in MODEL_REGISTRY:
+        if delegate not in model_registry.MODEL_REGISTRY:
             return {"type": "text", "text": f"Server misconfiguration: READ_DOC_CHAT_MODEL '{delegate}' is not supported."}
-        return _chat_with_openai(delegate, messages)
+        return _call_model(delegate, messages)
 
     if kind == "chat_completions":
         response = client.chat.completions.create(model=model, messages=messages)
         text = response.choices[0].message.content or ""
-        return {"type": "text", "text": text}
+        return {"type": "text", "text": text, "usage": prompt_layout.usage_payload(getattr(response, "usage", None))}
 
     if kind == "images_generate":
         prompt = _build_image_prompt(messages)
@@ -337,10 +271,7 @@ def _chat_with_openai(model: str, messages: list[dict[str, str]]) -> dict[str, s
         flux_key = os.getenv("FLUX_KEY") or os.getenv("AZURE_OPENAI_KEY")
         flux_base_url = _normalize_openai_base_url(flux_endpoint)
 
-        flux_client = OpenAI(
-            base_url=flux_base_url,
-            api_key=flux_key,
-        )
+        flux_client = clients.openai_client(flux_base_url, flux_key)
 
         response = flux_client.images.generate(
             model=model,
@@ -354,103 +285,301 @@ def _chat_with_openai(model: str, messages: list[dict[str, str]]) -> dict[str, s
         return {"type": "text", "text": "Image model returned no displayable image output."}
 
     response = client.responses.create(model=model, input=messages)
+    usage = prompt_layout.usage_payload(getattr(response, "usage", None))
     text = getattr(response, "output_text", "") or ""
     if text:
-        return {"type": "text", "text": text}
+        return {"type": "text", "text": text, "usage": usage}
 
     image_url = _extract_image_from_response(response)
     if image_url:
-        return {"type": "image", "imageUrl": image_url}
+        return {"type": "image", "imageUrl": image_url, "usage": usage}
+
+    return {"type": "text", "text": "Model returned no displayable output.", "usage": usage}
+
+
+def _wants_job(body: dict[str, Any]) -> bool:
+    if (os.getenv("IMAGE_JOB_MODE") or "").strip().lower() in {"1", "true", "on", "yes"}:
+        return True
+    return body.get("async") is True
+
+
+def _reply_payload(history: list[dict[str, str]], prompt: str, model_result: dict[str, Any]) -> dict[str, Any]:
+    reply_type = model_result.get("type", "text")
+    reply_text = model_result.get("text", "")
+    image_url = model_result.get("imageUrl")
+
+    assistant_history_content = reply_text or ("[image generated]" if image_url else "")
+
+    updated_history = [
+        *history,
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": assistant_history_content},
+    ]
 
-    return {"type": "text", "text": "Model returned no displayable output."}
+    payload = {
+        "reply": reply_text,
+        "replyType": reply_type,
+        "imageUrl": image_url,
+        "conversationHistory": updated_history,
+    }
+    if model_result.get("usage"):
+        payload["usage"] = model_result["usage"]
+    return payload
+
+
+def _summarize_history(summary: str, messages: list[dict[str, str]]) -> str:
+    model = (os.getenv("HISTORY_SUMMARY_MODEL") or "").strip() or "gpt-35-turbo"
+    if model_registry.MODEL_REGISTRY.get(model, {}).get("kind") not in SUMMARY_MODEL_KINDS:
+        model = "gpt-35-turbo"
+
+    transcript = "\n\n".join(f"{message.get('role')}: {message.get('content')}" for message in messages)
+    result = _chat_with_openai(
+        model,
+        [
+            {"role": "system", "content": HISTORY_SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"},
+        ],
+    )
+    return (result.get("text") or "").strip() or summary
+
+
+def _compact_history(history: list[Any]) -> tuple[list[dict[str, str]], dict[str, Any] | None]:
+    compactor = compaction.default_compactor()
+    if compactor is None:
+        return history, None
+
+    messages = [item for item in history if isinstance(item, dict) and item.get("role") in {"user", "assistant", "system"}]
+    compacted, info = compactor.compact(messages, _summarize_history)
+    return compacted, info if info["compacted"] else None
+
+
+def _map_reduce_reply(
+    job: jobs.Job,
+    history: list[dict[str, str]],
+    prompt: str,
+    model: str,
+    document: dict[str, Any],
+) -> dict[str, Any]:
+    result = map_reduce.run(
+        document.get("chunks") or [],
+        prompt,
+        document.get("fileName") or "document",
+        lambda messages: _chat_with_openai(model, messages).get("text", ""),
+        job.report_progress,
+    )
+    payload = _reply_payload(history, prompt, {"type": "text", "text": result["text"]})
+    payload["mapReduce"] = {"sections": result["sections"], "combineRounds": result["combineRounds"]}
+    return payload
+
+
+def _job_accepted(job: jobs.Job) -> func.HttpResponse:
+    return _json_response(
+        {
+            "replyType": "job",
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": f"/api/jobs/{job.id}",
+        },
+        202,
+    )
+
+
+_batch_executor: ThreadPoolExecutor | None = None
+_batch_executor_lock = threading.Lock()
+
+
+def _batch_pool() -> ThreadPoolExecutor:
+    global _batch_executor
+
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                value = (os.getenv("CHAT_BATCH_CONCURRENCY") or "").strip()
+                workers = int(value) if value.isdigit() and int(value) > 0 else DEFAULT_BATCH_CONCURRENCY
+                _batch_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-batch")
+    return _batch_executor
+
+
+def _batch_item(model: str, system_prompt: str, document_context: str, layout: str, item: Any) -> dict[str, Any]:
+    if isinstance(item, str):
+        item = {"prompt": item}
+    if not isinstance(item, dict):
+        return {"error": "Each item must be a string or an object with 'prompt'.", "status": 400}
+
+    prompt = str(item.get("prompt") or "").strip()
+    history = item.get("conversationHistory") or []
+    if not prompt:
+        return {"error": "Prompt is required.", "status": 400}
+    if not isinstance(history, list):
+        return {"error": "'conversationHistory' must be an array.", "status": 400}
+    for entry in history:
+        if (
+            not isinstance(entry, dict)
+            or entry.get("role") not in {"user", "assistant", "system"}
+            or not isinstance(entry.get("content"), str)
+        ):
+            return {
+                "error": "Each 'conversationHistory' entry must be an object with a user, assistant or system "
+                "'role' and string 'content'.",
+                "status": 400,
+            }
+
+    shared = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    try:
+        messages = _build_messages([*shared, *history], prompt, document_context, layout, context_is_stable=True)
+        result = _chat_with_openai(model, messages)
+    except Exception as ex:
+        error_message, status_code = _map_openai_error(ex)
+        return {"error": error_message, "status": status_code}
+
+    return {
+        "reply": result.get("text", ""),
+        "replyType": result.get("type", "text"),
+        "usage": result.get("usage"),
+        "status": 200,
+    }
+
+
+def _chat_batch(body: dict[str, Any]) -> func.HttpResponse:
+    model = (body.get("model") or "gpt-35-turbo").strip()
+    items = body.get("items")
+    system_prompt = (body.get("systemPrompt") or "").strip()
+    document_context = body.get("documentContext") or ""
+    layout = prompt_layout.resolve_layout(body.get("promptLayout"))
+
+    if model not in model_registry.MODEL_REGISTRY:
+        return _json_response({"error": "Unsupported model."}, 400)
+
+    if model_registry.MODEL_REGISTRY[model]["kind"] == "images_generate":
+        return _json_response({"error": "Batch mode requires a text model."}, 400)
+
+    if not isinstance(items, list) or not items:
+        return _json_response({"error": "'items' must be a non-empty array."}, 400)
+
+    if len(items) > MAX_BATCH_ITEMS:
+        return _json_response({"error": f"Too many items. Max is {MAX_BATCH_ITEMS}."}, 413)
+
+    results = list(_batch_pool().map(lambda item: _batch_item(model, system_prompt, document_context, layout, item), items))
+    for index, result in enumerate(results):
+        result["index"] = index
+
+    return _json_response(
+        {
+            "model": model,
+            "results": results,
+            "succeeded": sum(1 for result in results if "error" not in result),
+            "failed": sum(1 for result in results if "error" in result),
+        }
+    )
+
+
+warmup.warm_up_on_load()
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
     env_error = _validate_env()
     if env_error:
         return _json_response({"error": env_error}, 500)
 
-    tenant_id, user_upn, provider = _extract_identity(req)
-    if not tenant_id or not user_upn:
-        token_tenant_id, token_user_upn = _extract_identity_from_aad_tokens(req)
-        tenant_id = tenant_id or token_tenant_id
-        user_upn = user_upn or token_user_upn
-
-    allowed_tenant_id = (os.getenv("ALLOWED_TENANT_ID") or "").strip().lower()
-    allowed_users = {
-        user.strip().lower()
-        for user in (os.getenv("ALLOWED_USERS") or "").split(",")
-        if user.strip()
-    }
-
-    if provider and provider.lower() != "aad":
-        return _json_response({"error": "Access denied: Microsoft Entra sign-in required."}, 403)
-
-    if allowed_users and (user_upn not in allowed_users):
-        return _json_response({"error": "Access denied: user not allowed."}, 403)
-
-    if allowed_tenant_id:
-        if tenant_id:
-            if tenant_id.lower() != allowed_tenant_id:
-                actual_tenant = tenant_id
-                return _json_response(
-                    {
-                        "error": f"Access denied: wrong tenant. expected={allowed_tenant_id} actual={actual_tenant}",
-                        "expectedTenant": allowed_tenant_id,
-                        "actualTenant": actual_tenant,
-                    },
-                    403,
-                )
-        elif not allowed_users:
-            return _json_response(
-                {
-                    "error": "Access denied: tenant claim missing and no ALLOWED_USERS fallback configured.",
-                    "expectedTenant": allowed_tenant_id,
-                    "actualTenant": "missing",
-                },
-                403,
-            )
+    action = (req.route_params.get("action") or "").strip().lower()
+    if action not in {"", "batch"}:
+        return _json_response({"error": "Not found."}, 404)
 
     try:
         body = req.get_json()
     except ValueError:
         return _json_response({"error": "Invalid JSON body."}, 400)
 
+    if not isinstance(body, dict):
+        return _json_response({"error": "JSON body must be an object."}, 400)
+
+    if action == "batch":
+        return _chat_batch(body)
+
     prompt = (body.get("prompt") or "").strip()
     model = (body.get("model") or "gpt-35-turbo").strip()
     history = body.get("conversationHistory") or []
     document_context = body.get("documentContext") or ""
+    document_id = (body.get("documentId") or "").strip()
+    use_library = body.get("useLibrary") is True
+    mode = (body.get("mode") or "").strip().lower()
+    layout = prompt_layout.resolve_layout(body.get("promptLayout"))
+    context_is_stable = False
 
     if not prompt:
         return _json_response({"error": "Prompt is required."}, 400)
 
-    if model not in MODEL_REGISTRY:
+    if model not in model_registry.MODEL_REGISTRY:
         return _json_response({"error": "Unsupported model."}, 400)
 
+    if mode not in CHAT_MODES:
+        return _json_response({"error": "Unsupported mode."}, 400)
+
+    if mode == "map-reduce":
+        if model_registry.MODEL_REGISTRY[model]["kind"] == "images_generate":
+            return _json_response({"error": "Map-reduce mode requires a text model."}, 400)
+        if not document_id:
+            return _json_response({"error": "Map-reduce mode requires a documentId from /api/document."}, 400)
+
+        document = doc_store.default_store().load(decision.user_upn, document_id)
+        if document is None:
+            return _json_response({"error": "Document not found or expired. Upload it again."}, 404)
+
+        try:
+            job = jobs.default_store().submit(
+                "map-reduce",
+                decision.user_upn,
+                lambda job: _map_reduce_reply(job, history, prompt, model, document),
+                _map_openai_error,
+            )
+        except jobs.JobQueueFull as ex:
+            return _json_response({"error": str(ex)}, 429)
+        return _job_accepted(job)
+
+    library_error = None
+    if document_id:
+        stored = _stored_document_context(decision.user_upn, document_id, prompt, layout)
+        if stored is not None and stored[0]:
+            document_context, context_is_stable = stored
+    elif use_library:
+        library_context, library_error = _library_context(decision, prompt)
+        document_context = library_context or document_context
+
+    compaction_info = None
     try:
-        messages = _build_messages(history, prompt, document_context)
-        model_result = _chat_with_openai(model, messages)
+        model_history = history
+        if model_registry.MODEL_REGISTRY[model]["kind"] != "images_generate":
+            model_history, compaction_info = _compact_history(history)
+        messages = _build_messages(model_history, prompt, document_context, layout, context_is_stable)
     except Exception as ex:
         error_message, status_code = _map_openai_error(ex)
         return _json_response({"error": error_message}, status_code)
 
-    reply_type = model_result.get("type", "text")
-    reply_text = model_result.get("text", "")
-    image_url = model_result.get("imageUrl")
-
-    assistant_history_content = reply_text or ("[image generated]" if image_url else "")
+    if model_registry.MODEL_REGISTRY[model]["kind"] == "images_generate" and _wants_job(body):
+        try:
+            job = jobs.default_store().submit(
+                "image",
+                decision.user_upn,
+                lambda _job: _reply_payload(history, prompt, _chat_with_openai(model, messages)),
+                _map_openai_error,
+            )
+        except jobs.JobQueueFull as ex:
+            return _json_response({"error": str(ex)}, 429)
+        return _job_accepted(job)
 
-    updated_history = [
-        *history,
-        {"role": "user", "content": prompt},
-        {"role": "assistant", "content": assistant_history_content},
-    ]
+    try:
+        model_result = _chat_with_openai(model, messages)
+    except Exception as ex:
+        error_message, status_code = _map_openai_error(ex)
+        return _json_response({"error": error_message}, status_code)
 
-    return _json_response(
-        {
-            "reply": reply_text,
-            "replyType": reply_type,
-            "imageUrl": image_url,
-            "conversationHistory": updated_history,
-        }
-    )
+    payload = _reply_payload(history, prompt, model_result)
+    if compaction_info:
+        payload["historyCompaction"] = compaction_info
+    if library_error:
+        payload["libraryError"] = library_error
+    return _json_response(payload)
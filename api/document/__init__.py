@@ -1,18 +1,13 @@
 import base64
 import json
-from io import BytesIO
 from typing import Any
 
 import azure.functions as func
-from docx import Document
-from pypdf import PdfReader
+
+from shared_code import access, doc_store, extraction, extraction_pool, warmup
 
 
 MAX_FILE_BYTES = 10 * 1024 * 1024
-MAX_TEXT_CHARS = 200000
-CHUNK_SIZE = 1400
-CHUNK_OVERLAP = 200
-ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md"}
 
 
 def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
@@ -23,13 +18,6 @@ def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.Http
     )
 
 
-def _extension(file_name: str) -> str:
-    lower_name = (file_name or "").strip().lower()
-    if "." not in lower_name:
-        return ""
-    return "." + lower_name.rsplit(".", 1)[1]
-
-
 def _decode_payload(raw_b64: str) -> bytes:
     payload = (raw_b64 or "").strip()
     if "," in payload and payload.lower().startswith("data:"):
@@ -37,54 +25,20 @@ def _decode_payload(raw_b64: str) -> bytes:
     return base64.b64decode(payload, validate=True)
 
 
-def _extract_pdf_text(data: bytes) -> str:
-    reader = PdfReader(BytesIO(data))
-    return "\n\n".join((page.extract_text() or "") for page in reader.pages)
-
-
-def _extract_docx_text(data: bytes) -> str:
-    document = Document(BytesIO(data))
-    return "\n".join(paragraph.text for paragraph in document.paragraphs)
-
-
-def _extract_text(file_ext: str, data: bytes) -> str:
-    if file_ext == ".pdf":
-        return _extract_pdf_text(data)
-    if file_ext == ".docx":
-        return _extract_docx_text(data)
-    if file_ext in {".txt", ".md"}:
-        try:
-            return data.decode("utf-8")
-        except UnicodeDecodeError:
-            return data.decode("latin-1", errors="ignore")
-    return ""
-
-
-def _normalize_text(text: str) -> str:
-    compact = "\n".join(line.rstrip() for line in text.splitlines())
-    return compact.strip()
-
-
-def _chunk_text(text: str) -> list[str]:
-    value = text[:MAX_TEXT_CHARS]
-    chunks: list[str] = []
-    start = 0
-
-    while start < len(value):
-        end = min(start + CHUNK_SIZE, len(value))
-        chunks.append(value[start:end].strip())
-        if end >= len(value):
-            break
-        start = max(end - CHUNK_OVERLAP, start + 1)
-
-    return [chunk for chunk in chunks if chunk]
+warmup.warm_up_on_load()
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
     try:
         body = req.get_json()
     except ValueError:
         return _json_response({"error": "Invalid JSON body."}, 400)
+    if not isinstance(body, dict):
+        return _json_response({"error": "JSON body must be an object."}, 400)
 
     file_name = (body.get("fileName") or "").strip()
     file_content_b64 = body.get("fileContentBase64") or ""
@@ -94,8 +48,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     if not file_content_b64:
         return _json_response({"error": "fileContentBase64 is required."}, 400)
 
-    file_ext = _extension(file_name)
-    if file_ext not in ALLOWED_EXTENSIONS:
+    file_ext = extraction.extension(file_name)
+    if file_ext not in extraction.ALLOWED_EXTENSIONS:
         return _json_response(
             {"error": "Unsupported file type. Allowed: PDF, DOCX, TXT, MD."},
             400,
@@ -110,24 +64,34 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         max_mb = MAX_FILE_BYTES // (1024 * 1024)
         return _json_response({"error": f"File too large. Max size is {max_mb} MB."}, 413)
 
+    ingest = body.get("ingest") is True
     try:
-        extracted = _extract_text(file_ext, file_bytes)
+        processed = extraction.process(file_ext, file_bytes, ingest)
+    except extraction_pool.ExtractionLimitError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
     except Exception as ex:
         return _json_response({"error": f"Failed to parse document: {str(ex)}"}, 400)
 
-    normalized = _normalize_text(extracted)
+    normalized, chunks = processed["text"], processed["chunks"]
     if not normalized:
         return _json_response({"error": "No readable text found in this document."}, 400)
 
-    chunks = _chunk_text(normalized)
-
-    return _json_response(
-        {
-            "fileName": file_name,
-            "chunks": chunks,
-            "chunkCount": len(chunks),
-            "charCount": len(normalized),
-            "maxFileBytes": MAX_FILE_BYTES,
-            "maxFileMb": MAX_FILE_BYTES // (1024 * 1024),
-        }
-    )
+    document = extraction.document_record(file_name, processed)
+    try:
+        document_id = doc_store.default_store().save(decision.user_upn, document)
+    except OSError:
+        document_id = None
+
+    payload = {
+        "documentId": document_id,
+        "fileName": file_name,
+        "chunks": chunks,
+        "chunkCount": len(chunks),
+        "charCount": len(normalized),
+        "maxFileBytes": MAX_FILE_BYTES,
+        "maxFileMb": MAX_FILE_BYTES // (1024 * 1024),
+    }
+    if ingest:
+        payload["embedded"] = processed["embeddings"] is not None
+        payload["timings"] = processed["timings"]
+    return _json_response(payload)
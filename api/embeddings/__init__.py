@@ -1,10 +1,9 @@
 import json
-import os
 from typing import Any
-from urllib.parse import parse_qs, urlparse
 
 import azure.functions as func
-from openai import AzureOpenAI
+
+from shared_code import access, doc_store, embedding, retrieval, warmup
 
 
 MAX_INPUTS = 128
@@ -19,93 +18,47 @@ def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.Http
     )
 
 
-def _get_required_env(name: str) -> str | None:
-    value = (os.getenv(name) or "").strip()
-    return value or None
-
-
-def _normalize_azure_openai_endpoint(value: str) -> str:
-    raw = (value or "").strip().rstrip("/")
-    if not raw:
-        return ""
-
-    parsed = urlparse(raw)
-    path = (parsed.path or "").rstrip("/")
+def _attach_to_document(
+    owner: str | None,
+    document_id: str,
+    start_index: int,
+    inputs: list[str],
+    vectors: list[list[float]],
+) -> bool:
+    """Store vectors for chunks[start_index:] when the inputs are exactly those chunks (batches past the first 128)."""
 
-    if "/openai" in path:
-        before_openai = path.split("/openai", 1)[0]
-        raw = f"{parsed.scheme}://{parsed.netloc}{before_openai}"
+    store = doc_store.default_store()
+    document = store.load(owner, document_id)
+    if document is None:
+        return False
 
-    return raw.rstrip("/")
+    chunks = document.get("chunks") or []
+    if [chunk[:MAX_TEXT_CHARS] for chunk in chunks[start_index : start_index + len(inputs)]] != inputs:
+        return False
 
+    stored: list[list[float] | None] = list(document.get("embeddings") or [None] * len(chunks))
+    for index, vector in enumerate(vectors):
+        stored[start_index + index] = retrieval.normalize(vector)
+    store.update(owner, document_id, {"embeddings": stored})
+    return True
 
-def _extract_deployment_from_url(value: str) -> str | None:
-    raw = (value or "").strip()
-    if not raw:
-        return None
 
-    parsed = urlparse(raw)
-    path = parsed.path or ""
-    marker = "/openai/deployments/"
-    if marker not in path:
-        return None
+def warm_up() -> None:
+    embedding.warm_up()
 
-    tail = path.split(marker, 1)[1]
-    deployment = tail.split("/", 1)[0].strip()
-    return deployment or None
 
-
-def _extract_api_version_from_url(value: str) -> str | None:
-    raw = (value or "").strip()
-    if not raw:
-        return None
-
-    parsed = urlparse(raw)
-    query = parse_qs(parsed.query or "")
-    versions = query.get("api-version") or query.get("api_version")
-    if not versions:
-        return None
-    version = str(versions[0] or "").strip()
-    return version or None
+warmup.warm_up_on_load()
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
-    raw_endpoint = (
-        _get_required_env("READ_DOC_EMBEDDING_ENDPOINT")
-        or _get_required_env("AZURE_OPENAI_ENDPOINT")
-    )
-    api_key = (
-        _get_required_env("READ_DOC_EMBEDDING_KEY")
-        or _get_required_env("AZURE_OPENAI_KEY")
-    )
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
 
-    if not raw_endpoint or not api_key:
-        return _json_response(
-            {
-                "error": (
-                    "Missing required environment variables: "
-                    "READ_DOC_EMBEDDING_ENDPOINT (or AZURE_OPENAI_ENDPOINT), "
-                    "READ_DOC_EMBEDDING_KEY (or AZURE_OPENAI_KEY)"
-                )
-            },
-            500,
-        )
-
-    endpoint = _normalize_azure_openai_endpoint(raw_endpoint)
-
-    deployment = (
-        _get_required_env("READ_DOC_EMBEDDING_DEPLOYMENT")
-        or _get_required_env("EMBEDDINGS_DEPLOYMENT")
-        or _extract_deployment_from_url(raw_endpoint)
-    )
-
-    if not deployment:
-        return _json_response(
-            {
-                "error": "Missing required environment variable: READ_DOC_EMBEDDING_DEPLOYMENT (or EMBEDDINGS_DEPLOYMENT)"
-            },
-            500,
-        )
+    try:
+        settings = embedding.resolve_settings()
+    except embedding.EmbeddingError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
 
     try:
         body = req.get_json()
@@ -122,6 +75,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             413,
         )
 
+    start_index = body.get("startIndex", 0)
+    if not isinstance(start_index, int) or isinstance(start_index, bool) or start_index < 0:
+        return _json_response({"error": "'startIndex' must be a non-negative integer."}, 400)
+
     cleaned: list[str] = []
     for item in inputs:
         if not isinstance(item, str):
@@ -132,56 +89,25 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             continue
         cleaned.append(text[:MAX_TEXT_CHARS])
 
-    api_version = (
-        (os.getenv("READ_DOC_EMBEDDINGS_API_VERSION") or "").strip()
-        or (os.getenv("EMBEDDINGS_API_VERSION") or "").strip()
-        or _extract_api_version_from_url(raw_endpoint)
-        or "2024-02-01"
-    )
-
-    client = AzureOpenAI(
-        api_key=api_key,
-        azure_endpoint=endpoint,
-        api_version=api_version,
-    )
-
     try:
-        response = client.embeddings.create(
-            model=deployment,
-            input=cleaned,
-        )
-    except Exception as ex:
-        return _json_response({"error": f"Embeddings call failed: {str(ex)}"}, 500)
-
-    vectors: list[list[float] | None] = [None] * len(cleaned)
-    for item in getattr(response, "data", []) or []:
-        index = getattr(item, "index", None)
-        embedding = getattr(item, "embedding", None)
-        if isinstance(index, int) and 0 <= index < len(vectors) and isinstance(embedding, list):
-            vectors[index] = embedding
-
-    if any(v is None for v in vectors):
-        return _json_response(
-            {"error": "Embeddings response was missing one or more vectors."},
-            500,
-        )
+        vectors, usage_payload = embedding.create_embeddings(settings, cleaned)
+    except embedding.EmbeddingError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
 
     dim = len(vectors[0]) if vectors and vectors[0] else 0
 
-    usage = getattr(response, "usage", None)
-    usage_payload = None
-    if usage is not None:
-        usage_payload = {
-            "prompt_tokens": getattr(usage, "prompt_tokens", None),
-            "total_tokens": getattr(usage, "total_tokens", None),
-        }
+    document_id = (body.get("documentId") or "").strip()
+    attached = (
+        _attach_to_document(decision.user_upn, document_id, start_index, cleaned, vectors) if document_id else False
+    )
 
     return _json_response(
         {
-            "deployment": deployment,
-            "apiVersion": api_version,
+            "deployment": settings.deployment,
+            "apiVersion": settings.api_version,
             "dimension": dim,
             "embeddings": vectors,
             "usage": usage_payload,
+            "attachedToDocument": attached,
         }
     )
@@ -1,17 +1,24 @@
 import base64
 import json
 import os
+import time
 from typing import Any
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
 import azure.functions as func
-from openai import AzureOpenAI, OpenAI
+
+from shared_code import access, clients, model_stats, prompt_layout, warmup
 
 
 MAX_IMAGE_BYTES = 8 * 1024 * 1024
+READ_DOC_MODEL = "read-doc"
 MAX_OCR_CHARS = 12000
 MAX_VISION_OCR_CHARS = 24000
+OCR_INSTRUCTIONS = (
+    "You are helping a user interpret an image that has been OCR'd into text. "
+    "Use the OCR text as the primary source. If the OCR text is insufficient, say so clearly."
+)
 
 
 def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
@@ -133,7 +140,7 @@ def _ocr_with_azure_openai_vision(image_bytes: bytes, file_name: str) -> str:
         )
 
     normalized_base_url = _normalize_openai_v1_base_url(base_url)
-    client = OpenAI(base_url=normalized_base_url, api_key=key)
+    client = clients.openai_client(normalized_base_url, key)
 
     mime = _guess_image_mime(file_name)
     data_url = f"data:{mime};base64,{base64.b64encode(image_bytes).decode('ascii')}"
@@ -174,28 +181,39 @@ def _ocr_image(image_bytes: bytes, file_name: str) -> str:
     return _ocr_with_azure_openai_vision(image_bytes, file_name)
 
 
-def _build_messages(history: list[dict[str, str]], prompt: str, ocr_text: str) -> list[dict[str, str]]:
-    messages = [item for item in history if item.get("role") in {"user", "assistant", "system"}]
-
+def _build_messages(
+    history: list[dict[str, str]],
+    prompt: str,
+    ocr_text: str,
+    layout: str = prompt_layout.LEGACY,
+) -> list[dict[str, str]]:
     safe_ocr = (ocr_text or "").strip()[:MAX_OCR_CHARS]
-    if safe_ocr:
-        messages.insert(
-            0,
-            {
-                "role": "system",
-                "content": (
-                    "You are helping a user interpret an image that has been OCR'd into text. "
-                    "Use the OCR text as the primary source. If the OCR text is insufficient, say so clearly.\n\n"
-                    f"OCR text:\n{safe_ocr}"
-                ),
-            },
-        )
+    return prompt_layout.build_messages(
+        history,
+        prompt,
+        OCR_INSTRUCTIONS,
+        "OCR text",
+        variable_context=safe_ocr,
+        layout=layout,
+    )
+
+
+def warm_up() -> None:
+    openai_endpoint = _env("AZURE_OPENAI_ENDPOINT")
+    openai_key = _env("AZURE_OPENAI_KEY")
+    if openai_endpoint and openai_key:
+        api_version = _env("IMAGE_TO_TEXT_CHAT_API_VERSION") or "2025-03-01-preview"
+        clients.azure_openai_client(openai_endpoint, openai_key, api_version)
 
-    messages.append({"role": "user", "content": prompt})
-    return messages
+
+warmup.warm_up_on_load()
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
     openai_endpoint = _env("AZURE_OPENAI_ENDPOINT")
     openai_key = _env("AZURE_OPENAI_KEY")
 
@@ -233,27 +251,29 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         max_mb = MAX_IMAGE_BYTES // (1024 * 1024)
         return _json_response({"error": f"File too large. Max size is {max_mb} MB."}, 413)
 
+    stats = model_stats.default_stats()
+    started = time.perf_counter()
     try:
         ocr_text = _ocr_image(image_bytes, file_name)
     except Exception as ex:
+        stats.record(READ_DOC_MODEL, (time.perf_counter() - started) * 1000.0, False)
         return _json_response({"error": f"OCR failed: {str(ex)}"}, 500)
 
     model = _env("IMAGE_TO_TEXT_CHAT_MODEL") or _env("READ_DOC_CHAT_MODEL") or "gpt-35-turbo"
     api_version = _env("IMAGE_TO_TEXT_CHAT_API_VERSION") or "2025-03-01-preview"
 
-    client = AzureOpenAI(
-        api_key=openai_key,
-        azure_endpoint=openai_endpoint,
-        api_version=api_version,
-    )
+    client = clients.azure_openai_client(openai_endpoint, openai_key, api_version)
 
-    messages = _build_messages(history, prompt, ocr_text)
+    messages = _build_messages(history, prompt, ocr_text, prompt_layout.resolve_layout(body.get("promptLayout")))
 
     try:
         response = client.chat.completions.create(model=model, messages=messages)
         reply = response.choices[0].message.content or ""
+        usage = prompt_layout.usage_payload(getattr(response, "usage", None))
     except Exception as ex:
+        stats.record(READ_DOC_MODEL, (time.perf_counter() - started) * 1000.0, False)
         return _json_response({"error": f"Chat call failed: {str(ex)}"}, 500)
+    stats.record(READ_DOC_MODEL, (time.perf_counter() - started) * 1000.0, True)
 
     assistant_history_content = reply or "(No response)"
 
@@ -269,5 +289,6 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "replyType": "text",
             "ocrTextPreview": (ocr_text or "")[:600],
             "conversationHistory": updated_history,
+            "usage": usage,
         }
     )
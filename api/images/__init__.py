@@ -0,0 +1,51 @@
+import json
+from typing import Any
+
+import azure.functions as func
+
+from shared_code import access, image_store
+
+
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+FALLBACK_CACHE_CONTROL = "private, max-age=300"
+
+
+def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=status_code,
+        mimetype="application/json",
+    )
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
+    image_hash = (req.route_params.get("imageHash") or "").strip().lower()
+    if not image_store.is_valid_hash(image_hash):
+        return _json_response({"error": "Invalid image id."}, 400)
+
+    variant = (req.params.get("variant") or "").strip().lower()
+    if variant and variant not in image_store.VARIANTS:
+        return _json_response({"error": "Unsupported variant. Allowed: thumb, webp."}, 400)
+
+    etag = f'"{image_hash}{"-" + variant if variant else ""}"'
+    cache_headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Cookie"}
+    if etag in (req.headers.get("if-none-match") or ""):
+        return func.HttpResponse(status_code=304, headers=cache_headers)
+
+    try:
+        stored = image_store.default_store().get(image_hash, variant)
+    except Exception as ex:
+        return _json_response({"error": f"Image store failed: {str(ex)}"}, 500)
+
+    if stored is None:
+        return _json_response({"error": "Image not found."}, 404)
+
+    data, content_type, served_variant = stored
+    if served_variant != variant:
+        # The original stood in for a variant that could not be rendered; don't pin it under the variant's URL.
+        cache_headers = {"ETag": f'"{image_hash}"', "Cache-Control": FALLBACK_CACHE_CONTROL, "Vary": "Cookie"}
+    return func.HttpResponse(body=data, status_code=200, headers=cache_headers, mimetype=content_type)
@@ -0,0 +1,45 @@
+import json
+from typing import Any
+
+import azure.functions as func
+
+from shared_code import access, jobs
+
+
+MAX_WAIT_SECONDS = 25.0
+
+
+def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=status_code,
+        mimetype="application/json",
+    )
+
+
+def _wait_seconds(raw: str | None) -> float:
+    try:
+        value = float(raw or 0)
+    except ValueError:
+        return 0.0
+    return max(0.0, min(value, MAX_WAIT_SECONDS))
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
+    job_id = (req.route_params.get("jobId") or "").strip()
+    store = jobs.default_store()
+    job = store.get(job_id, decision.user_upn)
+    if job is None:
+        return _json_response({"error": "Job not found or expired."}, 404)
+
+    progress_version = (req.params.get("progressVersion") or "").strip()
+    store.wait(
+        job,
+        _wait_seconds(req.params.get("wait")),
+        int(progress_version) if progress_version.isdigit() else None,
+    )
+    return _json_response(job.snapshot())
@@ -0,0 +1,128 @@
+import json
+from typing import Any
+
+import azure.functions as func
+
+from shared_code import access, doc_store, embedding, vector_index, warmup
+
+
+EMBEDDING_BATCH_SIZE = 128
+MAX_CHUNKS_PER_DOCUMENT = 1000
+MAX_CHUNK_CHARS = 8000
+DEFAULT_TOP_K = 8
+MAX_TOP_K = 50
+
+
+def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=status_code,
+        mimetype="application/json",
+    )
+
+
+def _embed_chunks(chunks: list[str]) -> list[list[float]]:
+    settings = embedding.resolve_settings()
+    vectors: list[list[float]] = []
+    for start in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
+        batch, _ = embedding.create_embeddings(settings, chunks[start : start + EMBEDDING_BATCH_SIZE])
+        vectors.extend(batch)
+    return vectors
+
+
+def _add_document(decision: access.AccessDecision, body: dict[str, Any]) -> func.HttpResponse:
+    document_id = (body.get("documentId") or "").strip()
+    stored_vectors = None
+
+    if document_id:
+        document = doc_store.default_store().load(decision.user_upn, document_id)
+        if document is None:
+            return _json_response({"error": "Document not found or expired. Upload it again."}, 404)
+        file_name = document.get("fileName") or "document"
+        chunks = document.get("chunks") or []
+        if all(document.get("embeddings") or [None]):
+            stored_vectors = document["embeddings"]
+    else:
+        file_name = (body.get("fileName") or "").strip() or "document"
+        chunks = body.get("chunks")
+        if not isinstance(chunks, list) or not all(isinstance(chunk, str) for chunk in chunks):
+            return _json_response({"error": "Provide 'documentId' or 'fileName' with a 'chunks' array of strings."}, 400)
+        chunks = [chunk.strip()[:MAX_CHUNK_CHARS] for chunk in chunks if chunk.strip()]
+        document_id = doc_store.document_id_for("\n".join(chunks))
+
+    if not chunks:
+        return _json_response({"error": "Document has no text to index."}, 400)
+
+    if len(chunks) > MAX_CHUNKS_PER_DOCUMENT:
+        return _json_response({"error": f"Too many chunks. Max is {MAX_CHUNKS_PER_DOCUMENT} per document."}, 413)
+
+    index = vector_index.index_for(decision.tenant_id, decision.user_upn)
+    if index.has_document(document_id):
+        return _json_response({"documentId": document_id, "fileName": file_name, "added": False, **index.stats()})
+
+    try:
+        vectors = stored_vectors or _embed_chunks(chunks)
+        index.add(document_id, file_name, chunks, vectors)
+    except embedding.EmbeddingError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
+    except ValueError as ex:
+        return _json_response({"error": str(ex)}, 400)
+
+    return _json_response({"documentId": document_id, "fileName": file_name, "added": True, **index.stats()}, 201)
+
+
+def _search(decision: access.AccessDecision, body: dict[str, Any]) -> func.HttpResponse:
+    query = (body.get("query") or "").strip()
+    if not query:
+        return _json_response({"error": "Query is required."}, 400)
+
+    k = body.get("k") or DEFAULT_TOP_K
+    if not isinstance(k, int) or k < 1:
+        return _json_response({"error": "'k' must be a positive integer."}, 400)
+
+    try:
+        vectors, _ = embedding.create_embeddings(embedding.resolve_settings(), [query])
+        results = vector_index.index_for(decision.tenant_id, decision.user_upn).search(vectors[0], min(k, MAX_TOP_K))
+    except embedding.EmbeddingError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
+    except ValueError as ex:
+        return _json_response({"error": str(ex)}, 400)
+
+    return _json_response({"results": results})
+
+
+warmup.warm_up_on_load()
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
+    action = (req.route_params.get("action") or "").strip().lower()
+    method = req.method.upper()
+
+    if method == "GET" and not action:
+        index = vector_index.index_for(decision.tenant_id, decision.user_upn)
+        return _json_response({"documents": index.documents(), **index.stats()})
+
+    if method == "DELETE":
+        document_id = (action or req.params.get("documentId") or "").strip()
+        if not document_id:
+            return _json_response({"error": "documentId is required."}, 400)
+        removed = vector_index.index_for(decision.tenant_id, decision.user_upn).delete(document_id)
+        if not removed:
+            return _json_response({"error": "Document not found in library."}, 404)
+        return _json_response({"documentId": document_id, "removed": True})
+
+    if method != "POST" or action not in {"", "search"}:
+        return _json_response({"error": "Not found."}, 404)
+
+    try:
+        body = req.get_json()
+    except ValueError:
+        return _json_response({"error": "Invalid JSON body."}, 400)
+
+    if action == "search":
+        return _search(decision, body)
+    return _add_document(decision, body)
@@ -1,20 +1,43 @@
+import hashlib
 import json
+from typing import Any
 
 import azure.functions as func
 
+from shared_code import access, model_registry, model_stats
 
-MODELS = [
-    {"id": "gpt-35-turbo", "label": "gpt-35-turbo", "type": "chat"},
-    {"id": "gpt-5-chat", "label": "gpt-5-chat", "type": "chat"},
-    {"id": "model-router", "label": "model-router", "type": "chat"},
-    {"id": "read-doc", "label": "gpt-4.1", "type": "image-to-text"},
-    {"id": "FLUX.1-Kontext-pro", "label": "FLUX.1-Kontext-pro", "type": "picture"},
-]
 
+CACHE_CONTROL = "private, max-age=30"
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+
+def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
     return func.HttpResponse(
-        json.dumps({"models": MODELS}),
-        status_code=200,
+        json.dumps(payload),
+        status_code=status_code,
         mimetype="application/json",
     )
+
+
+def _models_payload() -> dict[str, Any]:
+    stats = model_stats.default_stats()
+    models = [
+        {**entry, "configured": model_registry.is_configured(entry["id"]), **stats.snapshot(entry["id"])}
+        for entry in model_registry.picker_entries()
+    ]
+    return {"models": models}
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
+    model_stats.start_probe()
+
+    body = json.dumps(_models_payload(), sort_keys=True)
+    etag = f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+    cache_headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Cookie"}
+    if etag in (req.headers.get("if-none-match") or ""):
+        return func.HttpResponse(status_code=304, headers=cache_headers)
+
+    return func.HttpResponse(body, status_code=200, headers=cache_headers, mimetype="application/json")
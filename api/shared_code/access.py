@@ -0,0 +1,221 @@
+import base64
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import azure.functions as func
+
+
+DECISION_CACHE_SIZE = 1024
+
+TENANT_CLAIMS = [
+    "tid",
+    "http://schemas.microsoft.com/identity/claims/tenantid",
+    "tenantid",
+]
+USER_CLAIMS = [
+    "preferred_username",
+    "http://schemas.xmlsoap.org/ws/2005/05/identity/claims/upn",
+    "upn",
+    "email",
+    "name",
+]
+
+
+@dataclass(frozen=True)
+class AccessDecision:
+    allowed: bool
+    tenant_id: str | None = None
+    user_upn: str | None = None
+    status_code: int = 200
+    error: dict[str, Any] = field(default_factory=dict)
+
+
+def _tenant_from_issuer(issuer: str | None) -> str | None:
+    if not issuer:
+        return None
+
+    marker = "login.microsoftonline.com/"
+    if marker not in issuer:
+        return None
+
+    tail = issuer.split(marker, 1)[1]
+    tenant = tail.split("/", 1)[0].strip().lower()
+    return tenant or None
+
+
+def _index_claims(claims: list[dict[str, str]]) -> dict[str, str]:
+    index: dict[str, str] = {}
+    for claim in claims:
+        index.setdefault(claim.get("typ") or "", claim.get("val") or "")
+    return index
+
+
+def _first_claim(index: dict[str, str], keys: list[str]) -> str | None:
+    for key in keys:
+        value = index.get(key)
+        if value:
+            return value
+    return None
+
+
+def _identity_from_principal(raw: str) -> tuple[str | None, str | None, str | None]:
+    if not raw:
+        return None, None, None
+
+    try:
+        decoded = base64.b64decode(raw).decode("utf-8")
+        principal = json.loads(decoded)
+    except Exception:
+        return None, None, None
+
+    claims = _index_claims(principal.get("claims", []))
+    tenant_id = _first_claim(claims, TENANT_CLAIMS)
+    if not tenant_id:
+        tenant_id = _tenant_from_issuer(claims.get("iss"))
+    user_upn = _first_claim(claims, USER_CLAIMS) or principal.get("userDetails")
+    provider = principal.get("identityProvider")
+    return tenant_id, (user_upn.lower() if user_upn else None), provider
+
+
+def _decode_jwt_payload(token: str) -> dict[str, Any] | None:
+    parts = token.split(".")
+    if len(parts) < 2:
+        return None
+
+    payload = parts[1]
+    padding = "=" * (-len(payload) % 4)
+
+    try:
+        decoded = base64.urlsafe_b64decode(payload + padding).decode("utf-8")
+        data = json.loads(decoded)
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
+
+
+def _identity_from_aad_token(token: str) -> tuple[str | None, str | None]:
+    if not token:
+        return None, None
+
+    payload = _decode_jwt_payload(token)
+    if not payload:
+        return None, None
+
+    tenant_id = payload.get("tid")
+    if not tenant_id:
+        tenant_id = _tenant_from_issuer(str(payload.get("iss") or ""))
+    user_upn = (
+        payload.get("preferred_username")
+        or payload.get("upn")
+        or payload.get("email")
+    )
+
+    return (
+        str(tenant_id).lower() if tenant_id else None,
+        str(user_upn).lower() if user_upn else None,
+    )
+
+
+class AccessPolicy:
+    """ALLOWED_TENANT_ID / ALLOWED_USERS compiled once, plus an LRU of principal headers to decisions."""
+
+    def __init__(self, allowed_tenant_id: str, allowed_users: frozenset[str], cache_size: int = DECISION_CACHE_SIZE) -> None:
+        self.allowed_tenant_id = allowed_tenant_id
+        self.allowed_users = allowed_users
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], AccessDecision] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, raw_tenant_id: str, raw_users: str) -> "AccessPolicy":
+        allowed_users = frozenset(
+            user.strip().lower()
+            for user in raw_users.split(",")
+            if user.strip()
+        )
+        return cls(raw_tenant_id.strip().lower(), allowed_users)
+
+    def decide(self, tenant_id: str | None, user_upn: str | None, provider: str | None) -> AccessDecision:
+        if provider and provider.lower() != "aad":
+            return AccessDecision(False, tenant_id, user_upn, 403, {"error": "Access denied: Microsoft Entra sign-in required."})
+
+        if self.allowed_users and (user_upn not in self.allowed_users):
+            return AccessDecision(False, tenant_id, user_upn, 403, {"error": "Access denied: user not allowed."})
+
+        if self.allowed_tenant_id:
+            if tenant_id:
+                if tenant_id.lower() != self.allowed_tenant_id:
+                    return AccessDecision(
+                        False,
+                        tenant_id,
+                        user_upn,
+                        403,
+                        {
+                            "error": f"Access denied: wrong tenant. expected={self.allowed_tenant_id} actual={tenant_id}",
+                            "expectedTenant": self.allowed_tenant_id,
+                            "actualTenant": tenant_id,
+                        },
+                    )
+            elif not self.allowed_users:
+                return AccessDecision(
+                    False,
+                    tenant_id,
+                    user_upn,
+                    403,
+                    {
+                        "error": "Access denied: tenant claim missing and no ALLOWED_USERS fallback configured.",
+                        "expectedTenant": self.allowed_tenant_id,
+                        "actualTenant": "missing",
+                    },
+                )
+
+        return AccessDecision(True, tenant_id.lower() if tenant_id else None, user_upn)
+
+    def authorize_headers(self, principal: str, aad_token: str) -> AccessDecision:
+        key = (principal, aad_token)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tenant_id, user_upn, provider = _identity_from_principal(principal)
+        if not tenant_id or not user_upn:
+            token_tenant_id, token_user_upn = _identity_from_aad_token(aad_token)
+            tenant_id = tenant_id or token_tenant_id
+            user_upn = user_upn or token_user_upn
+
+        decision = self.decide(tenant_id, user_upn, provider)
+        with self._cache_lock:
+            self._cache[key] = decision
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return decision
+
+
+_compiled: tuple[tuple[str, str], AccessPolicy] | None = None
+_compiled_lock = threading.Lock()
+
+
+def current_policy() -> AccessPolicy:
+    global _compiled
+
+    source = (os.getenv("ALLOWED_TENANT_ID") or "", os.getenv("ALLOWED_USERS") or "")
+    compiled = _compiled
+    if compiled is not None and compiled[0] == source:
+        return compiled[1]
+
+    with _compiled_lock:
+        if _compiled is None or _compiled[0] != source:
+            _compiled = (source, AccessPolicy.compile(*source))
+        return _compiled[1]
+
+
+def authorize(req: func.HttpRequest) -> AccessDecision:
+    principal = req.headers.get("x-ms-client-principal") or ""
+    aad_token = req.headers.get("x-ms-token-aad-id-token") or req.headers.get("x-ms-token-aad-access-token") or ""
+    return current_policy().authorize_headers(principal, aad_token)
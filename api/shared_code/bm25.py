@@ -0,0 +1,74 @@
+import math
+import re
+from typing import Any
+
+
+K1 = 1.5
+B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "what which who how when where why do does did can could should would you your we our they their".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall((text or "").lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+def build_index(chunks: list[str]) -> dict[str, Any]:
+    """Inverted index with BM25 statistics; JSON-serializable so it can be stored next to the chunks."""
+
+    postings: dict[str, list[list[int]]] = {}
+    lengths: list[int] = []
+
+    for chunk_index, chunk in enumerate(chunks):
+        tokens = tokenize(chunk)
+        lengths.append(len(tokens))
+        counts: dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings.setdefault(token, []).append([chunk_index, count])
+
+    return {
+        "k1": K1,
+        "b": B,
+        "docCount": len(chunks),
+        "avgLength": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "lengths": lengths,
+        "postings": postings,
+    }
+
+
+def score(index: dict[str, Any], query: str) -> dict[int, float]:
+    doc_count = index.get("docCount") or 0
+    if not doc_count:
+        return {}
+
+    k1 = index.get("k1", K1)
+    b = index.get("b", B)
+    avg_length = index.get("avgLength") or 1.0
+    lengths = index.get("lengths") or []
+    postings = index.get("postings") or {}
+
+    scores: dict[int, float] = {}
+    for token in set(tokenize(query)):
+        entries = postings.get(token)
+        if not entries:
+            continue
+        idf = math.log(1.0 + (doc_count - len(entries) + 0.5) / (len(entries) + 0.5))
+        for chunk_index, tf in entries:
+            norm = k1 * (1.0 - b + b * lengths[chunk_index] / avg_length)
+            scores[chunk_index] = scores.get(chunk_index, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+    return scores
+
+
+def top_k(index: dict[str, Any], query: str, k: int) -> list[tuple[int, float]]:
+    ranked = sorted(score(index, query).items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:k]
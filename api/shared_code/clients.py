@@ -0,0 +1,48 @@
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI, OpenAI
+
+
+_clients: dict[tuple[str, ...], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _cached(key: tuple[str, ...], factory: Any) -> Any:
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+    return client
+
+
+def azure_openai_client(endpoint: str, api_key: str, api_version: str) -> "AzureOpenAI":
+    def build() -> "AzureOpenAI":
+        from openai import AzureOpenAI
+
+        return AzureOpenAI(
+            api_key=api_key,
+            azure_endpoint=endpoint,
+            api_version=api_version,
+        )
+
+    return _cached(("azure", endpoint or "", api_key or "", api_version or ""), build)
+
+
+def openai_client(base_url: str, api_key: str) -> "OpenAI":
+    def build() -> "OpenAI":
+        from openai import OpenAI
+
+        return OpenAI(base_url=base_url, api_key=api_key)
+
+    return _cached(("openai", base_url or "", api_key or ""), build)
+
+
+def cached_client_count() -> int:
+    return len(_clients)
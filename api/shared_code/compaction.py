@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_THRESHOLD_TOKENS = 6000
+DEFAULT_HARD_LIMIT_TOKENS = 12000
+DEFAULT_KEEP_RECENT_MESSAGES = 8
+BLOCK_MESSAGES = 8
+SUMMARY_INPUT_CHARS = 24000
+CACHE_SIZE = 512
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+Summarize = Callable[[str, list[dict[str, str]]], str]
+
+
+def estimate_tokens(messages: list[dict[str, Any]]) -> int:
+    return sum(len(str(message.get("content") or "")) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def _prefix_keys(history: list[dict[str, Any]]) -> list[str]:
+    """keys[n] identifies history[:n]; chained so every prefix costs one hash update."""
+
+    digest = hashlib.sha256()
+    keys = [digest.hexdigest()]
+    for message in history:
+        digest.update(json.dumps([message.get("role"), message.get("content")]).encode("utf-8"))
+        keys.append(digest.hexdigest())
+    return keys
+
+
+def _spans(messages: list[dict[str, Any]], max_chars: int) -> list[list[dict[str, Any]]]:
+    spans: list[list[dict[str, Any]]] = []
+    current: list[dict[str, Any]] = []
+    size = 0
+    for message in messages:
+        length = len(str(message.get("content") or ""))
+        if current and size + length > max_chars:
+            spans.append(current)
+            current, size = [], 0
+        current.append(message)
+        size += length
+    if current:
+        spans.append(current)
+    return spans
+
+
+def summary_message(summary: str) -> dict[str, str]:
+    return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+
+class HistoryCompactor:
+    """Replaces older turns with a rolling summary, cached by history prefix hash and refreshed in the background."""
+
+    def __init__(
+        self,
+        threshold_tokens: int,
+        hard_limit_tokens: int,
+        keep_recent: int,
+        block: int = BLOCK_MESSAGES,
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        self.threshold_tokens = threshold_tokens
+        self.hard_limit_tokens = max(hard_limit_tokens, threshold_tokens)
+        self.keep_recent = keep_recent
+        self.block = block
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="compaction")
+
+    def _cached(self, key: str) -> str | None:
+        with self._lock:
+            summary = self._cache.get(key)
+            if summary is not None:
+                self._cache.move_to_end(key)
+            return summary
+
+    def _remember(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._cache[key] = summary
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _summarize(
+        self,
+        history: list[dict[str, Any]],
+        keys: list[str],
+        start: int,
+        summary: str,
+        target: int,
+        summarize: Summarize,
+    ) -> str:
+        for span in _spans(history[start:target], SUMMARY_INPUT_CHARS):
+            summary = summarize(summary, span)
+        self._remember(keys[target], summary)
+        return summary
+
+    def _summarize_in_background(
+        self,
+        history: list[dict[str, Any]],
+        keys: list[str],
+        start: int,
+        summary: str,
+        target: int,
+        summarize: Summarize,
+    ) -> None:
+        key = keys[target]
+        with self._lock:
+            if key in self._in_flight:
+                return
+            self._in_flight.add(key)
+
+        def run() -> None:
+            try:
+                self._summarize(history, keys, start, summary, target, summarize)
+            except Exception as ex:
+                logging.warning("Background history compaction failed: %s", ex)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(key)
+
+        self._executor.submit(run)
+
+    def compact(self, history: list[dict[str, Any]], summarize: Summarize) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        tokens = estimate_tokens(history)
+        info: dict[str, Any] = {"compacted": False, "originalTokens": tokens}
+        if tokens <= self.threshold_tokens:
+            return history, info
+
+        target = ((len(history) - self.keep_recent) // self.block) * self.block
+        if target <= 0:
+            return history, info
+
+        keys = _prefix_keys(history)
+        start, summary = 0, ""
+        for boundary in range(target, 0, -self.block):
+            cached = self._cached(keys[boundary])
+            if cached is not None:
+                start, summary = boundary, cached
+                break
+
+        if start < target:
+            candidate = [summary_message(summary), *history[start:]] if summary else history
+            if estimate_tokens(candidate) > self.hard_limit_tokens:
+                try:
+                    summary = self._summarize(history, keys, start, summary, target, summarize)
+                    start = target
+                    info["summarizedInline"] = True
+                except Exception as ex:
+                    # The summary model is a helper: fall back to the cached prefix (or the full history).
+                    logging.warning("Inline history compaction failed, continuing uncompacted: %s", ex)
+            else:
+                self._summarize_in_background(list(history), keys, start, summary, target, summarize)
+
+        if not summary:
+            return history, info
+
+        compacted = [summary_message(summary), *history[start:]]
+        info.update({"compacted": True, "summarizedMessages": start, "compactedTokens": estimate_tokens(compacted)})
+        return compacted, info
+
+
+def _int_env(name: str, default: int) -> int:
+    value = (os.getenv(name) or "").strip()
+    return int(value) if value.isdigit() else default
+
+
+_compactor: HistoryCompactor | None = None
+_compactor_lock = threading.Lock()
+
+
+def default_compactor() -> HistoryCompactor | None:
+    """None when HISTORY_COMPACTION_TOKENS is 0."""
+
+    global _compactor
+
+    threshold = _int_env("HISTORY_COMPACTION_TOKENS", DEFAULT_THRESHOLD_TOKENS)
+    if threshold <= 0:
+        return None
+
+    if _compactor is None:
+        with _compactor_lock:
+            if _compactor is None:
+                _compactor = HistoryCompactor(
+                    threshold_tokens=threshold,
+                    hard_limit_tokens=_int_env("HISTORY_COMPACTION_HARD_TOKENS", DEFAULT_HARD_LIMIT_TOKENS),
+                    keep_recent=_int_env("HISTORY_KEEP_RECENT_MESSAGES", DEFAULT_KEEP_RECENT_MESSAGES),
+                )
+    return _compactor
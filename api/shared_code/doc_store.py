@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+
+DEFAULT_TTL_HOURS = 24
+CACHE_SIZE = 16
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def document_id_for(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class DocumentStore:
+    """Parsed documents (chunks, lexical index, optional embeddings) on local disk, scoped per user."""
+
+    def __init__(self, root: Path, ttl_seconds: float, cache_size: int = CACHE_SIZE) -> None:
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def _path(self, owner: str | None, document_id: str) -> Path:
+        owner_key = hashlib.sha256((owner or "anonymous").encode("utf-8")).hexdigest()[:24]
+        return self.root / owner_key / f"{document_id}.json"
+
+    def _remember(self, key: tuple[str, str], document: dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = document
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def save(self, owner: str | None, document: dict[str, Any]) -> str:
+        document_id = document["documentId"]
+        path = self._path(owner, document_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(document))
+        os.replace(temp_name, path)
+
+        self._remember((owner or "", document_id), document)
+        self._sweep_expired()
+        return document_id
+
+    def load(self, owner: str | None, document_id: str) -> dict[str, Any] | None:
+        if not _ID_PATTERN.match(document_id or ""):
+            return None
+
+        key = (owner or "", document_id)
+        path = self._path(owner, document_id)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            os.utime(path)
+        except OSError:
+            return None
+
+        if cached is not None:
+            return cached
+
+        try:
+            with open(path, encoding="utf-8") as handle:
+                document = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, document)
+        return document
+
+    def update(self, owner: str | None, document_id: str, fields: dict[str, Any]) -> dict[str, Any] | None:
+        document = self.load(owner, document_id)
+        if document is None:
+            return None
+        updated = {**document, **fields}
+        self.save(owner, updated)
+        return updated
+
+    def _sweep_expired(self) -> None:
+        now = time.time()
+        if now - self._last_sweep < 300:
+            return
+        self._last_sweep = now
+
+        for path in self.root.glob("*/*.json"):
+            try:
+                if now - path.stat().st_mtime > self.ttl_seconds:
+                    path.unlink()
+            except OSError:
+                continue
+
+
+_store: DocumentStore | None = None
+_store_lock = threading.Lock()
+
+
+def default_store() -> DocumentStore:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                root = (os.getenv("DOCUMENT_STORE_DIR") or "").strip() or os.path.join(
+                    tempfile.gettempdir(), "ti-ai-documents"
+                )
+                ttl_hours = (os.getenv("DOCUMENT_STORE_TTL_HOURS") or "").strip()
+                ttl = (int(ttl_hours) if ttl_hours.isdigit() else DEFAULT_TTL_HOURS) * 3600
+                _store = DocumentStore(Path(root), ttl)
+    return _store
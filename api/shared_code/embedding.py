@@ -0,0 +1,190 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from shared_code import clients, retrieval
+
+
+class EmbeddingError(Exception):
+    def __init__(self, message: str, status_code: int = 500) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class EmbeddingSettings:
+    endpoint: str
+    api_key: str
+    deployment: str
+    api_version: str
+    dimensions: int | None = None
+
+
+# Deployments that rejected the `dimensions` parameter (ada-002 style); their vectors are truncated locally instead.
+_truncating_deployments: set[str] = set()
+
+
+def _get_required_env(name: str) -> str | None:
+    value = (os.getenv(name) or "").strip()
+    return value or None
+
+
+def _normalize_azure_openai_endpoint(value: str) -> str:
+    raw = (value or "").strip().rstrip("/")
+    if not raw:
+        return ""
+
+    parsed = urlparse(raw)
+    path = (parsed.path or "").rstrip("/")
+
+    if "/openai" in path:
+        before_openai = path.split("/openai", 1)[0]
+        raw = f"{parsed.scheme}://{parsed.netloc}{before_openai}"
+
+    return raw.rstrip("/")
+
+
+def _extract_deployment_from_url(value: str) -> str | None:
+    raw = (value or "").strip()
+    if not raw:
+        return None
+
+    parsed = urlparse(raw)
+    path = parsed.path or ""
+    marker = "/openai/deployments/"
+    if marker not in path:
+        return None
+
+    tail = path.split(marker, 1)[1]
+    deployment = tail.split("/", 1)[0].strip()
+    return deployment or None
+
+
+def _extract_api_version_from_url(value: str) -> str | None:
+    raw = (value or "").strip()
+    if not raw:
+        return None
+
+    parsed = urlparse(raw)
+    query = parse_qs(parsed.query or "")
+    versions = query.get("api-version") or query.get("api_version")
+    if not versions:
+        return None
+    version = str(versions[0] or "").strip()
+    return version or None
+
+
+def _resolve_api_version(raw_endpoint: str) -> str:
+    return (
+        (os.getenv("READ_DOC_EMBEDDINGS_API_VERSION") or "").strip()
+        or (os.getenv("EMBEDDINGS_API_VERSION") or "").strip()
+        or _extract_api_version_from_url(raw_endpoint)
+        or "2024-02-01"
+    )
+
+
+def _resolve_dimensions() -> int | None:
+    value = (os.getenv("EMBEDDINGS_DIMENSIONS") or "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def reduce_dimensions(vector: list[float], dimensions: int) -> list[float]:
+    """Matryoshka-style reduction: keep the leading dimensions and renormalize to unit length."""
+
+    return retrieval.normalize(vector[:dimensions])
+
+
+def resolve_settings() -> EmbeddingSettings:
+    raw_endpoint = (
+        _get_required_env("READ_DOC_EMBEDDING_ENDPOINT")
+        or _get_required_env("AZURE_OPENAI_ENDPOINT")
+    )
+    api_key = (
+        _get_required_env("READ_DOC_EMBEDDING_KEY")
+        or _get_required_env("AZURE_OPENAI_KEY")
+    )
+
+    if not raw_endpoint or not api_key:
+        raise EmbeddingError(
+            "Missing required environment variables: "
+            "READ_DOC_EMBEDDING_ENDPOINT (or AZURE_OPENAI_ENDPOINT), "
+            "READ_DOC_EMBEDDING_KEY (or AZURE_OPENAI_KEY)"
+        )
+
+    deployment = (
+        _get_required_env("READ_DOC_EMBEDDING_DEPLOYMENT")
+        or _get_required_env("EMBEDDINGS_DEPLOYMENT")
+        or _extract_deployment_from_url(raw_endpoint)
+    )
+
+    if not deployment:
+        raise EmbeddingError(
+            "Missing required environment variable: READ_DOC_EMBEDDING_DEPLOYMENT (or EMBEDDINGS_DEPLOYMENT)"
+        )
+
+    return EmbeddingSettings(
+        endpoint=_normalize_azure_openai_endpoint(raw_endpoint),
+        api_key=api_key,
+        deployment=deployment,
+        api_version=_resolve_api_version(raw_endpoint),
+        dimensions=_resolve_dimensions(),
+    )
+
+
+def create_embeddings(settings: EmbeddingSettings, inputs: list[str]) -> tuple[list[list[float]], dict[str, Any] | None]:
+    client = clients.azure_openai_client(settings.endpoint, settings.api_key, settings.api_version)
+    options: dict[str, Any] = {}
+    if settings.dimensions is not None and settings.deployment not in _truncating_deployments:
+        options["dimensions"] = settings.dimensions
+
+    try:
+        try:
+            response = client.embeddings.create(
+                model=settings.deployment,
+                input=inputs,
+                **options,
+            )
+        except Exception as ex:
+            if not options or "dimensions" not in str(ex).lower():
+                raise
+            logging.warning("Deployment '%s' rejected dimensions, truncating locally: %s", settings.deployment, ex)
+            _truncating_deployments.add(settings.deployment)
+            response = client.embeddings.create(model=settings.deployment, input=inputs)
+    except Exception as ex:
+        raise EmbeddingError(f"Embeddings call failed: {str(ex)}") from ex
+
+    vectors: list[list[float] | None] = [None] * len(inputs)
+    for item in getattr(response, "data", []) or []:
+        index = getattr(item, "index", None)
+        embedding = getattr(item, "embedding", None)
+        if isinstance(index, int) and 0 <= index < len(vectors) and isinstance(embedding, list):
+            vectors[index] = embedding
+
+    if any(v is None for v in vectors):
+        raise EmbeddingError("Embeddings response was missing one or more vectors.")
+
+    if settings.dimensions is not None:
+        vectors = [
+            reduce_dimensions(v, settings.dimensions) if v is not None and len(v) > settings.dimensions else v
+            for v in vectors
+        ]
+
+    usage = getattr(response, "usage", None)
+    usage_payload = None
+    if usage is not None:
+        usage_payload = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+        }
+
+    return [v for v in vectors if v is not None], usage_payload
+
+
+def warm_up() -> None:
+    try:
+        settings = resolve_settings()
+    except EmbeddingError:
+        return
+    clients.azure_openai_client(settings.endpoint, settings.api_key, settings.api_version)
@@ -0,0 +1,312 @@
+import codecs
+import logging
+import os
+import queue
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from shared_code import bm25, doc_store, embedding, extraction_pool, retrieval
+
+
+MAX_TEXT_CHARS = 200000
+CHUNK_SIZE = 1400
+CHUNK_OVERLAP = 200
+ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md"}
+TEXT_PIECE_CHARS = 64 * 1024
+INGEST_BATCH_CHUNKS = 16
+INGEST_QUEUE_BATCHES = 4
+DEFAULT_INGEST_CONCURRENCY = 4
+
+# Raw upload bytes in memory, or the path of a file on local disk that is read as a stream.
+Source = bytes | Path
+
+
+def extension(file_name: str) -> str:
+    lower_name = (file_name or "").strip().lower()
+    if "." not in lower_name:
+        return ""
+    return "." + lower_name.rsplit(".", 1)[1]
+
+
+def _iter_pdf_text(source: Source) -> Iterator[str]:
+    from pypdf import PdfReader
+
+    if isinstance(source, bytes):
+        reader = PdfReader(BytesIO(source))
+        for index, page in enumerate(reader.pages):
+            yield ("\n\n" if index else "") + (page.extract_text() or "")
+        return
+
+    # PdfReader copies a path into memory; an open handle keeps it reading objects from disk on demand.
+    with open(source, "rb") as handle:
+        reader = PdfReader(handle)
+        for index, page in enumerate(reader.pages):
+            yield ("\n\n" if index else "") + (page.extract_text() or "")
+
+
+def _iter_docx_text(source: Source) -> Iterator[str]:
+    from docx import Document
+
+    document = Document(BytesIO(source) if isinstance(source, bytes) else str(source))
+    for index, paragraph in enumerate(document.paragraphs):
+        yield ("\n" if index else "") + paragraph.text
+
+
+def _iter_plain_text(source: Source) -> Iterator[str]:
+    if isinstance(source, bytes):
+        try:
+            text = source.decode("utf-8")
+        except UnicodeDecodeError:
+            text = source.decode("latin-1", errors="ignore")
+        for start in range(0, len(text), TEXT_PIECE_CHARS):
+            yield text[start : start + TEXT_PIECE_CHARS]
+        return
+
+    with open(source, "rb") as handle:
+        # Same rule as for bytes: the whole file must be valid UTF-8, otherwise it is read as latin-1.
+        encoding = "utf-8"
+        validator = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for block in iter(lambda: handle.read(TEXT_PIECE_CHARS), b""):
+                validator.decode(block)
+            validator.decode(b"", final=True)
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+
+        handle.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        for block in iter(lambda: handle.read(TEXT_PIECE_CHARS), b""):
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def iter_text(file_ext: str, source: Source) -> Iterator[str]:
+    """Extracted text in pieces (page, paragraph or block) whose concatenation is the full text."""
+
+    if file_ext == ".pdf":
+        return _iter_pdf_text(source)
+    if file_ext == ".docx":
+        return _iter_docx_text(source)
+    if file_ext in {".txt", ".md"}:
+        return _iter_plain_text(source)
+    return iter(())
+
+
+def extract_text(file_ext: str, source: Source) -> str:
+    return "".join(iter_text(file_ext, source))
+
+
+def isolated_text(file_ext: str, source: Source) -> Iterator[str]:
+    """iter_text in an extraction worker when the pool is enabled, otherwise in this process."""
+
+    pool = extraction_pool.default_pool()
+    if pool is None:
+        return iter_text(file_ext, source)
+    return pool.iter_text(file_ext, source)
+
+
+def normalize_text(text: str) -> str:
+    compact = "\n".join(line.rstrip() for line in text.splitlines())
+    return compact.strip()
+
+
+def chunk_text(text: str) -> list[str]:
+    value = text[:MAX_TEXT_CHARS]
+    chunks: list[str] = []
+    start = 0
+
+    while start < len(value):
+        end = min(start + CHUNK_SIZE, len(value))
+        chunks.append(value[start:end].strip())
+        if end >= len(value):
+            break
+        start = max(end - CHUNK_OVERLAP, start + 1)
+
+    return [chunk for chunk in chunks if chunk]
+
+
+class StreamingChunker:
+    """Incremental chunk_text(normalize_text(text)) for text that arrives in pieces; emits each chunk once final."""
+
+    def __init__(self, emit: Callable[[str], None]) -> None:
+        self._emit = emit
+        self._pending = ""
+        self._text = ""
+        self._start = 0
+
+    @property
+    def full(self) -> bool:
+        # A pending line that alone reaches the cap already fixes the capped text, even if it never ends.
+        return len(self._text.rstrip()) >= MAX_TEXT_CHARS or len(self._pending.rstrip()) >= MAX_TEXT_CHARS
+
+    @property
+    def text(self) -> str:
+        return self._text.strip()[:MAX_TEXT_CHARS]
+
+    def _append_lines(self, lines: list[str]) -> None:
+        normalized = "\n".join(line.rstrip() for line in lines)
+        if self._text:
+            self._text += "\n" + normalized
+        else:
+            self._text = normalized.lstrip()
+
+    def _chunk(self, start: int, end: int) -> None:
+        chunk = self._text[start:end].strip()
+        if chunk:
+            self._emit(chunk)
+
+    def feed(self, piece: str) -> None:
+        lines = (self._pending + piece).splitlines(keepends=True)
+        self._pending = ""
+        if lines and (lines[-1].endswith("\r") or lines[-1].splitlines() == [lines[-1]]):
+            self._pending = lines.pop()
+        if lines:
+            self._append_lines(lines)
+
+        limit = min(len(self._text.rstrip()), MAX_TEXT_CHARS)
+        while self._start + CHUNK_SIZE < limit:
+            end = self._start + CHUNK_SIZE
+            self._chunk(self._start, end)
+            self._start = max(end - CHUNK_OVERLAP, self._start + 1)
+
+    def finish(self) -> None:
+        if self._pending:
+            self._append_lines([self._pending])
+            self._pending = ""
+        value = self._text.strip()[:MAX_TEXT_CHARS]
+        while self._start < len(value):
+            end = min(self._start + CHUNK_SIZE, len(value))
+            self._chunk(self._start, end)
+            if end >= len(value):
+                break
+            self._start = max(end - CHUNK_OVERLAP, self._start + 1)
+
+
+def _ingest_concurrency() -> int:
+    value = (os.getenv("INGEST_EMBED_CONCURRENCY") or "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else DEFAULT_INGEST_CONCURRENCY
+
+
+def ingest(file_ext: str, source: Source, settings: embedding.EmbeddingSettings | None) -> dict[str, Any]:
+    """Extract and chunk on this thread while consumer threads embed finished chunk batches from a bounded queue."""
+
+    started = time.perf_counter()
+    chunks: list[str] = []
+    vectors: list[list[float] | None] = []
+    batches: queue.Queue[tuple[int, list[str]] | None] = queue.Queue(maxsize=INGEST_QUEUE_BATCHES)
+    failures: list[Exception] = []
+    batch: list[str] = []
+
+    def consume() -> None:
+        while True:
+            item = batches.get()
+            if item is None:
+                return
+            if failures:
+                continue
+            offset, texts = item
+            try:
+                embedded, _ = embedding.create_embeddings(settings, texts)
+            except Exception as ex:
+                failures.append(ex)
+                continue
+            for index, vector in enumerate(embedded):
+                vectors[offset + index] = retrieval.normalize(vector)
+
+    def flush() -> None:
+        if batch and settings is not None and not failures:
+            batches.put((len(chunks) - len(batch), list(batch)))
+        batch.clear()
+
+    def emit(chunk: str) -> None:
+        chunks.append(chunk)
+        vectors.append(None)
+        batch.append(chunk)
+        if len(batch) >= INGEST_BATCH_CHUNKS:
+            flush()
+
+    workers = [
+        threading.Thread(target=consume, name=f"ingest-{index}", daemon=True)
+        for index in range(_ingest_concurrency() if settings is not None else 0)
+    ]
+    for worker in workers:
+        worker.start()
+
+    chunker = StreamingChunker(emit)
+    pieces = isolated_text(file_ext, source)
+    try:
+        for piece in pieces:
+            chunker.feed(piece)
+            if chunker.full:
+                break
+        chunker.finish()
+        flush()
+        extract_ms = (time.perf_counter() - started) * 1000.0
+    finally:
+        close = getattr(pieces, "close", None)
+        if close is not None:
+            close()
+        for _ in workers:
+            batches.put(None)
+        for worker in workers:
+            worker.join()
+
+    if failures:
+        # Embeddings are an extra: keep the text and chunks, like an ingest without embedding settings.
+        logging.warning("Embedding failed, ingesting without vectors: %s", failures[0])
+
+    return {
+        "text": chunker.text,
+        "chunks": chunks,
+        "embeddings": vectors if settings is not None and not failures else None,
+        "extractMs": round(extract_ms, 1),
+        "totalMs": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+def process(file_ext: str, source: Source, with_embeddings: bool) -> dict[str, Any]:
+    """Text and chunks, plus vectors and timings when with_embeddings is set and embeddings are configured.
+
+    Vectors are None when embeddings are not configured or an embedding call fails. Raises
+    extraction_pool.ExtractionLimitError when the document exceeds the extraction worker's limits; any other exception
+    is a parse failure.
+    """
+
+    if not with_embeddings:
+        result = ingest(file_ext, source, None)
+        return {"text": result["text"], "chunks": result["chunks"], "embeddings": None, "timings": None}
+
+    try:
+        settings = embedding.resolve_settings()
+    except embedding.EmbeddingError as ex:
+        logging.warning("Embeddings are not configured, ingesting without vectors: %s", ex)
+        settings = None
+
+    result = ingest(file_ext, source, settings)
+    return {
+        "text": result["text"],
+        "chunks": result["chunks"],
+        "embeddings": result["embeddings"],
+        "timings": {"extractMs": result["extractMs"], "totalMs": result["totalMs"]},
+    }
+
+
+def document_record(file_name: str, processed: dict[str, Any]) -> dict[str, Any]:
+    """The doc_store entry for a processed upload."""
+
+    document = {
+        "documentId": doc_store.document_id_for(processed["text"]),
+        "fileName": file_name,
+        "chunks": processed["chunks"],
+        "lexicalIndex": bm25.build_index(processed["chunks"]),
+    }
+    if processed["embeddings"] is not None:
+        document["embeddings"] = processed["embeddings"]
+    return document
@@ -0,0 +1,188 @@
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows local development
+    resource = None
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_CPU_SECONDS = 30
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_TIMEOUT_SECONDS = 60
+STOP_TIMEOUT_SECONDS = 5
+
+_API_ROOT = Path(__file__).resolve().parents[1]
+
+
+class ExtractionLimitError(Exception):
+    """A document exceeded the worker's CPU, memory or time budget; the worker was replaced."""
+
+    status_code = 422
+
+
+class _Worker:
+    def __init__(self, cpu_seconds: int, memory_bytes: int) -> None:
+        parent_sock, child_sock = socket.socketpair()
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(_API_ROOT), os.getenv("PYTHONPATH")]))}
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "shared_code.extraction_worker",
+                str(child_sock.fileno()),
+                str(cpu_seconds),
+                str(memory_bytes),
+            ],
+            cwd=_API_ROOT,
+            env=env,
+            pass_fds=(child_sock.fileno(),),
+            stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Reusable subprocess workers that run text extraction under per-job CPU time and address-space limits.
+
+    Text comes back one piece at a time and the worker waits for the caller to ask for the next one, so callers keep
+    the streaming behaviour of extraction.iter_text and can stop early.
+    """
+
+    def __init__(self, size: int, cpu_seconds: int, memory_bytes: int, timeout_seconds: float) -> None:
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.timeout_seconds = timeout_seconds
+        self.replaced = 0
+        self._idle: list[_Worker] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.cpu_seconds, self.memory_bytes)
+
+    def _acquire(self) -> _Worker:
+        self._slots.acquire()
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker.alive:
+            try:
+                worker = self._spawn()
+            except Exception:
+                self._slots.release()
+                raise
+        return worker
+
+    def _release(self, worker: _Worker) -> None:
+        try:
+            if not worker.alive:
+                worker.kill()
+                with self._lock:
+                    self.replaced += 1
+                worker = self._spawn()
+            with self._lock:
+                self._idle.append(worker)
+        except Exception as ex:
+            logging.warning("Could not replace extraction worker: %s", ex)
+        finally:
+            self._slots.release()
+
+    def _receive(self, worker: _Worker, timeout: float) -> tuple[str, str | None]:
+        try:
+            if not worker.conn.poll(timeout):
+                worker.kill()
+                raise ExtractionLimitError(f"Document extraction took longer than {timeout:g} seconds.")
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            pass
+
+        try:
+            worker.process.wait(STOP_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            pass
+        worker.kill()
+        if worker.process.returncode == -signal.SIGXCPU:
+            raise ExtractionLimitError(f"Document extraction exceeded {self.cpu_seconds} seconds of CPU time.")
+        raise ExtractionLimitError("Document extraction worker stopped unexpectedly (likely out of memory).")
+
+    def iter_text(self, file_ext: str, source: bytes | Path) -> Iterator[str]:
+        """Same pieces as extraction.iter_text, produced in a worker; raises ExtractionLimitError on overrun."""
+
+        worker = self._acquire()
+        finished = False
+        try:
+            worker.conn.send((file_ext, source if isinstance(source, bytes) else str(source)))
+            while True:
+                kind, value = self._receive(worker, self.timeout_seconds)
+                if kind == "piece":
+                    yield value
+                    worker.conn.send("next")
+                    continue
+                finished = True
+                if kind == "done":
+                    return
+                if kind == "memory":
+                    worker.kill()
+                    raise ExtractionLimitError(
+                        f"Document extraction exceeded the {self.memory_bytes // (1024 * 1024)} MB memory limit."
+                    )
+                raise ValueError(value)
+        finally:
+            if not finished and worker.alive:
+                try:
+                    worker.conn.send("stop")
+                    while self._receive(worker, STOP_TIMEOUT_SECONDS)[0] == "piece":
+                        worker.conn.send("stop")
+                except (ExtractionLimitError, OSError):
+                    worker.kill()
+            self._release(worker)
+
+
+def _int_env(name: str, default: int) -> int:
+    value = (os.getenv(name) or "").strip()
+    return int(value) if value.isdigit() else default
+
+
+_pool: ExtractionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def default_pool() -> ExtractionPool | None:
+    """None when EXTRACTION_WORKERS is 0 or the platform has no resource limits; extraction then runs in process."""
+
+    global _pool
+
+    size = _int_env("EXTRACTION_WORKERS", DEFAULT_WORKERS)
+    if size <= 0 or resource is None:
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ExtractionPool(
+                    size=size,
+                    cpu_seconds=_int_env("EXTRACTION_CPU_SECONDS", DEFAULT_CPU_SECONDS),
+                    memory_bytes=_int_env("EXTRACTION_MEMORY_MB", DEFAULT_MEMORY_MB) * 1024 * 1024,
+                    timeout_seconds=_int_env("EXTRACTION_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS),
+                )
+    return _pool
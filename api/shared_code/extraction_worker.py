@@ -0,0 +1,74 @@
+"""Entry point of an isolated extraction worker: python -m shared_code.extraction_worker <fd> <cpu-seconds> <memory-bytes>."""
+
+import resource
+import sys
+from multiprocessing.connection import Connection
+from typing import Iterator
+
+
+def _limit_cpu(cpu_seconds: int) -> None:
+    """Soft CPU limit at the time used so far plus this job's budget; the kernel sends SIGXCPU past it."""
+
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds <= 0:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _send_pieces(conn: Connection, pieces: Iterator[str], batch_chars: int) -> None:
+    """Send pieces joined into batches of about batch_chars, one round trip each, until the caller stops asking."""
+
+    buffered: list[str] = []
+    size = 0
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= batch_chars:
+            conn.send(("piece", "".join(buffered)))
+            buffered, size = [], 0
+            if conn.recv() != "next":
+                return
+    if buffered:
+        conn.send(("piece", "".join(buffered)))
+        conn.recv()
+
+
+def main() -> None:
+    conn = Connection(int(sys.argv[1]))
+    cpu_seconds = int(sys.argv[2])
+    memory_bytes = int(sys.argv[3])
+
+    from shared_code import extraction
+
+    if memory_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+    while True:
+        try:
+            file_ext, source = conn.recv()
+        except EOFError:
+            return
+
+        _limit_cpu(cpu_seconds)
+        try:
+            _send_pieces(conn, extraction.iter_text(file_ext, source), extraction.TEXT_PIECE_CHARS)
+            conn.send(("done", None))
+        except MemoryError:
+            try:
+                conn.send(("memory", None))
+            except Exception:
+                pass
+            return
+        except Exception as ex:
+            conn.send(("error", str(ex)))
+        finally:
+            _limit_cpu(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from io import BytesIO
+from pathlib import Path
+
+
+DEFAULT_MAX_MB = 512
+DEFAULT_BLOB_CONTAINER = "generated-images"
+THUMBNAIL_MAX_PX = 256
+VARIANTS = {"thumb", "webp"}
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+_CONTENT_TYPES = {extension: content_type for content_type, extension in _EXTENSIONS.items()}
+
+
+def is_valid_hash(value: str) -> bool:
+    return bool(_HASH_PATTERN.match(value or ""))
+
+
+def sniff_content_type(data: bytes) -> str:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in {b"GIF87a", b"GIF89a"}:
+        return "image/gif"
+    return "image/png"
+
+
+def render_variant(data: bytes, variant: str) -> bytes | None:
+    """Return WebP bytes for a variant, or None when Pillow is not installed or cannot decode the image."""
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+            if variant == "thumb":
+                image.thumbnail((THUMBNAIL_MAX_PX, THUMBNAIL_MAX_PX))
+            out = BytesIO()
+            image.save(out, format="WEBP", quality=80 if variant == "thumb" else 90)
+            return out.getvalue()
+    except Exception as ex:
+        logging.warning("Could not render '%s' image variant: %s", variant, ex)
+        return None
+
+
+class ImageStore(ABC):
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store the image and return its SHA-256 hex hash."""
+
+    @abstractmethod
+    def get(self, image_hash: str, variant: str = "") -> tuple[bytes, str, str] | None:
+        """(data, content type, variant served); the variant is "" when the original was returned instead."""
+
+
+class LocalDiskImageStore(ImageStore):
+    """Content-addressed images on local disk, evicting least recently used files above max_bytes."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def _path(self, image_hash: str, suffix: str) -> Path:
+        return self.root / image_hash[:2] / f"{image_hash}.{suffix}"
+
+    def _find(self, image_hash: str) -> Path | None:
+        for extension in _CONTENT_TYPES:
+            path = self._path(image_hash, extension)
+            if path.exists():
+                return path
+        return None
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_name, path)
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data)
+
+    def put(self, data: bytes) -> str:
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(image_hash, _EXTENSIONS[sniff_content_type(data)])
+        if path.exists():
+            os.utime(path)
+            return image_hash
+
+        self._write(path, data)
+        self._evict()
+        return image_hash
+
+    def get(self, image_hash: str, variant: str = "") -> tuple[bytes, str, str] | None:
+        original = self._find(image_hash)
+        if original is None:
+            return None
+        os.utime(original)
+
+        if variant in VARIANTS:
+            variant_path = self._path(image_hash, f"{variant}.webp")
+            if variant_path.exists():
+                os.utime(variant_path)
+                return variant_path.read_bytes(), "image/webp", variant
+            rendered = render_variant(original.read_bytes(), variant)
+            if rendered is not None:
+                self._write(variant_path, rendered)
+                self._evict()
+                return rendered, "image/webp", variant
+
+        return original.read_bytes(), _CONTENT_TYPES[original.suffix.lstrip(".")], ""
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(path.stat().st_size for path in self.root.glob("*/*") if path.is_file())
+            if self._total_bytes <= self.max_bytes:
+                return
+
+            files = sorted(
+                (path for path in self.root.glob("*/*") if path.is_file() and not path.name.endswith(".tmp")),
+                key=lambda path: path.stat().st_mtime,
+            )
+            for path in files:
+                if self._total_bytes <= self.max_bytes * 0.9:
+                    break
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                    self._total_bytes -= size
+                except OSError:
+                    continue
+
+
+class BlobImageStore(ImageStore):
+    """Content-addressed images in an Azure Storage container; use a lifecycle policy for eviction."""
+
+    def __init__(self, connection_string: str, container: str) -> None:
+        from azure.storage.blob import BlobServiceClient
+
+        self._container = BlobServiceClient.from_connection_string(connection_string).get_container_client(container)
+
+    def _blob_name(self, image_hash: str, variant: str = "") -> str:
+        return f"{image_hash}.{variant}" if variant else image_hash
+
+    def put(self, data: bytes) -> str:
+        from azure.core.exceptions import ResourceExistsError
+        from azure.storage.blob import ContentSettings
+
+        image_hash = hashlib.sha256(data).hexdigest()
+        try:
+            self._container.upload_blob(
+                self._blob_name(image_hash),
+                data,
+                overwrite=False,
+                content_settings=ContentSettings(content_type=sniff_content_type(data)),
+            )
+        except ResourceExistsError:
+            pass
+        return image_hash
+
+    def get(self, image_hash: str, variant: str = "") -> tuple[bytes, str, str] | None:
+        from azure.core.exceptions import ResourceNotFoundError
+        from azure.storage.blob import ContentSettings
+
+        try:
+            if variant in VARIANTS:
+                try:
+                    blob = self._container.download_blob(self._blob_name(image_hash, variant))
+                    return blob.readall(), "image/webp", variant
+                except ResourceNotFoundError:
+                    pass
+
+            data = self._container.download_blob(self._blob_name(image_hash)).readall()
+        except ResourceNotFoundError:
+            return None
+
+        if variant in VARIANTS:
+            rendered = render_variant(data, variant)
+            if rendered is not None:
+                self._container.upload_blob(
+                    self._blob_name(image_hash, variant),
+                    rendered,
+                    overwrite=True,
+                    content_settings=ContentSettings(content_type="image/webp"),
+                )
+                return rendered, "image/webp", variant
+
+        return data, sniff_content_type(data), ""
+
+
+_store: ImageStore | None = None
+_store_lock = threading.Lock()
+
+
+def _build_store() -> ImageStore:
+    backend = (os.getenv("IMAGE_STORE_BACKEND") or "local").strip().lower()
+    if backend == "blob":
+        return BlobImageStore(
+            (os.getenv("IMAGE_STORE_BLOB_CONNECTION_STRING") or "").strip(),
+            (os.getenv("IMAGE_STORE_BLOB_CONTAINER") or "").strip() or DEFAULT_BLOB_CONTAINER,
+        )
+
+    root = (os.getenv("IMAGE_STORE_DIR") or "").strip() or os.path.join(tempfile.gettempdir(), "ti-ai-images")
+    max_mb = (os.getenv("IMAGE_STORE_MAX_MB") or "").strip()
+    max_bytes = (int(max_mb) if max_mb.isdigit() else DEFAULT_MAX_MB) * 1024 * 1024
+    return LocalDiskImageStore(Path(root), max_bytes)
+
+
+def default_store() -> ImageStore:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build_store()
+    return _store
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 32
+DEFAULT_RESULT_TTL_SECONDS = 600
+FINISHED_STATUSES = {"succeeded", "failed"}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    owner: str | None
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    error_status: int | None = None
+    progress: dict[str, Any] | None = None
+    progress_version: int = 0
+    done: threading.Event = field(default_factory=threading.Event)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+
+    def report_progress(self, **fields: Any) -> None:
+        with self.changed:
+            self.progress = {**(self.progress or {}), **fields}
+            self.progress_version += 1
+            self.changed.notify_all()
+
+    def snapshot(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.progress is not None:
+            payload["progress"] = dict(self.progress)
+            payload["progressVersion"] = self.progress_version
+        if self.result is not None:
+            payload["result"] = self.result
+        if self.error is not None:
+            payload["error"] = self.error
+            payload["errorStatus"] = self.error_status
+        return payload
+
+
+class JobStore:
+    """In-process background jobs with a bounded backlog and TTL eviction of finished results."""
+
+    def __init__(self, workers: int, max_pending: int, result_ttl_seconds: float) -> None:
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        owner: str | None,
+        fn: Callable[[Job], dict[str, Any]],
+        map_error: Callable[[Exception], tuple[str, int]],
+    ) -> Job:
+        self._evict_expired()
+        job = Job(id=uuid.uuid4().hex, kind=kind, owner=owner)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Too many background jobs in progress (max {self.max_pending}). Try again shortly.")
+            self._pending += 1
+            self._jobs[job.id] = job
+
+        try:
+            self._executor.submit(self._run, job, fn, map_error)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], dict[str, Any]], map_error: Callable[[Exception], tuple[str, int]]) -> None:
+        job.status = "running"
+        try:
+            job.result = fn(job)
+            job.status = "succeeded"
+        except Exception as ex:
+            job.error, job.error_status = map_error(ex)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            with job.changed:
+                job.done.set()
+                job.changed.notify_all()
+
+    def get(self, job_id: str, owner: str | None) -> Job | None:
+        self._evict_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def wait(self, job: Job, timeout: float, after_version: int | None = None) -> bool:
+        """Block until the job finishes or, with after_version, until its progress moves past that version."""
+
+        if timeout <= 0:
+            return job.done.is_set()
+        if after_version is None:
+            return job.done.wait(timeout)
+        with job.changed:
+            job.changed.wait_for(lambda: job.done.is_set() or job.progress_version > after_version, timeout)
+        return job.done.is_set()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.status in FINISHED_STATUSES and (job.finished_at or 0) < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+def _int_env(name: str, default: int) -> int:
+    value = (os.getenv(name) or "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else default
+
+
+_store: JobStore | None = None
+_store_lock = threading.Lock()
+
+
+def default_store() -> JobStore:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(
+                    workers=_int_env("JOB_WORKERS", DEFAULT_WORKERS),
+                    max_pending=_int_env("JOB_MAX_PENDING", DEFAULT_MAX_PENDING),
+                    result_ttl_seconds=_int_env("JOB_RESULT_TTL_SECONDS", DEFAULT_RESULT_TTL_SECONDS),
+                )
+    return _store
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+
+CHARS_PER_TOKEN = 4
+DEFAULT_CALL_TOKENS = 6000
+DEFAULT_PARALLELISM = 10
+
+MAP_INSTRUCTIONS = (
+    "You are reading one section of a longer document. "
+    "Extract everything in this section that helps answer the user's question, "
+    "quoting figures, names, dates and clause numbers exactly. "
+    "If the section contains nothing relevant, reply with 'NO RELEVANT CONTENT'."
+)
+REDUCE_INSTRUCTIONS = (
+    "You are given notes taken from consecutive sections of one document, in order. "
+    "Combine them into a single answer to the user's question. "
+    "Do not mention sections or notes; if the notes contain nothing relevant, say so clearly."
+)
+
+ModelCall = Callable[[list[dict[str, str]]], str]
+ProgressCallback = Callable[..., None]
+
+
+def _int_env(name: str, default: int) -> int:
+    value = (os.getenv(name) or "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else default
+
+
+def call_budget_chars() -> int:
+    return _int_env("MAP_REDUCE_CALL_TOKENS", DEFAULT_CALL_TOKENS) * CHARS_PER_TOKEN
+
+
+def parallelism() -> int:
+    return _int_env("MAP_REDUCE_PARALLELISM", DEFAULT_PARALLELISM)
+
+
+def group_texts(texts: list[str], budget_chars: int) -> list[str]:
+    """Pack consecutive texts into groups of at most budget_chars, splitting texts that are larger on their own."""
+
+    groups: list[str] = []
+    current: list[str] = []
+    size = 0
+    for text in texts:
+        pieces = [text[start : start + budget_chars] for start in range(0, len(text), budget_chars)] or [""]
+        for piece in pieces:
+            if current and size + len(piece) > budget_chars:
+                groups.append("\n\n---\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 7
+    if current:
+        groups.append("\n\n---\n\n".join(current))
+    return groups
+
+
+def _map_messages(file_name: str, question: str, section: str, number: int, total: int) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": MAP_INSTRUCTIONS},
+        {
+            "role": "user",
+            "content": f"Document: {file_name} (section {number} of {total})\n\n{section}\n\nQuestion: {question}",
+        },
+    ]
+
+
+def _reduce_messages(file_name: str, question: str, notes: list[str]) -> list[dict[str, str]]:
+    joined = "\n\n".join(f"Notes {index + 1}:\n{note}" for index, note in enumerate(notes))
+    return [
+        {"role": "system", "content": REDUCE_INSTRUCTIONS},
+        {"role": "user", "content": f"Document: {file_name}\n\n{joined}\n\nQuestion: {question}"},
+    ]
+
+
+def run(
+    chunks: list[str],
+    question: str,
+    file_name: str,
+    call: ModelCall,
+    report: ProgressCallback | None = None,
+    budget_chars: int | None = None,
+    max_workers: int | None = None,
+) -> dict[str, object]:
+    """Answer a question over every chunk: one concurrent map call per budget-sized group, then reduce the notes."""
+
+    budget = budget_chars or call_budget_chars()
+    workers = max_workers or parallelism()
+    report = report or (lambda **_: None)
+
+    sections = group_texts(chunks, budget)
+    total = len(sections)
+    report(phase="map", completed=0, total=total)
+
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, total)), thread_name_prefix="map") as pool:
+        futures = {
+            pool.submit(call, _map_messages(file_name, question, section, number + 1, total)): number
+            for number, section in enumerate(sections)
+        }
+        notes = [""] * total
+        for completed, future in enumerate(as_completed(futures), start=1):
+            notes[futures[future]] = future.result()
+            report(phase="map", completed=completed, total=total)
+
+        relevant = [note for note in notes if note.strip() and "NO RELEVANT CONTENT" not in note.upper()]
+        rounds = 0
+        while len("\n\n".join(relevant)) > budget and len(relevant) > 1:
+            rounds += 1
+            batches = group_texts(relevant, budget)
+            if len(batches) >= len(relevant):
+                share = budget // len(relevant)
+                relevant = [note[:share] for note in relevant]
+                break
+            report(phase="combine", round=rounds, total=len(batches))
+            relevant = list(pool.map(lambda batch: call(_reduce_messages(file_name, question, [batch])), batches))
+
+    report(phase="reduce")
+    answer = call(_reduce_messages(file_name, question, relevant or ["NO RELEVANT CONTENT"]))
+    return {"text": answer, "sections": total, "combineRounds": rounds}
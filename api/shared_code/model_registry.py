@@ -0,0 +1,78 @@
+import os
+from typing import TYPE_CHECKING, Any
+
+from shared_code import clients
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
+
+# Picker order. "type" is what the frontend shows and routes on; "kind" is how chat calls the deployment.
+MODEL_REGISTRY = {
+    "gpt-35-turbo": {
+        "label": "gpt-35-turbo",
+        "type": "chat",
+        "kind": "chat_completions",
+        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
+        "key_env": "AZURE_OPENAI_KEY",
+        "api_version": "2025-03-01-preview",
+    },
+    "gpt-5-chat": {
+        "label": "gpt-5-chat",
+        "type": "chat",
+        "kind": "responses_text",
+        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
+        "key_env": "AZURE_OPENAI_KEY",
+        "api_version": "2025-03-01-preview",
+    },
+    "model-router": {
+        "label": "model-router",
+        "type": "chat",
+        "kind": "chat_completions",
+        "endpoint_env": "MODEL_ROUTER_ENDPOINT",
+        "key_env": "MODEL_ROUTER_KEY",
+        "fallback_endpoint_env": "AZURE_OPENAI_ENDPOINT",
+        "fallback_key_env": "AZURE_OPENAI_KEY",
+        "api_version": "2025-01-01-preview",
+        "api_version_env": "MODEL_ROUTER_API_VERSION",
+    },
+    "read-doc": {
+        "label": "gpt-4.1",
+        "type": "image-to-text",
+        "kind": "image_to_text",
+        "endpoint_env": "AZURE_OPENAI_ENDPOINT",
+        "key_env": "AZURE_OPENAI_KEY",
+        "api_version": "2025-03-01-preview",
+    },
+    "FLUX.1-Kontext-pro": {
+        "label": "FLUX.1-Kontext-pro",
+        "type": "picture",
+        "kind": "images_generate",
+        "endpoint_env": "FLUX_ENDPOINT",
+        "key_env": "FLUX_KEY",
+        "fallback_endpoint_env": "AZURE_OPENAI_ENDPOINT",
+        "fallback_key_env": "AZURE_OPENAI_KEY",
+        "api_version": "2025-04-01-preview",
+        "api_version_env": "FLUX_API_VERSION",
+    },
+}
+
+
+def _setting(config: dict[str, str], name: str) -> str | None:
+    return os.getenv(config[f"{name}_env"]) or os.getenv(config.get(f"fallback_{name}_env", ""))
+
+
+def is_configured(model: str) -> bool:
+    config = MODEL_REGISTRY[model]
+    return bool(_setting(config, "endpoint") and _setting(config, "key"))
+
+
+def resolve_client(model: str) -> tuple["AzureOpenAI", dict[str, str]]:
+    config = MODEL_REGISTRY[model]
+    api_version = os.getenv(config.get("api_version_env", "")) or config["api_version"]
+    client = clients.azure_openai_client(_setting(config, "endpoint"), _setting(config, "key"), api_version)
+    return client, config
+
+
+def picker_entries() -> list[dict[str, Any]]:
+    return [{"id": model, "label": config["label"], "type": config["type"]} for model, config in MODEL_REGISTRY.items()]
@@ -0,0 +1,159 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from shared_code import model_registry
+
+
+WINDOW_SAMPLES = 100
+WINDOW_SECONDS = 15 * 60
+DOWN_AFTER_FAILURES = 3
+DEGRADED_ERROR_RATE = 0.2
+PROBE_KINDS = {"chat_completions", "responses_text"}
+PROBE_PROMPT = "ping"
+
+
+@dataclass(frozen=True)
+class _Sample:
+    at: float
+    latency_ms: float
+    ok: bool
+    probe: bool
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _round_ms(value: float) -> int:
+    """Two significant digits, so the payload (and its ETag) only changes when latency moves noticeably."""
+
+    if value < 10:
+        return round(value)
+    magnitude = 10 ** (int(math.log10(value)) - 1)
+    return int(round(value / magnitude) * magnitude)
+
+
+class ModelStats:
+    """Rolling per-model call outcomes and latencies for this instance, from real traffic and the optional probe."""
+
+    def __init__(self, window_samples: int = WINDOW_SAMPLES, window_seconds: float = WINDOW_SECONDS) -> None:
+        self.window_samples = window_samples
+        self.window_seconds = window_seconds
+        self._samples: dict[str, deque[_Sample]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency_ms: float, ok: bool, probe: bool = False) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window_samples))
+            samples.append(_Sample(time.time(), latency_ms, ok, probe))
+
+    @contextmanager
+    def timed(self, model: str, probe: bool = False) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(model, (time.perf_counter() - started) * 1000.0, False, probe)
+            raise
+        self.record(model, (time.perf_counter() - started) * 1000.0, True, probe)
+
+    def snapshot(self, model: str) -> dict[str, Any]:
+        """health is unknown without recent samples, down after consecutive failures, degraded on a high error rate.
+
+        Latency percentiles come from probe samples when there are any (same tiny request every time, so models
+        compare fairly) and from successful traffic otherwise.
+        """
+
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            samples = [sample for sample in self._samples.get(model, ()) if sample.at >= cutoff]
+
+        if not samples:
+            return {"health": "unknown"}
+
+        recent = samples[-DOWN_AFTER_FAILURES:]
+        error_rate = sum(1 for sample in samples if not sample.ok) / len(samples)
+        if len(recent) == DOWN_AFTER_FAILURES and not any(sample.ok for sample in recent):
+            health = "down"
+        elif error_rate > DEGRADED_ERROR_RATE:
+            health = "degraded"
+        else:
+            health = "healthy"
+
+        # No sample count and a coarse error rate: the payload (and its ETag) must not change on every call.
+        payload: dict[str, Any] = {"health": health, "errorRate": round(error_rate, 1)}
+        probed = [sample.latency_ms for sample in samples if sample.ok and sample.probe]
+        latencies = probed or [sample.latency_ms for sample in samples if sample.ok]
+        if latencies:
+            payload.update(
+                {
+                    "latencySource": "probe" if probed else "traffic",
+                    "p50Ms": _round_ms(_percentile(latencies, 0.5)),
+                    "p95Ms": _round_ms(_percentile(latencies, 0.95)),
+                }
+            )
+        return payload
+
+
+def _probe_once(stats: ModelStats) -> None:
+    for model, config in model_registry.MODEL_REGISTRY.items():
+        if config["kind"] not in PROBE_KINDS or not model_registry.is_configured(model):
+            continue
+        try:
+            client, _ = model_registry.resolve_client(model)
+            with stats.timed(model, probe=True):
+                if config["kind"] == "chat_completions":
+                    client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": PROBE_PROMPT}],
+                        max_tokens=1,
+                    )
+                else:
+                    client.responses.create(model=model, input=PROBE_PROMPT, max_output_tokens=16)
+        except Exception as ex:
+            logging.warning("Model probe for '%s' failed: %s", model, ex)
+
+
+def _probe_interval() -> int:
+    value = (os.getenv("MODEL_PROBE_INTERVAL_SECONDS") or "").strip()
+    return int(value) if value.isdigit() else 0
+
+
+_stats = ModelStats()
+_probe_started = False
+_probe_lock = threading.Lock()
+
+
+def default_stats() -> ModelStats:
+    return _stats
+
+
+def start_probe() -> bool:
+    """Probe every chat model on a daemon thread once per process when MODEL_PROBE_INTERVAL_SECONDS is set."""
+
+    global _probe_started
+
+    interval = _probe_interval()
+    if interval <= 0:
+        return False
+
+    with _probe_lock:
+        if _probe_started:
+            return True
+        _probe_started = True
+
+    def run() -> None:
+        while True:
+            _probe_once(_stats)
+            time.sleep(interval)
+
+    threading.Thread(target=run, name="model-probe", daemon=True).start()
+    return True
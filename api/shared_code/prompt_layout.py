@@ -0,0 +1,74 @@
+import os
+from typing import Any
+
+
+LEGACY = "legacy"
+STABLE = "stable"
+LAYOUTS = {LEGACY, STABLE}
+HISTORY_ROLES = {"user", "assistant", "system"}
+
+
+def resolve_layout(requested: Any = None) -> str:
+    """Layout from the request body if valid, else PROMPT_LAYOUT, else legacy."""
+
+    for value in (requested, os.getenv("PROMPT_LAYOUT")):
+        layout = str(value or "").strip().lower()
+        if layout in LAYOUTS:
+            return layout
+    return LEGACY
+
+
+def build_messages(
+    history: list[dict[str, Any]],
+    prompt: str,
+    instructions: str,
+    label: str,
+    stable_context: str = "",
+    variable_context: str = "",
+    layout: str = LEGACY,
+) -> list[dict[str, Any]]:
+    """Assemble chat messages around optional context.
+
+    legacy: one system message (instructions + context) inserted before the history.
+    stable: instructions and stable context first, then history, then per-request context just before the prompt,
+    so the prefix stays byte-identical across turns and provider prompt caching can hit.
+    """
+
+    messages = [item for item in history if item.get("role") in HISTORY_ROLES]
+
+    if layout != STABLE:
+        context = stable_context or variable_context
+        if context:
+            messages.insert(0, {"role": "system", "content": f"{instructions}\n\n{label}:\n{context}"})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    if stable_context or variable_context:
+        head = f"{instructions}\n\n{label}:\n{stable_context}" if stable_context else instructions
+        messages.insert(0, {"role": "system", "content": head})
+    if variable_context:
+        messages.append({"role": "system", "content": f"{label}:\n{variable_context}"})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def usage_payload(usage: Any) -> dict[str, Any] | None:
+    """Normalize chat completions and responses API usage, including provider-side cached prompt tokens."""
+
+    if usage is None:
+        return None
+
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    if prompt_tokens is None:
+        prompt_tokens = getattr(usage, "input_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if completion_tokens is None:
+        completion_tokens = getattr(usage, "output_tokens", None)
+    details = getattr(usage, "prompt_tokens_details", None) or getattr(usage, "input_tokens_details", None)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": getattr(usage, "total_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+    }
@@ -0,0 +1,81 @@
+import math
+from typing import Any
+
+from shared_code import bm25
+
+
+RRF_K = 60
+
+
+def normalize(vector: list[float]) -> list[float]:
+    length = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / length for value in vector]
+
+
+def _similarity(query: list[float], vector: list[float]) -> float:
+    if len(vector) != len(query):
+        # Stored under a different EMBEDDINGS_DIMENSIONS: compare the shared leading dimensions, renormalized.
+        size = min(len(vector), len(query))
+        query, vector = normalize(query[:size]), normalize(vector[:size])
+    return sum(a * b for a, b in zip(query, vector))
+
+
+def _vector_ranking(query_vector: list[float], chunk_vectors: list[list[float] | None]) -> list[int]:
+    query = normalize(query_vector)
+    scored = [
+        (_similarity(query, vector), index)
+        for index, vector in enumerate(chunk_vectors)
+        if vector
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [index for _, index in scored]
+
+
+def rank_chunks(
+    document: dict[str, Any],
+    query: str,
+    k: int,
+    query_vector: list[float] | None = None,
+) -> list[int]:
+    """Top-k chunk indices, fusing BM25 and embedding rankings with reciprocal rank fusion."""
+
+    chunks = document.get("chunks") or []
+    rankings: list[list[int]] = []
+
+    lexical_index = document.get("lexicalIndex")
+    if lexical_index:
+        lexical = [index for index, _ in bm25.top_k(lexical_index, query, len(chunks))]
+        if lexical:
+            rankings.append(lexical)
+
+    chunk_vectors = document.get("embeddings") or []
+    if query_vector and chunk_vectors:
+        rankings.append(_vector_ranking(query_vector, chunk_vectors))
+
+    if not rankings:
+        return list(range(min(k, len(chunks))))
+
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, index in enumerate(ranking):
+            fused[index] = fused.get(index, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return [index for index, _ in ordered[:k]]
+
+
+def format_context(document: dict[str, Any], indices: list[int]) -> str:
+    chunks = document.get("chunks") or []
+    selected = [chunks[index] for index in indices if 0 <= index < len(chunks)]
+    if not selected:
+        return ""
+    return f"Document: {document.get('fileName') or 'document'}\n\n" + "\n\n---\n\n".join(selected)
+
+
+def format_library_context(results: list[dict[str, Any]]) -> str:
+    sections = [
+        f"Document: {item.get('fileName') or 'document'}\n\n{item['text']}"
+        for item in results
+        if item.get("text")
+    ]
+    return "\n\n---\n\n".join(sections)
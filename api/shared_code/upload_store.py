@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows local development
+    fcntl = None
+
+
+DEFAULT_TTL_HOURS = 24
+DEFAULT_MAX_MB = 512
+PART_BYTES = 4 * 1024 * 1024
+MAX_PART_BYTES = 32 * 1024 * 1024
+HASH_BLOCK_BYTES = 1024 * 1024
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, status_code: int = 400, session: dict[str, Any] | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.session = session
+
+
+def normalize_sha256(value: Any) -> str:
+    """Lowercase hex digest, or "" when the value is not a SHA-256 hex string."""
+
+    digest = str(value or "").strip().lower()
+    return digest if _SHA256_PATTERN.match(digest) else ""
+
+
+def public_view(session: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "uploadId": session["uploadId"],
+        "fileName": session["fileName"],
+        "size": session["size"],
+        "received": session["received"],
+        "complete": session["received"] >= session["size"],
+        "partBytes": PART_BYTES,
+        "maxPartBytes": MAX_PART_BYTES,
+    }
+
+
+class UploadStore:
+    """Resumable upload sessions: parts are written in place into one temp file per session on local disk.
+
+    Parts must arrive in order or overlap what was already received, so `received` is always a contiguous prefix and
+    a client resumes by asking for the session and sending from there.
+    """
+
+    def __init__(self, root: Path, ttl_seconds: float, max_bytes: int) -> None:
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def _paths(self, owner: str | None, upload_id: str) -> tuple[Path, Path]:
+        owner_key = hashlib.sha256((owner or "anonymous").encode("utf-8")).hexdigest()[:24]
+        base = self.root / owner_key / upload_id
+        return base.with_suffix(".json"), base.with_suffix(".part")
+
+    @contextmanager
+    def _locked(self, part_path: Path) -> Iterator[Any]:
+        with self._lock:
+            with open(part_path, "r+b") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield handle
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read(self, meta_path: Path) -> dict[str, Any] | None:
+        try:
+            if time.time() - meta_path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with open(meta_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, meta_path: Path, session: dict[str, Any]) -> None:
+        fd, temp_name = tempfile.mkstemp(dir=meta_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(session))
+        os.replace(temp_name, meta_path)
+
+    def create(self, owner: str | None, file_name: str, size: int, sha256: str = "") -> dict[str, Any]:
+        if size <= 0:
+            raise UploadError("size must be a positive number of bytes.")
+        if size > self.max_bytes:
+            raise UploadError(f"File too large. Max size is {self.max_bytes // (1024 * 1024)} MB.", 413)
+
+        self._sweep_expired()
+        session = {
+            "uploadId": uuid.uuid4().hex,
+            "fileName": file_name,
+            "size": size,
+            "sha256": sha256,
+            "received": 0,
+            "createdAt": time.time(),
+        }
+        meta_path, part_path = self._paths(owner, session["uploadId"])
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path.touch()
+        self._write(meta_path, session)
+        return session
+
+    def load(self, owner: str | None, upload_id: str) -> dict[str, Any] | None:
+        if not _ID_PATTERN.match(upload_id or ""):
+            return None
+        meta_path, _ = self._paths(owner, upload_id)
+        return self._read(meta_path)
+
+    def write_part(self, owner: str | None, upload_id: str, offset: int, data: bytes) -> dict[str, Any]:
+        if not _ID_PATTERN.match(upload_id or ""):
+            raise UploadError("Upload session not found or expired.", 404)
+        if len(data) > MAX_PART_BYTES:
+            raise UploadError(f"Part too large. Max part size is {MAX_PART_BYTES // (1024 * 1024)} MB.", 413)
+
+        meta_path, part_path = self._paths(owner, upload_id)
+        try:
+            with self._locked(part_path) as handle:
+                session = self._read(meta_path)
+                if session is None:
+                    raise UploadError("Upload session not found or expired.", 404)
+                if offset < 0 or offset > session["received"]:
+                    raise UploadError("Parts must continue from the received offset.", 409, session)
+                if offset + len(data) > session["size"]:
+                    raise UploadError("Part extends past the declared file size.", 400, session)
+
+                handle.seek(offset)
+                handle.write(data)
+                handle.flush()
+                session["received"] = max(session["received"], offset + len(data))
+                self._write(meta_path, session)
+        except FileNotFoundError:
+            raise UploadError("Upload session not found or expired.", 404) from None
+        return session
+
+    def verify(self, owner: str | None, upload_id: str, sha256: str = "") -> tuple[dict[str, Any], Path]:
+        """Session and path of the finished file once every byte arrived and its SHA-256 matches."""
+
+        session = self.load(owner, upload_id)
+        if session is None:
+            raise UploadError("Upload session not found or expired.", 404)
+        if session["received"] < session["size"]:
+            raise UploadError("Upload is incomplete.", 409, session)
+
+        expected = session.get("sha256") or sha256
+        if not expected:
+            raise UploadError("sha256 of the file is required to complete an upload.")
+        if sha256 and sha256 != expected:
+            raise UploadError("sha256 does not match the value given when the upload was created.", 422, session)
+
+        _, part_path = self._paths(owner, upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as handle:
+            remaining = session["size"]
+            while remaining > 0:
+                block = handle.read(min(HASH_BLOCK_BYTES, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        if digest.hexdigest() != expected:
+            raise UploadError("Checksum mismatch. Re-send the parts or start a new upload.", 422, session)
+        return session, part_path
+
+    def discard(self, owner: str | None, upload_id: str) -> bool:
+        if not _ID_PATTERN.match(upload_id or ""):
+            return False
+        removed = False
+        for path in self._paths(owner, upload_id):
+            try:
+                path.unlink()
+                removed = True
+            except OSError:
+                continue
+        return removed
+
+    def _sweep_expired(self) -> None:
+        now = time.time()
+        if now - self._last_sweep < 300:
+            return
+        self._last_sweep = now
+
+        for meta_path in self.root.glob("*/*.json"):
+            try:
+                if now - meta_path.stat().st_mtime > self.ttl_seconds:
+                    meta_path.with_suffix(".part").unlink(missing_ok=True)
+                    meta_path.unlink()
+            except OSError:
+                continue
+
+
+_store: UploadStore | None = None
+_store_lock = threading.Lock()
+
+
+def default_store() -> UploadStore:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                root = (os.getenv("UPLOAD_DIR") or "").strip() or os.path.join(tempfile.gettempdir(), "ti-ai-uploads")
+                ttl_hours = (os.getenv("UPLOAD_TTL_HOURS") or "").strip()
+                max_mb = (os.getenv("UPLOAD_MAX_MB") or "").strip()
+                _store = UploadStore(
+                    Path(root),
+                    (int(ttl_hours) if ttl_hours.isdigit() else DEFAULT_TTL_HOURS) * 3600,
+                    (int(max_mb) if max_mb.isdigit() else DEFAULT_MAX_MB) * 1024 * 1024,
+                )
+    return _store
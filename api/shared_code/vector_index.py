@@ -0,0 +1,577 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows local development
+    fcntl = None
+
+
+TRAIN_MIN_ROWS = 2048
+RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 32
+ASSIGN_BATCH_ROWS = 8192
+DEFAULT_NPROBE = 8
+COMPACT_DEAD_RATIO = 0.5
+QUANTIZATIONS = {"int8"}
+RESCORE_MULTIPLIER = 4
+RESCORE_MIN_CANDIDATES = 32
+SCORE_BLOCK_ROWS = 1024
+CHUNK_CACHE_DOCUMENTS = 64
+INDEX_CACHE_SIZE = 64
+
+
+def _empty_meta() -> dict[str, Any]:
+    return {
+        "version": 1,
+        "dimension": None,
+        "rows": 0,
+        "liveRows": 0,
+        "nlist": 0,
+        "trainedRows": 0,
+        "quantization": None,
+        "documents": [],
+    }
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _fit_dimension(matrix: np.ndarray, dimension: int) -> np.ndarray:
+    """Longer vectors (e.g. from before EMBEDDINGS_DIMENSIONS was set) keep their leading dimensions, renormalized."""
+
+    if matrix.shape[-1] <= dimension:
+        return matrix
+    if matrix.ndim == 1:
+        return _normalize_rows(matrix[None, :dimension])[0]
+    return _normalize_rows(matrix[:, :dimension])
+
+
+def _quantize(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and float32 scales, row ~= codes * scale."""
+
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _approximate_scores(codes: np.ndarray, scales: np.ndarray, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot products against int8 rows, widened a cache-sized block at a time instead of one float32 copy of all."""
+
+    scores = np.empty(len(rows), dtype=np.float32)
+    block = np.empty((min(SCORE_BLOCK_ROWS, len(rows)), codes.shape[1]), dtype=np.float32)
+    for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+        part = rows[start : start + SCORE_BLOCK_ROWS]
+        np.copyto(block[: len(part)], codes[part])
+        scores[start : start + len(part)] = block[: len(part)] @ query
+    return scores * scales[rows]
+
+
+def _kmeans(sample: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine) over unit vectors."""
+
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class VectorIndex:
+    """IVF (inverted file) index over unit vectors, stored as memory-mapped files in one directory.
+
+    Rows are append-only; deletes are tombstones until dead rows exceed half the file, then the files are compacted.
+    Below TRAIN_MIN_ROWS the index is searched exhaustively. With int8 quantization candidates are scored on int8
+    codes and the best RESCORE_MULTIPLIER * k are rescored against the float32 rows. A vector added or searched with
+    fewer dimensions than the index (EMBEDDINGS_DIMENSIONS lowered) first reduces every stored row to that dimension.
+    """
+
+    def __init__(self, root: Path, nprobe: int = DEFAULT_NPROBE, quantization: str | None = None) -> None:
+        self.root = root
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self._thread_lock = threading.Lock()
+        self._state: dict[str, Any] | None = None
+        self._state_key: Any = None
+        self._chunks_cache: OrderedDict[str, list[str]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / "meta.json"
+
+    def _file(self, name: str) -> Path:
+        return self.root / name
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock:
+            with open(self.root / ".lock", "a+") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _read_lock(self) -> Iterator[None]:
+        """Shared lock, so state is never loaded from files a writer is compacting or retraining."""
+
+        with open(self.root / ".lock", "a+") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> dict[str, Any]:
+        try:
+            with open(self._meta_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return _empty_meta()
+
+    def _write_json(self, path: Path, payload: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload))
+        os.replace(temp_name, path)
+
+    def _commit_meta(self, meta: dict[str, Any]) -> None:
+        """Publish meta.json with the next generation, then the generation file searches compare against."""
+
+        meta["generation"] = int(meta.get("generation") or 0) + 1
+        self._write_json(self._meta_path, meta)
+        self._write_json(self._file("generation"), meta["generation"])
+
+    def _state_version(self, meta: dict[str, Any] | None = None) -> Any:
+        """Generation of the committed meta.json; indexes written before generations existed fall back to its stat."""
+
+        if meta is not None and meta.get("generation"):
+            return meta["generation"]
+        if meta is None:
+            try:
+                with open(self._file("generation"), encoding="utf-8") as handle:
+                    return int(handle.read())
+            except (OSError, ValueError):
+                pass
+        try:
+            stat = self._meta_path.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _memmap(self, name: str, dtype: Any, rows: int, width: int = 1, mode: str = "r") -> np.ndarray:
+        shape = (rows, width) if width > 1 else (rows,)
+        if rows == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode=mode, shape=shape)
+
+    def documents(self) -> list[dict[str, Any]]:
+        meta = self._read_meta()
+        return [
+            {
+                "documentId": doc["documentId"],
+                "fileName": doc["fileName"],
+                "chunkCount": doc["count"],
+                "addedAt": doc["addedAt"],
+            }
+            for doc in meta["documents"]
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        meta = self._read_meta()
+        return {
+            "documentCount": len(meta["documents"]),
+            "rows": meta["rows"],
+            "liveRows": meta["liveRows"],
+            "dimension": meta["dimension"],
+            "nlist": meta["nlist"],
+            "quantization": meta.get("quantization"),
+        }
+
+    def has_document(self, document_id: str) -> bool:
+        return any(doc["documentId"] == document_id for doc in self._read_meta()["documents"])
+
+    def add(self, document_id: str, file_name: str, chunks: list[str], vectors: list[list[float]] | np.ndarray) -> dict[str, Any]:
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if matrix.ndim != 2 or len(matrix) != len(chunks) or not len(chunks):
+            raise ValueError("Chunks and vectors must be non-empty and of equal length.")
+
+        with self._write_lock():
+            meta = self._read_meta()
+            if any(doc["documentId"] == document_id for doc in meta["documents"]):
+                return meta
+
+            if meta["dimension"] and matrix.shape[1] < meta["dimension"]:
+                self._reduce_dimension(meta, int(matrix.shape[1]))
+            dimension = meta["dimension"] or int(matrix.shape[1])
+            matrix = _fit_dimension(matrix, dimension)
+            if matrix.shape[1] != dimension:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {dimension}.")
+            if meta.get("quantization") != self.quantization:
+                self._requantize(meta)
+
+            if meta["nlist"]:
+                centroids = self._memmap("centroids.f32", np.float32, meta["nlist"], dimension)
+                assign = np.argmax(matrix @ np.asarray(centroids).T, axis=1).astype(np.int32)
+            else:
+                assign = np.full(len(matrix), -1, dtype=np.int32)
+
+            with open(self._file("vectors.f32"), "ab") as handle:
+                handle.write(matrix.tobytes())
+            with open(self._file("assign.i32"), "ab") as handle:
+                handle.write(assign.tobytes())
+            with open(self._file("alive.u8"), "ab") as handle:
+                handle.write(np.ones(len(matrix), dtype=np.uint8).tobytes())
+            if self.quantization:
+                codes, scales = _quantize(matrix)
+                with open(self._file("codes.i8"), "ab") as handle:
+                    handle.write(codes.tobytes())
+                with open(self._file("scales.f32"), "ab") as handle:
+                    handle.write(scales.tobytes())
+
+            self._write_json(self._file(f"docs/{document_id}.json"), {"fileName": file_name, "chunks": chunks})
+
+            meta["dimension"] = dimension
+            meta["documents"].append(
+                {
+                    "documentId": document_id,
+                    "fileName": file_name,
+                    "start": meta["rows"],
+                    "count": len(matrix),
+                    "addedAt": time.time(),
+                }
+            )
+            meta["rows"] += len(matrix)
+            meta["liveRows"] += len(matrix)
+
+            if meta["liveRows"] >= TRAIN_MIN_ROWS and (
+                not meta["nlist"] or meta["rows"] >= RETRAIN_GROWTH * meta["trainedRows"]
+            ):
+                self._train(meta)
+
+            self._commit_meta(meta)
+            return meta
+
+    def delete(self, document_id: str) -> bool:
+        with self._write_lock():
+            meta = self._read_meta()
+            doc = next((item for item in meta["documents"] if item["documentId"] == document_id), None)
+            if doc is None:
+                return False
+
+            alive = self._memmap("alive.u8", np.uint8, meta["rows"], mode="r+")
+            alive[doc["start"] : doc["start"] + doc["count"]] = 0
+            if isinstance(alive, np.memmap):
+                alive.flush()
+            del alive
+
+            meta["documents"] = [item for item in meta["documents"] if item["documentId"] != document_id]
+            meta["liveRows"] -= doc["count"]
+            try:
+                self._file(f"docs/{document_id}.json").unlink()
+            except OSError:
+                pass
+            with self._cache_lock:
+                self._chunks_cache.pop(document_id, None)
+
+            if meta["rows"] and meta["liveRows"] < meta["rows"] * (1.0 - COMPACT_DEAD_RATIO):
+                self._compact(meta)
+
+            self._commit_meta(meta)
+            return True
+
+    def _requantize(self, meta: dict[str, Any]) -> None:
+        """Build int8 codes for existing rows, or drop them, when the configured quantization changed."""
+
+        rows, dimension = meta["rows"], meta["dimension"]
+        if self.quantization and rows:
+            vectors = self._memmap("vectors.f32", np.float32, rows, dimension)
+            # Written aside and swapped in: searches may still have the previous codes.i8 memory-mapped.
+            with open(self._file("codes.i8.tmp"), "wb") as codes_out, open(self._file("scales.f32.tmp"), "wb") as scales_out:
+                for start in range(0, rows, ASSIGN_BATCH_ROWS):
+                    codes, scales = _quantize(np.asarray(vectors[start : start + ASSIGN_BATCH_ROWS]))
+                    codes_out.write(codes.tobytes())
+                    scales_out.write(scales.tobytes())
+            del vectors
+            os.replace(self._file("codes.i8.tmp"), self._file("codes.i8"))
+            os.replace(self._file("scales.f32.tmp"), self._file("scales.f32"))
+        elif not self.quantization:
+            for name in ("codes.i8", "scales.f32"):
+                try:
+                    self._file(name).unlink()
+                except OSError:
+                    pass
+        meta["quantization"] = self.quantization
+
+    def _reduce_dimension(self, meta: dict[str, Any], dimension: int) -> None:
+        """Cut stored rows to the leading `dimension` values, renormalized, after EMBEDDINGS_DIMENSIONS was lowered.
+
+        The same Matryoshka-style reduction as embedding.reduce_dimensions, so old and new rows stay comparable.
+        """
+
+        rows, quantized = meta["rows"], meta.get("quantization")
+        if rows:
+            vectors = self._memmap("vectors.f32", np.float32, rows, meta["dimension"])
+            names = ["vectors.f32", *(["codes.i8", "scales.f32"] if quantized else [])]
+            # Written aside and swapped in, like _requantize: searches may still have the wider files memory-mapped.
+            with ExitStack() as stack:
+                outputs = [stack.enter_context(open(self._file(f"{name}.tmp"), "wb")) for name in names]
+                for start in range(0, rows, ASSIGN_BATCH_ROWS):
+                    block = _fit_dimension(np.asarray(vectors[start : start + ASSIGN_BATCH_ROWS]), dimension)
+                    parts = [block, *(_quantize(block) if quantized else ())]
+                    for part, output in zip(parts, outputs):
+                        output.write(part.tobytes())
+            del vectors
+            for name in names:
+                os.replace(self._file(f"{name}.tmp"), self._file(name))
+
+        meta["dimension"] = dimension
+        if meta["nlist"] and meta["liveRows"]:
+            self._train(meta)
+        else:
+            meta["nlist"] = 0
+            meta["trainedRows"] = 0
+
+    def _shrink_to(self, dimension: int) -> None:
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta["dimension"] and dimension < meta["dimension"]:
+                self._reduce_dimension(meta, dimension)
+                self._commit_meta(meta)
+
+    def _train(self, meta: dict[str, Any]) -> None:
+        rows, dimension = meta["rows"], meta["dimension"]
+        vectors = self._memmap("vectors.f32", np.float32, rows, dimension)
+        live = np.flatnonzero(self._memmap("alive.u8", np.uint8, rows))
+
+        nlist = max(1, int(np.sqrt(len(live))))
+        rng = np.random.default_rng(len(live))
+        sample_rows = np.sort(rng.choice(live, min(len(live), nlist * KMEANS_SAMPLE_PER_LIST), replace=False))
+        centroids = _kmeans(np.asarray(vectors[sample_rows]), nlist)
+
+        assign = np.empty(rows, dtype=np.int32)
+        for start in range(0, rows, ASSIGN_BATCH_ROWS):
+            batch = np.asarray(vectors[start : start + ASSIGN_BATCH_ROWS])
+            assign[start : start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+
+        with open(self._file("centroids.f32"), "wb") as handle:
+            handle.write(centroids.astype(np.float32).tobytes())
+        with open(self._file("assign.i32"), "wb") as handle:
+            handle.write(assign.tobytes())
+
+        meta["nlist"] = nlist
+        meta["trainedRows"] = rows
+
+    def _compact(self, meta: dict[str, Any]) -> None:
+        rows, dimension = meta["rows"], meta["dimension"]
+        files = [("vectors.f32", np.float32, dimension), ("assign.i32", np.int32, 1)]
+        if meta.get("quantization"):
+            files += [("codes.i8", np.int8, dimension), ("scales.f32", np.float32, 1)]
+        sources = [self._memmap(name, dtype, rows, width) for name, dtype, width in files]
+
+        new_start = 0
+        with ExitStack() as stack:
+            outputs = [stack.enter_context(open(self._file(f"{name}.tmp"), "wb")) for name, _, _ in files]
+            for doc in sorted(meta["documents"], key=lambda item: item["start"]):
+                start, count = doc["start"], doc["count"]
+                for source, output in zip(sources, outputs):
+                    output.write(np.asarray(source[start : start + count]).tobytes())
+                doc["start"] = new_start
+                new_start += count
+        del sources
+
+        for name, _, _ in files:
+            os.replace(self._file(f"{name}.tmp"), self._file(name))
+        with open(self._file("alive.u8"), "wb") as handle:
+            handle.write(np.ones(new_start, dtype=np.uint8).tobytes())
+
+        meta["rows"] = new_start
+        meta["liveRows"] = new_start
+        meta["documents"].sort(key=lambda item: item["start"])
+
+    def _load_state(self) -> dict[str, Any] | None:
+        key = self._state_version()
+        if key is None:
+            return None
+        if self._state is not None and self._state_key == key:
+            return self._state
+
+        with self._read_lock():
+            return self._load_state_locked()
+
+    def _load_state_locked(self) -> dict[str, Any] | None:
+        meta = self._read_meta()
+        key = self._state_version(meta)
+        if key is None:
+            return None
+        rows, dimension = meta["rows"], meta["dimension"]
+        if not rows or not dimension:
+            return None
+
+        documents = sorted(meta["documents"], key=lambda item: item["start"])
+        state: dict[str, Any] = {
+            "meta": meta,
+            "vectors": self._memmap("vectors.f32", np.float32, rows, dimension),
+            "alive": np.fromfile(self._file("alive.u8"), dtype=np.uint8, count=rows).astype(bool),
+            "documents": documents,
+            "starts": np.asarray([doc["start"] for doc in documents], dtype=np.int64),
+        }
+
+        if meta.get("quantization"):
+            state["codes"] = self._memmap("codes.i8", np.int8, rows, dimension)
+            state["scales"] = np.fromfile(self._file("scales.f32"), dtype=np.float32, count=rows)
+
+        if meta["nlist"]:
+            assign = np.fromfile(self._file("assign.i32"), dtype=np.int32, count=rows)
+            state["centroids"] = np.fromfile(self._file("centroids.f32"), dtype=np.float32).reshape(meta["nlist"], dimension)
+            state["order"] = np.argsort(assign, kind="stable").astype(np.int64)
+            counts = np.bincount(assign[assign >= 0], minlength=meta["nlist"])
+            state["offsets"] = np.concatenate(([0], np.cumsum(counts)))
+            state["unassigned"] = int((assign < 0).sum())
+
+        self._state, self._state_key = state, key
+        return state
+
+    def _candidates(self, state: dict[str, Any], query: np.ndarray, nprobe: int) -> np.ndarray:
+        meta = state["meta"]
+        if not meta["nlist"]:
+            return np.flatnonzero(state["alive"])
+
+        centroid_scores = state["centroids"] @ query
+        probe = min(nprobe, meta["nlist"])
+        lists = np.argpartition(-centroid_scores, probe - 1)[:probe]
+        offsets, order = state["offsets"], state["order"]
+        skip = state["unassigned"]
+        parts = [order[skip + offsets[item] : skip + offsets[item + 1]] for item in lists]
+        rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        return rows[state["alive"][rows]]
+
+    def _chunk_text(self, document_id: str, chunk_index: int) -> tuple[str, str]:
+        with self._cache_lock:
+            cached = self._chunks_cache.get(document_id)
+            if cached is not None:
+                self._chunks_cache.move_to_end(document_id)
+        if cached is None:
+            try:
+                with open(self._file(f"docs/{document_id}.json"), encoding="utf-8") as handle:
+                    payload = json.load(handle)
+            except (OSError, ValueError):
+                return "", ""
+            cached = [payload.get("fileName") or "", *(payload.get("chunks") or [])]
+            with self._cache_lock:
+                self._chunks_cache[document_id] = cached
+                while len(self._chunks_cache) > CHUNK_CACHE_DOCUMENTS:
+                    self._chunks_cache.popitem(last=False)
+        chunks = cached[1:]
+        return cached[0], (chunks[chunk_index] if 0 <= chunk_index < len(chunks) else "")
+
+    def search(self, query_vector: list[float] | np.ndarray, k: int, nprobe: int | None = None) -> list[dict[str, Any]]:
+        state = self._load_state()
+        if state is None:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        if 0 < query.shape[0] < state["meta"]["dimension"]:
+            self._shrink_to(query.shape[0])
+            state = self._load_state()
+            if state is None:
+                return []
+
+        query = _fit_dimension(query, state["meta"]["dimension"])
+        if query.shape[0] != state["meta"]["dimension"]:
+            raise ValueError("Query dimension does not match index dimension.")
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        rows = self._candidates(state, query, nprobe or self.nprobe)
+        if not len(rows):
+            return []
+
+        if "codes" in state:
+            shortlist = max(k * RESCORE_MULTIPLIER, RESCORE_MIN_CANDIDATES)
+            if shortlist < len(rows):
+                approximate = _approximate_scores(state["codes"], state["scales"], rows, query)
+                rows = np.sort(rows[np.argpartition(-approximate, shortlist - 1)[:shortlist]])
+
+        scores = np.asarray(state["vectors"][rows]) @ query
+        top = min(k, len(rows))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        results: list[dict[str, Any]] = []
+        for position in best:
+            row = int(rows[position])
+            doc = state["documents"][int(np.searchsorted(state["starts"], row, side="right")) - 1]
+            chunk_index = row - doc["start"]
+            file_name, text = self._chunk_text(doc["documentId"], chunk_index)
+            results.append(
+                {
+                    "documentId": doc["documentId"],
+                    "fileName": file_name or doc["fileName"],
+                    "chunkIndex": chunk_index,
+                    "score": float(scores[position]),
+                    "text": text,
+                }
+            )
+        return results
+
+
+_indexes: OrderedDict[str, VectorIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def owner_key(tenant_id: str | None, user_upn: str | None) -> str:
+    return hashlib.sha256(f"{tenant_id or ''}:{user_upn or 'anonymous'}".encode("utf-8")).hexdigest()[:24]
+
+
+def index_for(tenant_id: str | None, user_upn: str | None) -> VectorIndex:
+    key = owner_key(tenant_id, user_upn)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            root = (os.getenv("LIBRARY_DIR") or "").strip() or os.path.join(tempfile.gettempdir(), "ti-ai-library")
+            nprobe = (os.getenv("LIBRARY_NPROBE") or "").strip()
+            quantization = (os.getenv("LIBRARY_QUANTIZATION") or "").strip().lower()
+            index = VectorIndex(
+                Path(root) / key,
+                int(nprobe) if nprobe.isdigit() else DEFAULT_NPROBE,
+                quantization if quantization in QUANTIZATIONS else None,
+            )
+            _indexes[key] = index
+            while len(_indexes) > INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(key)
+        return index
@@ -0,0 +1,53 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+
+HEAVY_IMPORTS = ["openai", "pypdf", "docx"]
+WARM_UP_MODULES = ["chat", "embeddings", "image_to_text"]
+
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def warm_up() -> dict[str, float]:
+    """Import heavy dependencies and pre-build SDK clients for every function; returns ms per module."""
+
+    timings: dict[str, float] = {}
+    for name in HEAVY_IMPORTS:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as ex:
+            logging.warning("Warm-up import of '%s' failed: %s", name, ex)
+        timings[name] = round((time.perf_counter() - started) * 1000.0, 1)
+
+    for name in WARM_UP_MODULES:
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+            hook = getattr(module, "warm_up", None)
+            if callable(hook):
+                hook()
+        except Exception as ex:
+            logging.warning("Warm-up of '%s' failed: %s", name, ex)
+        timings[name] = round((time.perf_counter() - started) * 1000.0, 1)
+    return timings
+
+
+def warm_up_on_load() -> None:
+    """Start warm-up on a daemon thread once per process when WARMUP_ON_LOAD is enabled."""
+
+    global _background_started
+
+    if (os.getenv("WARMUP_ON_LOAD") or "").strip().lower() not in {"1", "true", "on", "yes"}:
+        return
+
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
@@ -0,0 +1,156 @@
+import json
+from typing import Any
+
+import azure.functions as func
+
+from shared_code import access, doc_store, extraction, extraction_pool, upload_store, warmup
+
+
+def _json_response(payload: dict[str, Any], status_code: int = 200) -> func.HttpResponse:
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=status_code,
+        mimetype="application/json",
+    )
+
+
+def _error_response(ex: upload_store.UploadError) -> func.HttpResponse:
+    payload: dict[str, Any] = {"error": str(ex)}
+    if ex.session is not None:
+        payload["received"] = ex.session["received"]
+    return _json_response(payload, ex.status_code)
+
+
+def _create(decision: access.AccessDecision, req: func.HttpRequest) -> func.HttpResponse:
+    try:
+        body = req.get_json()
+    except ValueError:
+        return _json_response({"error": "Invalid JSON body."}, 400)
+    if not isinstance(body, dict):
+        return _json_response({"error": "JSON body must be an object."}, 400)
+
+    file_name = (body.get("fileName") or "").strip()
+    if not file_name:
+        return _json_response({"error": "fileName is required."}, 400)
+    if extraction.extension(file_name) not in extraction.ALLOWED_EXTENSIONS:
+        return _json_response({"error": "Unsupported file type. Allowed: PDF, DOCX, TXT, MD."}, 400)
+
+    size = body.get("size")
+    if not isinstance(size, int) or isinstance(size, bool):
+        return _json_response({"error": "size must be the file size in bytes."}, 400)
+
+    sha256 = upload_store.normalize_sha256(body.get("sha256"))
+    if body.get("sha256") and not sha256:
+        return _json_response({"error": "sha256 must be a hex SHA-256 digest."}, 400)
+
+    try:
+        session = upload_store.default_store().create(decision.user_upn, file_name, size, sha256)
+    except upload_store.UploadError as ex:
+        return _error_response(ex)
+    return _json_response(upload_store.public_view(session), 201)
+
+
+def _put_part(decision: access.AccessDecision, req: func.HttpRequest, upload_id: str) -> func.HttpResponse:
+    offset = (req.params.get("offset") or "").strip()
+    if not offset.isdigit():
+        return _json_response({"error": "offset query parameter is required."}, 400)
+
+    data = req.get_body() or b""
+    if not data:
+        return _json_response({"error": "Part body is empty."}, 400)
+
+    try:
+        session = upload_store.default_store().write_part(decision.user_upn, upload_id, int(offset), data)
+    except upload_store.UploadError as ex:
+        return _error_response(ex)
+    return _json_response(upload_store.public_view(session))
+
+
+def _complete(decision: access.AccessDecision, req: func.HttpRequest, upload_id: str) -> func.HttpResponse:
+    try:
+        body = req.get_json()
+    except ValueError:
+        body = {}
+    if not isinstance(body, dict):
+        return _json_response({"error": "JSON body must be an object."}, 400)
+
+    sha256 = upload_store.normalize_sha256(body.get("sha256"))
+    if body.get("sha256") and not sha256:
+        return _json_response({"error": "sha256 must be a hex SHA-256 digest."}, 400)
+
+    store = upload_store.default_store()
+    try:
+        session, part_path = store.verify(decision.user_upn, upload_id, sha256)
+    except upload_store.UploadError as ex:
+        return _error_response(ex)
+
+    file_name = session["fileName"]
+    ingest = body.get("ingest") is True
+    try:
+        processed = extraction.process(extraction.extension(file_name), part_path, ingest)
+    except extraction_pool.ExtractionLimitError as ex:
+        return _json_response({"error": str(ex)}, ex.status_code)
+    except Exception as ex:
+        return _json_response({"error": f"Failed to parse document: {str(ex)}"}, 400)
+
+    normalized, chunks = processed["text"], processed["chunks"]
+    if not normalized:
+        store.discard(decision.user_upn, upload_id)
+        return _json_response({"error": "No readable text found in this document."}, 400)
+
+    document = extraction.document_record(file_name, processed)
+    try:
+        document_id = doc_store.default_store().save(decision.user_upn, document)
+    except OSError:
+        document_id = None
+    store.discard(decision.user_upn, upload_id)
+
+    payload = {
+        "documentId": document_id,
+        "fileName": file_name,
+        "chunks": chunks,
+        "chunkCount": len(chunks),
+        "charCount": len(normalized),
+        "size": session["size"],
+    }
+    if ingest:
+        payload["embedded"] = processed["embeddings"] is not None
+        payload["timings"] = processed["timings"]
+    return _json_response(payload)
+
+
+warmup.warm_up_on_load()
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    decision = access.authorize(req)
+    if not decision.allowed:
+        return _json_response(decision.error, decision.status_code)
+
+    upload_id = (req.route_params.get("uploadId") or "").strip().lower()
+    action = (req.route_params.get("action") or "").strip().lower()
+    method = req.method.upper()
+
+    if not upload_id:
+        if method == "POST":
+            return _create(decision, req)
+        return _json_response({"error": "Not found."}, 404)
+
+    if method == "GET" and not action:
+        session = upload_store.default_store().load(decision.user_upn, upload_id)
+        if session is None:
+            return _json_response({"error": "Upload session not found or expired."}, 404)
+        return _json_response(upload_store.public_view(session))
+
+    if method == "PUT" and not action:
+        return _put_part(decision, req, upload_id)
+
+    if method == "POST" and action == "complete":
+        return _complete(decision, req, upload_id)
+
+    if method == "DELETE" and not action:
+        if not upload_store.default_store().discard(decision.user_upn, upload_id):
+            return _json_response({"error": "Upload session not found or expired."}, 404)
+        return _json_response({"uploadId": upload_id, "removed": True})
+
+    return _json_response({"error": "Not found."}, 404)
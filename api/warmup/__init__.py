@@ -0,0 +1,10 @@
+import logging
+
+import azure.functions as func
+
+from shared_code import warmup
+
+
+def main(warmupContext: func.Context) -> None:
+    timings = warmup.warm_up()
+    logging.info("Warm-up finished: %s", timings)
@@ -0,0 +1,124 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench import harness
+
+
+def _clustered_vectors(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {f"p{pct}Ms": round(harness.percentile(ordered, pct), 3) for pct in (50, 95, 99)}
+
+
+def _index_bytes(root: Path) -> dict[str, int]:
+    """On-disk size of the files a search scans: int8 codes and scales when quantized, float32 rows otherwise."""
+
+    sizes = {path.name: path.stat().st_size for path in root.rglob("*") if path.is_file()}
+    quantized = sizes.get("codes.i8", 0) + sizes.get("scales.f32", 0)
+    return {"vectorBytes": sizes.get("vectors.f32", 0), "scanBytes": quantized or sizes.get("vectors.f32", 0)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure build time, query latency and recall of shared_code.vector_index.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (1536 for text-embedding-3-small).")
+    parser.add_argument("--chunks-per-document", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=500, help="Topic clusters in the synthetic corpus.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,4,8,16,32")
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Index only the leading dimensions, renormalized (Matryoshka-style); recall is still against full vectors.",
+    )
+    parser.add_argument("--quantization", choices=sorted(["none", "int8"]), default="none")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file as JSON.")
+    args = parser.parse_args()
+
+    harness.ensure_api_on_path()
+    from shared_code import vector_index
+
+    vectors = _clustered_vectors(args.rows, args.dim, args.clusters, seed=1)
+    queries = _clustered_vectors(args.queries, args.dim, args.clusters, seed=1)
+    rng = np.random.default_rng(2)
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    indexed = vectors
+    if args.dimensions and args.dimensions < args.dim:
+        indexed = vectors[:, : args.dimensions] / np.linalg.norm(vectors[:, : args.dimensions], axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as root:
+        quantization = None if args.quantization == "none" else args.quantization
+        index = vector_index.VectorIndex(Path(root), quantization=quantization)
+
+        started = time.perf_counter()
+        for number, start in enumerate(range(0, args.rows, args.chunks_per_document)):
+            batch = indexed[start : start + args.chunks_per_document]
+            index.add(f"{number:032x}", f"doc-{number}.pdf", [f"chunk {start + offset}" for offset in range(len(batch))], batch)
+        build_seconds = time.perf_counter() - started
+
+        truth = []
+        for query in queries:
+            scores = vectors @ (query / np.linalg.norm(query))
+            truth.append(set(np.argpartition(-scores, args.k - 1)[: args.k].tolist()))
+
+        results = {
+            "rows": args.rows,
+            "dim": args.dim,
+            "buildSeconds": round(build_seconds, 2),
+            **index.stats(),
+            **_index_bytes(Path(root)),
+            "levels": [],
+        }
+        index.search(queries[0], args.k)
+
+        for nprobe in [int(value) for value in args.nprobe.split(",")]:
+            latencies: list[float] = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                found = index.search(query, args.k, nprobe=nprobe)
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                rows = {int(item["documentId"], 16) * args.chunks_per_document + item["chunkIndex"] for item in found}
+                hits += len(rows & expected)
+            results["levels"].append(
+                {"nprobe": nprobe, f"recall@{args.k}": round(hits / (len(queries) * args.k), 4), **_percentiles(latencies)}
+            )
+
+        started = time.perf_counter()
+        index.delete(f"{0:032x}")
+        results["deleteMs"] = round((time.perf_counter() - started) * 1000.0, 2)
+
+    print(
+        f"rows={results['rows']} dim={results['dim']} indexDim={results['dimension']} "
+        f"quantization={results['quantization'] or 'none'} nlist={results['nlist']} build={results['buildSeconds']}s "
+        f"delete={results['deleteMs']}ms"
+    )
+    print(f"vectors={results['vectorBytes'] / 2**20:.1f}MB scanned={results['scanBytes'] / 2**20:.1f}MB")
+    print(f"{'nprobe':>6}  {'recall@' + str(args.k):>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for level in results["levels"]:
+        print(
+            f"{level['nprobe']:>6}  {level[f'recall@{args.k}']:>9.4f}  "
+            f"{level['p50Ms']:>8.3f}  {level['p95Ms']:>8.3f}  {level['p99Ms']:>8.3f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
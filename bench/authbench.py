@@ -0,0 +1,51 @@
+import argparse
+import os
+import time
+
+from bench import harness
+
+
+def _time_per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for index in range(iterations):
+        fn(index)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-request cost of shared_code.access.authorize.")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--allowed-users", type=int, default=200, help="Size of the ALLOWED_USERS list.")
+    args = parser.parse_args()
+
+    harness.ensure_api_on_path()
+    from shared_code import access
+
+    users = [f"user{index:04d}@example.com" for index in range(args.allowed_users)]
+    os.environ["ALLOWED_USERS"] = ",".join([harness.BENCH_USER, *users])
+    os.environ["ALLOWED_TENANT_ID"] = harness.BENCH_TENANT
+
+    cached_request = harness.make_request("POST", "chat")
+    unique_requests = [
+        harness.make_request(
+            "POST",
+            "chat",
+            headers={"x-ms-client-principal": harness.principal_header(users[index % len(users)], harness.BENCH_TENANT)},
+        )
+        for index in range(min(args.iterations, access.DECISION_CACHE_SIZE))
+    ]
+
+    access.authorize(cached_request)
+    cached_us = _time_per_call_us(lambda _: access.authorize(cached_request), args.iterations)
+
+    uncached_us = _time_per_call_us(
+        lambda index: access.current_policy()._cache.clear() or access.authorize(unique_requests[index % len(unique_requests)]),
+        min(args.iterations, len(unique_requests)),
+    )
+
+    print(f"authorize (cached decision):   {cached_us:8.2f} us/request")
+    print(f"authorize (decode + decide):   {uncached_us:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
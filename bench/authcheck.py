@@ -0,0 +1,226 @@
+import base64
+import itertools
+import json
+import sys
+from typing import Any
+
+from bench import harness
+
+
+TENANT = "11111111-2222-3333-4444-555555555555"
+OTHER_TENANT = "99999999-8888-7777-6666-555555555555"
+USER = "alice@example.com"
+OTHER_USER = "mallory@example.com"
+
+
+# Reference: the rules chat/__init__.py applied inline before shared_code.access existed, kept verbatim.
+
+
+def _tenant_from_issuer(issuer: str | None) -> str | None:
+    if not issuer:
+        return None
+
+    marker = "login.microsoftonline.com/"
+    if marker not in issuer:
+        return None
+
+    tail = issuer.split(marker, 1)[1]
+    tenant = tail.split("/", 1)[0].strip().lower()
+    return tenant or None
+
+
+def _get_claim(claims: list[dict[str, str]], key: str) -> str | None:
+    for claim in claims:
+        if claim.get("typ") == key:
+            return claim.get("val")
+    return None
+
+
+def _first_claim(claims: list[dict[str, str]], keys: list[str]) -> str | None:
+    for key in keys:
+        value = _get_claim(claims, key)
+        if value:
+            return value
+    return None
+
+
+def _reference_identity(raw: str) -> tuple[str | None, str | None, str | None]:
+    if not raw:
+        return None, None, None
+
+    try:
+        decoded = base64.b64decode(raw).decode("utf-8")
+        principal = json.loads(decoded)
+    except Exception:
+        return None, None, None
+
+    claims = principal.get("claims", [])
+    tenant_id = _first_claim(claims, ["tid", "http://schemas.microsoft.com/identity/claims/tenantid", "tenantid"])
+    if not tenant_id:
+        tenant_id = _tenant_from_issuer(_first_claim(claims, ["iss"]))
+    user_upn = (
+        _first_claim(
+            claims,
+            [
+                "preferred_username",
+                "http://schemas.xmlsoap.org/ws/2005/05/identity/claims/upn",
+                "upn",
+                "email",
+                "name",
+            ],
+        )
+        or principal.get("userDetails")
+    )
+    provider = principal.get("identityProvider")
+    return tenant_id, (user_upn.lower() if user_upn else None), provider
+
+
+def _reference_token_identity(token: str) -> tuple[str | None, str | None]:
+    if not token:
+        return None, None
+
+    parts = token.split(".")
+    if len(parts) < 2:
+        return None, None
+    payload = parts[1]
+    try:
+        data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode("utf-8"))
+    except Exception:
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+
+    tenant_id = data.get("tid")
+    if not tenant_id:
+        tenant_id = _tenant_from_issuer(str(data.get("iss") or ""))
+    user_upn = data.get("preferred_username") or data.get("upn") or data.get("email")
+    return (str(tenant_id).lower() if tenant_id else None, str(user_upn).lower() if user_upn else None)
+
+
+def reference_decision(principal: str, token: str, raw_tenant: str, raw_users: str) -> tuple[int, dict[str, Any]]:
+    """(status, error payload) the baseline returned; (200, {}) when the request went through."""
+
+    tenant_id, user_upn, provider = _reference_identity(principal)
+    if not tenant_id or not user_upn:
+        token_tenant_id, token_user_upn = _reference_token_identity(token)
+        tenant_id = tenant_id or token_tenant_id
+        user_upn = user_upn or token_user_upn
+
+    allowed_tenant_id = raw_tenant.strip().lower()
+    allowed_users = {user.strip().lower() for user in raw_users.split(",") if user.strip()}
+
+    if provider and provider.lower() != "aad":
+        return 403, {"error": "Access denied: Microsoft Entra sign-in required."}
+
+    if allowed_users and (user_upn not in allowed_users):
+        return 403, {"error": "Access denied: user not allowed."}
+
+    if allowed_tenant_id:
+        if tenant_id:
+            if tenant_id.lower() != allowed_tenant_id:
+                return 403, {
+                    "error": f"Access denied: wrong tenant. expected={allowed_tenant_id} actual={tenant_id}",
+                    "expectedTenant": allowed_tenant_id,
+                    "actualTenant": tenant_id,
+                }
+        elif not allowed_users:
+            return 403, {
+                "error": "Access denied: tenant claim missing and no ALLOWED_USERS fallback configured.",
+                "expectedTenant": allowed_tenant_id,
+                "actualTenant": "missing",
+            }
+
+    return 200, {}
+
+
+def _principal(claims: list[dict[str, str]], provider: str | None = "aad", user_details: str | None = None) -> str:
+    principal: dict[str, Any] = {"claims": claims}
+    if provider is not None:
+        principal["identityProvider"] = provider
+    if user_details is not None:
+        principal["userDetails"] = user_details
+    return base64.b64encode(json.dumps(principal).encode("utf-8")).decode("ascii")
+
+
+def _token(payload: dict[str, Any]) -> str:
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+    return f"header.{encoded}.signature"
+
+
+def _principals() -> list[str]:
+    issuer = f"https://login.microsoftonline.com/{TENANT}/v2.0"
+    return [
+        "",
+        "not base64 !",
+        base64.b64encode(b"not json").decode("ascii"),
+        _principal([{"typ": "tid", "val": TENANT}, {"typ": "preferred_username", "val": USER}]),
+        _principal([{"typ": "tid", "val": TENANT.upper()}, {"typ": "preferred_username", "val": USER.upper()}]),
+        _principal([{"typ": "tid", "val": OTHER_TENANT}, {"typ": "preferred_username", "val": USER}]),
+        _principal([{"typ": "tid", "val": TENANT}, {"typ": "preferred_username", "val": OTHER_USER}]),
+        _principal([{"typ": "http://schemas.microsoft.com/identity/claims/tenantid", "val": TENANT}, {"typ": "upn", "val": USER}]),
+        _principal([{"typ": "iss", "val": issuer}, {"typ": "email", "val": USER}]),
+        _principal([{"typ": "iss", "val": "https://sts.example.com/"}, {"typ": "name", "val": USER}]),
+        _principal([{"typ": "tid", "val": ""}, {"typ": "tid", "val": OTHER_TENANT}, {"typ": "upn", "val": USER}]),
+        _principal([{"typ": "preferred_username", "val": ""}, {"typ": "upn", "val": OTHER_USER}, {"typ": "tid", "val": TENANT}]),
+        _principal([{"typ": "upn", "val": OTHER_USER}, {"typ": "preferred_username", "val": USER}, {"typ": "tid", "val": TENANT}]),
+        _principal([{"typ": "tenantid", "val": OTHER_TENANT}, {"typ": "tid", "val": TENANT}, {"typ": "upn", "val": USER}]),
+        _principal([{"typ": "tid", "val": TENANT}], user_details=USER),
+        _principal([{"typ": "tid", "val": TENANT}]),
+        _principal([{"typ": "preferred_username", "val": USER}]),
+        _principal([{"typ": "tid", "val": TENANT}, {"typ": "preferred_username", "val": USER}], provider="github"),
+        _principal([{"typ": "tid", "val": TENANT}, {"typ": "preferred_username", "val": USER}], provider="AAD"),
+        _principal([{"typ": "tid", "val": TENANT}, {"typ": "preferred_username", "val": USER}], provider=None),
+    ]
+
+
+def _tokens() -> list[str]:
+    return [
+        "",
+        "garbage",
+        "a.!!!.c",
+        _token({"tid": TENANT, "preferred_username": USER}),
+        _token({"tid": OTHER_TENANT, "upn": OTHER_USER}),
+        _token({"iss": f"https://login.microsoftonline.com/{TENANT}/", "email": USER.upper()}),
+        _token({"tid": TENANT}),
+        f"h.{base64.urlsafe_b64encode(b'[1, 2]').decode('ascii')}.s",
+    ]
+
+
+def _settings() -> list[tuple[str, str]]:
+    return [
+        ("", ""),
+        (TENANT, ""),
+        (f"  {TENANT.upper()} ", ""),
+        ("", USER),
+        ("", f" {USER.upper()} , {OTHER_USER}"),
+        (TENANT, USER),
+        (OTHER_TENANT, f"{USER},,"),
+    ]
+
+
+def main() -> None:
+    harness.ensure_api_on_path()
+    from shared_code import access
+
+    cases = 0
+    mismatches: list[str] = []
+    for (raw_tenant, raw_users), principal, token in itertools.product(_settings(), _principals(), _tokens()):
+        cases += 1
+        expected = reference_decision(principal, token, raw_tenant, raw_users)
+        decision = access.AccessPolicy.compile(raw_tenant, raw_users).authorize_headers(principal, token)
+        actual = (decision.status_code, decision.error) if not decision.allowed else (200, {})
+        if actual != expected:
+            mismatches.append(
+                f"tenant={raw_tenant!r} users={raw_users!r} principal={principal[:24]!r} token={token[:24]!r}: "
+                f"{actual} != {expected}"
+            )
+
+    print(f"access policy vs baseline rules: {cases} cases, {len(mismatches)} mismatches")
+    for line in mismatches[:20]:
+        print(f"  {line}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
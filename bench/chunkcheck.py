@@ -0,0 +1,79 @@
+import argparse
+import random
+import sys
+
+from bench import harness
+
+
+# Line breaks str.splitlines() recognises besides \n, plus the whitespace normalize_text strips at line ends.
+ALPHABET = ["a", "b", "c", " ", " ", "\t", "\n", "\n", "\r\n", "\r", "\x0b", "\x0c", "\x1c", "\x85", "\u2028"]
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def _long_text(rng: random.Random, extraction) -> str:
+    """Past MAX_TEXT_CHARS, so the cap and the early stop in ingest() are exercised."""
+
+    lines = []
+    size = 0
+    while size < extraction.MAX_TEXT_CHARS + 3 * extraction.CHUNK_SIZE:
+        line = "word " * rng.randint(0, 60) + " " * rng.randint(0, 3)
+        lines.append(line)
+        size += len(line) + 2
+    return "\r\n".join(lines)
+
+
+def _pieces(rng: random.Random, text: str) -> list[str]:
+    """Split at random points, and at every \\r of a \\r\\n pair when the coin says so."""
+
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+    if rng.random() < 0.5:
+        cuts = sorted(set(cuts) | {index + 1 for index in range(len(text) - 1) if text[index : index + 2] == "\r\n"})
+    bounds = [0, *cuts, len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _streamed(extraction, pieces: list[str]) -> tuple[list[str], str]:
+    chunks: list[str] = []
+    chunker = extraction.StreamingChunker(chunks.append)
+    for piece in pieces:
+        chunker.feed(piece)
+        if chunker.full:
+            break
+    chunker.finish()
+    return chunks, chunker.text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check StreamingChunker against chunk_text(normalize_text(...)).")
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=38)
+    args = parser.parse_args()
+
+    harness.ensure_api_on_path()
+    from shared_code import extraction
+
+    rng = random.Random(args.seed)
+    texts = ["", "\r\n", " \r", "a\r", "\r\na", "\n\n  x  \n\n"]
+    texts += [_random_text(rng, rng.choice([5, 50, 500, 3000, 6000])) for _ in range(args.cases)]
+    texts += [_long_text(rng, extraction) for _ in range(4)]
+    texts.append("x" * (extraction.MAX_TEXT_CHARS + 5000))
+
+    mismatches = 0
+    for number, text in enumerate(texts):
+        normalized = extraction.normalize_text(text)
+        expected = (extraction.chunk_text(normalized), normalized[: extraction.MAX_TEXT_CHARS])
+        if _streamed(extraction, _pieces(rng, text)) != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  case {number}: {text[:60]!r} ({len(text)} chars)")
+
+    print(f"StreamingChunker vs chunk_text(normalize_text(...)): {len(texts)} cases, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from bench import harness
+
+
+FULL_DIM = 256
+CHUNKS_PER_DOCUMENT = 100
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def _build(vector_index, root: Path, vectors: np.ndarray, quantization: str | None):
+    index = vector_index.VectorIndex(root, nprobe=100_000, quantization=quantization)
+    for start in range(0, len(vectors), CHUNKS_PER_DOCUMENT):
+        part = vectors[start : start + CHUNKS_PER_DOCUMENT]
+        index.add(f"doc{start}", f"doc{start}.txt", [f"chunk {row}" for row in range(start, start + len(part))], part)
+    return index
+
+
+def _expected(vectors: np.ndarray, query: np.ndarray, dimension: int, k: int) -> list[str]:
+    """Exact top-k over the stored rows reduced the same way embedding.reduce_dimensions reduces a new vector."""
+
+    scores = _unit(vectors[:, :dimension]) @ _unit(query)
+    return [f"chunk {row}" for row in np.argsort(-scores, kind="stable")[:k]]
+
+
+def _check_scenario(vector_index, rows: int, quantization: str | None, add_first: bool, small: int, k: int) -> list[str]:
+    rng = np.random.default_rng(rows)
+    vectors = _unit(rng.standard_normal((rows, FULL_DIM)).astype(np.float32))
+    queries = _unit(vectors[rng.choice(rows, 20, replace=False)] + 0.2 * rng.standard_normal((20, FULL_DIM)))
+    label = f"rows={rows} quantization={quantization} {'add' if add_first else 'search'} first"
+    failures: list[str] = []
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = _build(vector_index, Path(root), vectors, quantization)
+        reader = vector_index.VectorIndex(Path(root), nprobe=100_000, quantization=quantization)
+        reader.search(queries[0], k)  # holds state for the wider index, as another worker would
+
+        try:
+            if add_first:
+                extra = _unit(rng.standard_normal((CHUNKS_PER_DOCUMENT, FULL_DIM)).astype(np.float32))
+                writer.add("narrow", "narrow.txt", ["narrow"] * len(extra), _unit(extra[:, :small]))
+                vectors = np.concatenate([vectors, extra])
+            for query in queries:
+                got = [item["text"] for item in reader.search(_unit(query[:small]), k)]
+                want = _expected(vectors, query[:small], small, k)
+                want = ["narrow" if text.startswith("chunk ") and int(text[6:]) >= rows else text for text in want]
+                # int8 only shortlists; the top hit must still be the exact one.
+                if (got[:1] != want[:1]) if quantization else (got != want):
+                    failures.append(f"{label}: {got[:3]} != {want[:3]}")
+                    break
+            wide = writer.search(queries[0], k)
+            if not wide:
+                failures.append(f"{label}: full-dimension query returned nothing after the switch")
+        except ValueError as ex:
+            failures.append(f"{label}: {ex}")
+
+        if reader.stats()["dimension"] != small:
+            failures.append(f"{label}: index dimension is {reader.stats()['dimension']}, expected {small}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that a vector index follows a lowered EMBEDDINGS_DIMENSIONS.")
+    parser.add_argument("--dimension", type=int, default=64, help="Dimension after the switch (index is built at 256).")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    harness.ensure_api_on_path()
+    from shared_code import vector_index
+
+    failures: list[str] = []
+    scenarios = 0
+    # Below and above TRAIN_MIN_ROWS, so both the exhaustive and the IVF (retrained centroids) paths are covered.
+    for rows in (500, vector_index.TRAIN_MIN_ROWS * 2):
+        for quantization in (None, "int8"):
+            for add_first in (False, True):
+                scenarios += 1
+                failures += _check_scenario(vector_index, rows, quantization, add_first, args.dimension, args.k)
+
+    print(f"vector index dimension switch {FULL_DIM} -> {args.dimension}: {scenarios} scenarios, {len(failures)} failures")
+    for line in failures:
+        print(f"  {line}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import base64
+import random
+from io import BytesIO
+from typing import Any
+
+
+_VOCABULARY = (
+    "agreement supplier customer delivery invoice payment liability warranty "
+    "termination notice period clause schedule annex service level uptime "
+    "incident response escalation penalty credit renewal pricing discount "
+    "volume forecast inventory shipment carrier customs tariff compliance "
+    "audit report quarterly revenue margin budget headcount roadmap release"
+).split()
+
+
+def filler_words(count: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    return [rng.choice(_VOCABULARY) for _ in range(count)]
+
+
+def filler_lines(line_count: int, words_per_line: int = 12, seed: int = 1) -> list[str]:
+    words = filler_words(line_count * words_per_line, seed)
+    return [
+        " ".join(words[index : index + words_per_line])
+        for index in range(0, len(words), words_per_line)
+    ]
+
+
+def build_pdf(pages: int, lines_per_page: int = 45, seed: int = 1) -> bytes:
+    lines = filler_lines(pages * lines_per_page, seed=seed)
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs: list[str] = []
+
+    for page_index in range(pages):
+        page_lines = lines[page_index * lines_per_page : (page_index + 1) * lines_per_page]
+        stream = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in page_lines:
+            stream.append(f"({line}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1")
+
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_id = len(objects) + 1
+        objects.append(
+            (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode("latin-1")
+        )
+        page_refs.append(f"{page_id} 0 R")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {pages} >>".encode("latin-1")
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets: list[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    xref_offset = out.tell()
+    out.write(b"xref\n0 %d\n" % (len(objects) + 1))
+    out.write(b"0000000000 65535 f \n")
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1))
+    out.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+    return out.getvalue()
+
+
+def build_docx(paragraphs: int, seed: int = 2) -> bytes:
+    from docx import Document
+
+    document = Document()
+    for line in filler_lines(paragraphs, words_per_line=40, seed=seed):
+        document.add_paragraph(line)
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_text(chars: int, seed: int = 3) -> bytes:
+    text = "\n".join(filler_lines(chars // 80 + 1, seed=seed))
+    return text[:chars].encode("utf-8")
+
+
+def build_image(size_bytes: int, seed: int = 4) -> bytes:
+    header = b"\x89PNG\r\n\x1a\n"
+    return header + random.Random(seed).randbytes(max(0, size_bytes - len(header)))
+
+
+def build_history(turns: int, chars_per_message: int = 600, seed: int = 5) -> list[dict[str, str]]:
+    words_per_message = max(1, chars_per_message // 8)
+    words = filler_words(turns * 2 * words_per_message, seed)
+    history: list[dict[str, str]] = []
+    for index in range(turns * 2):
+        chunk = words[index * words_per_message : (index + 1) * words_per_message]
+        role = "user" if index % 2 == 0 else "assistant"
+        history.append({"role": role, "content": " ".join(chunk)})
+    return history
+
+
+def build_embedding_inputs(count: int = 128, chars: int = 1400, seed: int = 6) -> list[str]:
+    words_per_input = max(1, chars // 8)
+    words = filler_words(count * words_per_input, seed)
+    return [
+        " ".join(words[index * words_per_input : (index + 1) * words_per_input])[:chars]
+        for index in range(count)
+    ]
+
+
+def encode_file(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def document_payload(file_name: str, data: bytes) -> dict[str, Any]:
+    return {"fileName": file_name, "fileContentBase64": encode_file(data)}
@@ -0,0 +1,249 @@
+import base64
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from bench import fixtures
+
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+BENCH_USER = "bench.user@example.com"
+BENCH_TENANT = "00000000-0000-0000-0000-000000000000"
+
+
+def ensure_api_on_path() -> None:
+    api_dir = str(API_DIR)
+    if api_dir not in sys.path:
+        sys.path.insert(0, api_dir)
+
+
+def principal_header(user_upn: str = BENCH_USER, tenant_id: str = BENCH_TENANT) -> str:
+    principal = {
+        "identityProvider": "aad",
+        "userDetails": user_upn,
+        "claims": [
+            {"typ": "tid", "val": tenant_id},
+            {"typ": "preferred_username", "val": user_upn},
+        ],
+    }
+    return base64.b64encode(json.dumps(principal).encode("utf-8")).decode("ascii")
+
+
+def auth_headers() -> dict[str, str]:
+    return {"x-ms-client-principal": principal_header()}
+
+
+def load_function(name: str) -> Callable[[Any], Any]:
+    ensure_api_on_path()
+    module = importlib.import_module(name)
+    return module.main
+
+
+def make_request(
+    method: str,
+    route: str,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+    params: dict[str, str] | None = None,
+    route_params: dict[str, str] | None = None,
+) -> Any:
+    import azure.functions as func
+
+    merged_headers = {"content-type": "application/json", **auth_headers(), **(headers or {})}
+    return func.HttpRequest(
+        method=method,
+        url=f"http://localhost/api/{route}",
+        headers=merged_headers,
+        params=params or {},
+        route_params=route_params or {},
+        body=body or b"",
+    )
+
+
+@dataclass
+class Scenario:
+    name: str
+    function: str
+    route: str
+    method: str = "POST"
+    payload: dict[str, Any] | None = None
+    params: dict[str, str] = field(default_factory=dict)
+    route_params: dict[str, str] = field(default_factory=dict)
+
+    def body(self) -> bytes:
+        if self.payload is None:
+            return b""
+        return json.dumps(self.payload).encode("utf-8")
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    latencies_ms: list[float]
+    errors: int
+    wall_seconds: float
+    status_counts: dict[int, int]
+
+    def summary(self) -> dict[str, Any]:
+        ok = sorted(self.latencies_ms)
+        count = len(self.latencies_ms) + self.errors
+        return {
+            "scenario": self.scenario.name,
+            "endpoint": f"{self.scenario.method} /api/{self.scenario.route}",
+            "requests": count,
+            "errors": self.errors,
+            "throughputRps": round(count / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "p50Ms": round(percentile(ok, 50), 2),
+            "p95Ms": round(percentile(ok, 95), 2),
+            "p99Ms": round(percentile(ok, 99), 2),
+            "meanMs": round(sum(ok) / len(ok), 2) if ok else 0.0,
+            "statusCounts": {str(code): value for code, value in sorted(self.status_counts.items())},
+        }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def build_scenarios(pdf_pages: int = 120, docx_paragraphs: int = 2500, history_turns: int = 150) -> list[Scenario]:
+    pdf_bytes = fixtures.build_pdf(pdf_pages)
+    docx_bytes = fixtures.build_docx(docx_paragraphs)
+    text_bytes = fixtures.build_text(180000)
+    image_bytes = fixtures.build_image(2 * 1024 * 1024)
+    large_history = fixtures.build_history(history_turns)
+    short_history = fixtures.build_history(3)
+    document_context = "\n".join(fixtures.filler_lines(200))
+
+    return [
+        Scenario("models", "models", "models", method="GET"),
+        Scenario(
+            "chat-short",
+            "chat",
+            "chat",
+            payload={"prompt": "Summarize the delivery terms.", "model": "gpt-35-turbo", "conversationHistory": short_history},
+        ),
+        Scenario(
+            "chat-large-history",
+            "chat",
+            "chat",
+            payload={"prompt": "What did we agree on pricing?", "model": "gpt-35-turbo", "conversationHistory": large_history},
+        ),
+        Scenario(
+            "chat-document-context",
+            "chat",
+            "chat",
+            payload={
+                "prompt": "List the penalty clauses.",
+                "model": "gpt-35-turbo",
+                "conversationHistory": short_history,
+                "documentContext": document_context,
+            },
+        ),
+        Scenario(
+            "chat-responses-api",
+            "chat",
+            "chat",
+            payload={"prompt": "Summarize the delivery terms.", "model": "gpt-5-chat", "conversationHistory": short_history},
+        ),
+        Scenario(
+            "chat-image-generation",
+            "chat",
+            "chat",
+            payload={"prompt": "A warehouse at dawn.", "model": "FLUX.1-Kontext-pro", "conversationHistory": []},
+        ),
+        Scenario(
+            "chat-image-job-submit",
+            "chat",
+            "chat",
+            payload={"prompt": "A warehouse at dawn.", "model": "FLUX.1-Kontext-pro", "conversationHistory": [], "async": True},
+        ),
+        Scenario(
+            "chat-batch-50",
+            "chat",
+            "chat/batch",
+            payload={
+                "model": "gpt-35-turbo",
+                "systemPrompt": "Classify the ticket as billing, delivery or other. Reply with one word.",
+                "items": [f"Ticket {index}: {line}" for index, line in enumerate(fixtures.filler_lines(50))],
+            },
+            route_params={"action": "batch"},
+        ),
+        Scenario("document-pdf-large", "document", "document", payload=fixtures.document_payload("manual.pdf", pdf_bytes)),
+        Scenario(
+            "document-pdf-ingest",
+            "document",
+            "document",
+            payload={**fixtures.document_payload("manual.pdf", pdf_bytes), "ingest": True},
+        ),
+        Scenario("document-docx-large", "document", "document", payload=fixtures.document_payload("manual.docx", docx_bytes)),
+        Scenario("document-txt-large", "document", "document", payload=fixtures.document_payload("notes.txt", text_bytes)),
+        Scenario(
+            "embeddings-128",
+            "embeddings",
+            "embeddings",
+            payload={"inputs": fixtures.build_embedding_inputs(128)},
+        ),
+        Scenario(
+            "image-to-text",
+            "image_to_text",
+            "image-to-text",
+            payload={
+                "prompt": "What does the label say?",
+                "conversationHistory": short_history,
+                "fileName": "label.png",
+                "fileContentBase64": fixtures.encode_file(image_bytes),
+            },
+        ),
+    ]
+
+
+def _invoke(main: Callable[[Any], Any], scenario: Scenario, body: bytes) -> tuple[float, int]:
+    request = make_request(
+        scenario.method,
+        scenario.route,
+        body=body,
+        params=scenario.params,
+        route_params=scenario.route_params,
+    )
+    started = time.perf_counter()
+    response = main(request)
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    return elapsed_ms, response.status_code
+
+
+def run_scenario(scenario: Scenario, iterations: int, concurrency: int = 1, warmup: int = 1) -> ScenarioResult:
+    main = load_function(scenario.function)
+    body = scenario.body()
+
+    for _ in range(warmup):
+        _invoke(main, scenario, body)
+
+    latencies: list[float] = []
+    status_counts: dict[int, int] = {}
+    errors = 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for elapsed_ms, status in pool.map(lambda _: _invoke(main, scenario, body), range(iterations)):
+            status_counts[status] = status_counts.get(status, 0) + 1
+            if status >= 400:
+                errors += 1
+            else:
+                latencies.append(elapsed_ms)
+    wall_seconds = time.perf_counter() - started
+
+    return ScenarioResult(scenario, latencies, errors, wall_seconds, status_counts)
+
+
+def apply_environment(values: dict[str, str]) -> None:
+    for name, value in values.items():
+        os.environ[name] = value
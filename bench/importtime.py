@@ -0,0 +1,127 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any
+
+from bench import harness
+
+
+FUNCTION_MODULES = ["chat", "document", "embeddings", "image_to_text", "models"]
+
+_FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {api_dir!r})
+started = time.perf_counter()
+import azure.functions as func
+module = __import__({module!r})
+imported = time.perf_counter()
+request = func.HttpRequest(method="POST", url="http://localhost/api/x", headers={{}}, body=b"not json")
+module.main(request)
+answered = time.perf_counter()
+heavy = sorted(name for name in ("openai", "pypdf", "docx") if name in sys.modules)
+warm_up_ms = None
+if {warm_up!r}:
+    from shared_code import warmup
+    before = time.perf_counter()
+    warmup.warm_up()
+    warm_up_ms = (time.perf_counter() - before) * 1000.0
+print(json.dumps({{
+    "importMs": (imported - started) * 1000.0,
+    "firstRejectedRequestMs": (answered - imported) * 1000.0,
+    "warmUpMs": warm_up_ms,
+    "heavyModulesLoaded": heavy,
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+        name = name.rstrip()
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "selfUs": int(self_us.strip()),
+                "cumulativeUs": int(cumulative_us.strip()),
+            }
+        )
+    return rows
+
+
+def profile_imports(module: str, top: int) -> dict[str, Any]:
+    code = f"import sys; sys.path.insert(0, {str(harness.API_DIR)!r}); import {module}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    rows = parse_importtime(completed.stderr)
+    total = next((row["cumulativeUs"] for row in reversed(rows) if row["module"].strip() == module), 0)
+    top_level = sorted(
+        (row for row in rows if row["depth"] == 1 and row["module"].strip() != module),
+        key=lambda row: row["cumulativeUs"],
+        reverse=True,
+    )
+    return {
+        "module": module,
+        "totalImportMs": round(total / 1000.0, 1),
+        "heaviest": [
+            {"module": row["module"].strip(), "cumulativeMs": round(row["cumulativeUs"] / 1000.0, 1)}
+            for row in top_level[:top]
+        ],
+    }
+
+
+def profile_first_request(module: str, warm_up: bool) -> dict[str, Any]:
+    script = _FIRST_REQUEST_SCRIPT.format(api_dir=str(harness.API_DIR), module=module, warm_up=warm_up)
+    completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    for key in ("importMs", "firstRejectedRequestMs", "warmUpMs"):
+        if result.get(key) is not None:
+            result[key] = round(result[key], 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report per-function import time (-X importtime) and cold first-request cost.")
+    parser.add_argument("--module", action="append", default=[], help="Function module(s) to profile (default: all).")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest top-level imports to list per module.")
+    parser.add_argument("--warm-up", action="store_true", help="Also time shared_code.warmup.warm_up() after the first request.")
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+
+    report = []
+    for module in args.module or FUNCTION_MODULES:
+        entry = profile_imports(module, args.top)
+        entry["coldStart"] = profile_first_request(module, args.warm_up)
+        report.append(entry)
+
+        cold = entry["coldStart"]
+        print(f"{module}: import {entry['totalImportMs']} ms", end="")
+        if "error" not in cold:
+            print(
+                f", first rejected request {cold['firstRejectedRequestMs']} ms"
+                f", heavy modules loaded: {', '.join(cold['heavyModulesLoaded']) or 'none'}",
+                end="",
+            )
+            if cold.get("warmUpMs") is not None:
+                print(f", warm-up {cold['warmUpMs']} ms", end="")
+        print()
+        for row in entry["heaviest"]:
+            print(f"    {row['cumulativeMs']:>9} ms  {row['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import base64
+import json
+import socket
+import sys
+import tempfile
+from typing import Any
+
+from bench import harness
+from bench.stub_server import StubModelServer, stub_environment
+
+
+def _closed_port_url() -> str:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def _upload(document: Any, text: str, ingest: bool) -> tuple[int, dict[str, Any]]:
+    body = {
+        "fileName": "ingestcheck.txt",
+        "fileContentBase64": base64.b64encode(text.encode("utf-8")).decode("ascii"),
+        "ingest": ingest,
+    }
+    response = document(harness.make_request("POST", "document", json.dumps(body).encode("utf-8")))
+    return response.status_code, json.loads(response.get_body())
+
+
+def main() -> None:
+    # Several embedding batches, so a failure in the first one must not cut the text short.
+    text = "\n\n".join(f"Paragraph {index}: " + "clause payment notice period " * 12 for index in range(400))
+    failures: list[str] = []
+
+    with tempfile.TemporaryDirectory() as store_dir, StubModelServer() as server:
+        harness.apply_environment({**stub_environment(server.url), "DOCUMENT_STORE_DIR": store_dir})
+        document = harness.load_function("document")
+
+        status, plain = _upload(document, text, ingest=False)
+        if status != 200:
+            failures.append(f"ingest=false: status {status}: {plain}")
+
+        status, embedded = _upload(document, text, ingest=True)
+        if status != 200 or embedded.get("embedded") is not True:
+            failures.append(f"ingest=true, stub embeddings: status {status}, embedded={embedded.get('embedded')}")
+
+        harness.apply_environment({"AZURE_OPENAI_ENDPOINT": _closed_port_url()})
+        status, degraded = _upload(document, text, ingest=True)
+        if status != 200:
+            failures.append(f"ingest=true, unreachable embeddings: status {status}: {degraded}")
+        elif degraded.get("embedded") is not False:
+            failures.append(f"ingest=true, unreachable embeddings: embedded={degraded.get('embedded')}")
+        elif degraded.get("chunks") != plain.get("chunks") or degraded.get("charCount") != plain.get("charCount"):
+            failures.append(
+                f"ingest=true, unreachable embeddings: {degraded.get('chunkCount')} chunks / "
+                f"{degraded.get('charCount')} chars vs {plain.get('chunkCount')} / {plain.get('charCount')} without ingest"
+            )
+
+    print(f"document ingest with failing embeddings: {len(failures)} failures ({plain.get('chunkCount')} chunks)")
+    for line in failures:
+        print(f"  {line}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
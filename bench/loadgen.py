@@ -0,0 +1,443 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from bench import fixtures, harness
+from bench.stub_server import stub_environment
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = "chat=50,document=15,embeddings=15,image-to-text=10,image=10"
+
+
+@dataclass
+class ReplayRequest:
+    kind: str
+    method: str
+    path: str
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Sample:
+    kind: str
+    status: int
+    latency_ms: float
+
+
+def synthetic_requests(pdf_pages: int, embedding_inputs: int) -> dict[str, ReplayRequest]:
+    history = fixtures.build_history(4)
+
+    def post(kind: str, route: str, payload: dict[str, Any]) -> ReplayRequest:
+        return ReplayRequest(kind, "POST", f"/api/{route}", json.dumps(payload).encode("utf-8"))
+
+    return {
+        "chat": post(
+            "chat",
+            "chat",
+            {"prompt": "Summarize the delivery terms.", "model": "gpt-35-turbo", "conversationHistory": history},
+        ),
+        "document": post(
+            "document",
+            "document",
+            fixtures.document_payload("manual.pdf", fixtures.build_pdf(pdf_pages)),
+        ),
+        "embeddings": post(
+            "embeddings",
+            "embeddings",
+            {"inputs": fixtures.build_embedding_inputs(embedding_inputs)},
+        ),
+        "image-to-text": post(
+            "image-to-text",
+            "image-to-text",
+            {
+                "prompt": "What does the label say?",
+                "conversationHistory": history,
+                "fileName": "label.png",
+                "fileContentBase64": fixtures.encode_file(fixtures.build_image(512 * 1024)),
+            },
+        ),
+        "image": post(
+            "image",
+            "chat",
+            {"prompt": "A warehouse at dawn.", "model": "FLUX.1-Kontext-pro", "conversationHistory": []},
+        ),
+    }
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def load_recording(path: str) -> list[ReplayRequest]:
+    requests: list[ReplayRequest] = []
+    base_dir = Path(path).resolve().parent
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            if "bodyFile" in entry:
+                body = (base_dir / entry["bodyFile"]).read_bytes()
+            elif entry.get("body") is not None:
+                body = json.dumps(entry["body"]).encode("utf-8")
+            else:
+                body = b""
+            path_value = entry.get("path") or f"/api/{entry.get('route', '')}"
+            requests.append(
+                ReplayRequest(
+                    kind=entry.get("kind") or path_value.rsplit("/api/", 1)[-1].split("?", 1)[0],
+                    method=(entry.get("method") or "POST").upper(),
+                    path=path_value,
+                    body=body,
+                    headers=entry.get("headers") or {},
+                )
+            )
+    return requests
+
+
+class RequestSource:
+    def __init__(self, recording: list[ReplayRequest] | None, templates: dict[str, ReplayRequest], mix: dict[str, float]) -> None:
+        self._recording = recording
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._kinds = [kind for kind in mix if kind in templates]
+        self._weights = [mix[kind] for kind in self._kinds]
+        self._templates = templates
+        if not recording and not self._kinds:
+            raise ValueError("Request mix does not match any known request kind.")
+
+    def next(self, rng: random.Random) -> ReplayRequest:
+        if self._recording:
+            with self._lock:
+                item = self._recording[self._cursor % len(self._recording)]
+                self._cursor += 1
+            return item
+        return self._templates[rng.choices(self._kinds, weights=self._weights)[0]]
+
+
+def _descendants(pid: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    found: list[int] = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        found.append(current)
+        pending.extend(children.get(current, []))
+    return found
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class MemorySampler:
+    def __init__(self, root_pid: int | None, interval: float = 0.5) -> None:
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak_kb: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "MemorySampler":
+        if self.root_pid and Path("/proc").exists():
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for pid in _descendants(self.root_pid or 0):
+                rss = _rss_kb(pid)
+                if rss:
+                    self.peak_kb[pid] = max(self.peak_kb.get(pid, 0), rss)
+            self._stop.wait(self.interval)
+
+
+def run_level(
+    base_url: str,
+    source: RequestSource,
+    concurrency: int,
+    duration: float,
+    timeout: float,
+    host_pid: int | None,
+) -> tuple[list[Sample], float, dict[int, int]]:
+    target = urlsplit(base_url)
+    auth = harness.auth_headers()
+    samples: list[Sample] = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=timeout)
+        local: list[Sample] = []
+        while time.perf_counter() < deadline:
+            item = source.next(rng)
+            headers = {"Content-Type": "application/json", **auth, **item.headers}
+            started = time.perf_counter()
+            try:
+                connection.request(item.method, item.path, body=item.body or None, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except Exception:
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port, timeout=timeout)
+                status = 0
+            local.append(Sample(item.kind, status, (time.perf_counter() - started) * 1000.0))
+        connection.close()
+        with samples_lock:
+            samples.extend(local)
+
+    with MemorySampler(host_pid) as sampler:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    return samples, elapsed, dict(sampler.peak_kb)
+
+
+def summarize_level(concurrency: int, samples: list[Sample], elapsed: float, peak_kb: dict[int, int]) -> dict[str, Any]:
+    def stats(items: list[Sample]) -> dict[str, Any]:
+        ok = sorted(sample.latency_ms for sample in items if 0 < sample.status < 400)
+        errors = sum(1 for sample in items if not 0 < sample.status < 400)
+        return {
+            "requests": len(items),
+            "errors": errors,
+            "errorRate": round(errors / len(items), 4) if items else 0.0,
+            "throughputRps": round(len(items) / elapsed, 2) if elapsed else 0.0,
+            "p50Ms": round(harness.percentile(ok, 50), 1),
+            "p95Ms": round(harness.percentile(ok, 95), 1),
+            "p99Ms": round(harness.percentile(ok, 99), 1),
+        }
+
+    by_kind: dict[str, list[Sample]] = {}
+    status_counts: dict[str, int] = {}
+    for sample in samples:
+        by_kind.setdefault(sample.kind, []).append(sample)
+        status_counts[str(sample.status)] = status_counts.get(str(sample.status), 0) + 1
+
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "overall": stats(samples),
+        "byKind": {kind: stats(items) for kind, items in sorted(by_kind.items())},
+        "statusCounts": dict(sorted(status_counts.items())),
+        "workerPeakRssMb": {str(pid): round(kb / 1024, 1) for pid, kb in sorted(peak_kb.items())},
+    }
+
+
+def format_level(level: dict[str, Any]) -> str:
+    lines = [f"== concurrency {level['concurrency']} ({level['seconds']}s) =="]
+    header = f"{'kind':<16}{'n':>7}{'err%':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines.append(header)
+    rows = [("ALL", level["overall"]), *level["byKind"].items()]
+    for kind, row in rows:
+        lines.append(
+            f"{kind:<16}{row['requests']:>7}{row['errorRate'] * 100:>7.1f}%{row['throughputRps']:>9}"
+            f"{row['p50Ms']:>10}{row['p95Ms']:>10}{row['p99Ms']:>10}"
+        )
+    lines.append(f"status: {json.dumps(level['statusCounts'])}")
+    if level["workerPeakRssMb"]:
+        lines.append(f"peak RSS per process (MB): {json.dumps(level['workerPeakRssMb'])}")
+    return "\n".join(lines)
+
+
+def _wait_ready(base_url: str, timeout: float) -> None:
+    target = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(target.hostname, target.port, timeout=2)
+            connection.request("GET", "/api/models", headers=harness.auth_headers())
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status < 500:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Host at {base_url} did not become ready within {timeout}s.")
+
+
+def _start_process(command: list[str], env: dict[str, str], cwd: Path) -> subprocess.Popen[bytes]:
+    # Own session, so _stop_process can signal worker processes the child forks, not just the child.
+    return subprocess.Popen(
+        command,
+        cwd=str(cwd),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _stop_process(process: subprocess.Popen[bytes]) -> None:
+    def signal_group(signum: int) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signum)
+            else:
+                process.send_signal(signum)
+        except ProcessLookupError:
+            pass
+
+    signal_group(signal.SIGTERM)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        pass
+    # Also reaps workers that outlive a parent which has already exited.
+    signal_group(getattr(signal, "SIGKILL", signal.SIGTERM))
+    process.wait()
+
+
+def _ensure_port_free(port: int) -> None:
+    """A leftover host still listening here would silently answer this run's requests with old code and settings."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1.0)
+        if probe.connect_ex(("127.0.0.1", port)) == 0:
+            raise SystemExit(f"Port {port} is already in use; stop the process listening there or pick another port.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a request mix against a Functions host and sweep concurrency.")
+    parser.add_argument("--concurrency", default="10,50,200", help="Comma-separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Synthetic mix weights, e.g. chat=50,document=15.")
+    parser.add_argument("--replay", default="", help="JSONL recording to replay instead of the synthetic mix.")
+    parser.add_argument(
+        "--host",
+        choices=["local", "func", "external"],
+        default="local",
+        help="local: bench.local_host; func: Azure Functions Core Tools 'func start'; external: use --target.",
+    )
+    parser.add_argument("--target", default="http://127.0.0.1:7071")
+    parser.add_argument("--port", type=int, default=7071)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (FUNCTIONS_WORKER_PROCESS_COUNT).")
+    parser.add_argument("--threads", type=int, default=0, help="Threads per worker (PYTHON_THREADPOOL_THREAD_COUNT).")
+    parser.add_argument("--stub-port", type=int, default=7099)
+    parser.add_argument("--stub-latency-ms", type=float, default=300.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--stub-image-latency-ms", type=float, default=3000.0)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--embedding-inputs", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", dest="json_path", default="")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    processes: list[subprocess.Popen[bytes]] = []
+    host_pid: int | None = None
+    base_url = args.target
+
+    try:
+        if args.host != "external":
+            _ensure_port_free(args.stub_port)
+            _ensure_port_free(args.port)
+            stub_url = f"http://127.0.0.1:{args.stub_port}"
+            processes.append(
+                _start_process(
+                    [
+                        sys.executable, "-m", "bench.stub_server",
+                        "--port", str(args.stub_port),
+                        "--latency-ms", str(args.stub_latency_ms),
+                        "--jitter-ms", str(args.stub_jitter_ms),
+                        "--image-latency-ms", str(args.stub_image_latency_ms),
+                    ],
+                    dict(os.environ),
+                    REPO_ROOT,
+                )
+            )
+
+            env = {**os.environ, **stub_environment(stub_url), "FUNCTIONS_WORKER_PROCESS_COUNT": str(args.workers)}
+            if args.threads:
+                env["PYTHON_THREADPOOL_THREAD_COUNT"] = str(args.threads)
+            base_url = f"http://127.0.0.1:{args.port}"
+
+            if args.host == "func":
+                func_cli = shutil.which("func")
+                if not func_cli:
+                    raise SystemExit("Azure Functions Core Tools ('func') not found on PATH; use --host local.")
+                host = _start_process([func_cli, "start", "--port", str(args.port)], env, REPO_ROOT / "api")
+            else:
+                command = [sys.executable, "-m", "bench.local_host", "--port", str(args.port), "--workers", str(args.workers)]
+                if args.threads:
+                    command += ["--threads", str(args.threads)]
+                host = _start_process(command, env, REPO_ROOT)
+            processes.append(host)
+            host_pid = host.pid
+
+        _wait_ready(base_url, timeout=60)
+
+        recording = load_recording(args.replay) if args.replay else None
+        source = RequestSource(recording, synthetic_requests(args.pdf_pages, args.embedding_inputs), parse_mix(args.mix))
+
+        levels: list[dict[str, Any]] = []
+        for concurrency in [int(value) for value in args.concurrency.split(",") if value.strip()]:
+            samples, elapsed, peak_kb = run_level(base_url, source, concurrency, args.duration, args.timeout, host_pid)
+            level = summarize_level(concurrency, samples, elapsed, peak_kb)
+            levels.append(level)
+            print(format_level(level), flush=True)
+            print()
+    finally:
+        for process in reversed(processes):
+            _stop_process(process)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump({"config": vars(args), "levels": levels}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
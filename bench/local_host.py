@@ -0,0 +1,264 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qsl, urlsplit
+
+from bench import harness
+
+
+@dataclass
+class FunctionRoute:
+    name: str
+    methods: set[str]
+    pattern: re.Pattern[str]
+    main: Callable[[Any], Any] | None = None
+
+
+def _route_regex(template: str) -> re.Pattern[str]:
+    parts: list[str] = []
+    for segment in template.strip("/").split("/"):
+        match = re.fullmatch(r"\{(\*?)([A-Za-z_][A-Za-z0-9_]*)(?::[^}?]+)?(\?)?\}", segment)
+        if not match:
+            parts.append("/" + re.escape(segment))
+            continue
+        catch_all, name, optional = match.groups()
+        body = f"(?P<{name}>.+)" if catch_all else f"(?P<{name}>[^/]+)"
+        parts.append(f"(?:/{body})?" if optional or catch_all else f"/{body}")
+    return re.compile("^" + "".join(parts) + "/?$")
+
+
+def discover_routes(api_dir: Path = harness.API_DIR) -> list[FunctionRoute]:
+    routes: list[FunctionRoute] = []
+    for config_path in sorted(api_dir.glob("*/function.json")):
+        config = json.loads(config_path.read_text(encoding="utf-8"))
+        for binding in config.get("bindings", []):
+            if binding.get("type") != "httpTrigger":
+                continue
+            name = config_path.parent.name
+            methods = {method.upper() for method in binding.get("methods") or ["get", "post"]}
+            template = binding.get("route") or name
+            routes.append(FunctionRoute(name, methods, _route_regex(template)))
+    return routes
+
+
+def read_host_limits(api_dir: Path = harness.API_DIR) -> dict[str, int]:
+    host_path = api_dir / "host.json"
+    host = json.loads(host_path.read_text(encoding="utf-8")) if host_path.exists() else {}
+    http = (host.get("extensions") or {}).get("http") or {}
+    return {
+        "maxConcurrentRequests": int(http.get("maxConcurrentRequests", -1)),
+        "maxOutstandingRequests": int(http.get("maxOutstandingRequests", -1)),
+    }
+
+
+class _Host:
+    def __init__(self, routes: list[FunctionRoute], threads: int, limits: dict[str, int]) -> None:
+        self.routes = routes
+        self.invoke_slots = threading.BoundedSemaphore(threads)
+        self.concurrent_slots = (
+            threading.BoundedSemaphore(limits["maxConcurrentRequests"])
+            if limits["maxConcurrentRequests"] > 0
+            else None
+        )
+        self.max_outstanding = limits["maxOutstandingRequests"]
+        self.outstanding = 0
+        self.lock = threading.Lock()
+
+    def match(self, method: str, path: str) -> tuple[FunctionRoute | None, dict[str, str], bool]:
+        if not path.startswith("/api"):
+            return None, {}, False
+        tail = path[len("/api") :] or "/"
+        method_mismatch = False
+        for route in self.routes:
+            found = route.pattern.match(tail)
+            if not found:
+                continue
+            if method not in route.methods:
+                method_mismatch = True
+                continue
+            return route, {k: v for k, v in found.groupdict().items() if v is not None}, False
+        return None, {}, method_mismatch
+
+    def invoke(self, route: FunctionRoute, request: Any) -> Any:
+        if route.main is None:
+            route.main = harness.load_function(route.name)
+        if self.concurrent_slots is not None:
+            self.concurrent_slots.acquire()
+        try:
+            with self.invoke_slots:
+                return route.main(request)
+        finally:
+            if self.concurrent_slots is not None:
+                self.concurrent_slots.release()
+
+
+def _handler_class(host: _Host) -> type[BaseHTTPRequestHandler]:
+    import azure.functions as func
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _handle(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            url = urlsplit(self.path)
+
+            route, route_params, method_mismatch = host.match(self.command, url.path)
+            if route is None:
+                self._send(405 if method_mismatch else 404, b"", {})
+                return
+
+            with host.lock:
+                if host.max_outstanding > 0 and host.outstanding >= host.max_outstanding:
+                    rejected = True
+                else:
+                    rejected = False
+                    host.outstanding += 1
+            if rejected:
+                self._send(429, b"", {})
+                return
+
+            try:
+                request = func.HttpRequest(
+                    method=self.command,
+                    url=f"http://{self.headers.get('Host') or 'localhost'}{self.path}",
+                    headers={key.lower(): value for key, value in self.headers.items()},
+                    params=dict(parse_qsl(url.query)),
+                    route_params=route_params,
+                    body=body,
+                )
+                response = host.invoke(route, request)
+                headers = dict(response.headers or {})
+                if response.mimetype:
+                    headers.setdefault("Content-Type", response.mimetype)
+                self._send(response.status_code, response.get_body() or b"", headers)
+            except Exception as ex:
+                self._send(500, json.dumps({"error": f"Unhandled exception: {ex}"}).encode("utf-8"), {})
+            finally:
+                with host.lock:
+                    host.outstanding -= 1
+
+        def _send(self, status: int, data: bytes, headers: dict[str, str]) -> None:
+            self.send_response(status)
+            for key, value in headers.items():
+                if key.lower() != "content-length":
+                    self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _handle
+        do_POST = _handle
+        do_PUT = _handle
+        do_DELETE = _handle
+        do_PATCH = _handle
+        do_HEAD = _handle
+
+    return Handler
+
+
+class _SharedSocketServer(ThreadingHTTPServer):
+    """Serves on a listening socket bound once by the parent, so worker processes share it like the Functions host."""
+
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, listener: socket.socket, handler: type[BaseHTTPRequestHandler]) -> None:
+        super().__init__(listener.getsockname(), handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        self.server_name, self.server_port = listener.getsockname()[:2]
+
+
+def listen(port: int) -> socket.socket:
+    """Bind without SO_REUSEPORT, so a second host (or stale workers) on the same port is an error, not a silent share."""
+
+    try:
+        return socket.create_server(("127.0.0.1", port), backlog=_SharedSocketServer.request_queue_size)
+    except OSError as ex:
+        raise SystemExit(f"Port {port} is already in use; stop the other host or pick --port.") from ex
+
+
+def serve_worker(listener: socket.socket, threads: int) -> None:
+    harness.ensure_api_on_path()
+    host = _Host(discover_routes(), threads, read_host_limits())
+    server = _SharedSocketServer(listener, _handler_class(host))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def default_thread_count() -> int:
+    configured = (os.getenv("PYTHON_THREADPOOL_THREAD_COUNT") or "").strip()
+    if configured.isdigit() and int(configured) > 0:
+        return int(configured)
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def default_worker_count() -> int:
+    configured = (os.getenv("FUNCTIONS_WORKER_PROCESS_COUNT") or "").strip()
+    return int(configured) if configured.isdigit() and int(configured) > 0 else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve api/ function mains over HTTP, emulating the Functions host routing, "
+            "host.json http limits, FUNCTIONS_WORKER_PROCESS_COUNT and PYTHON_THREADPOOL_THREAD_COUNT."
+        )
+    )
+    parser.add_argument("--port", type=int, default=7071)
+    parser.add_argument("--workers", type=int, default=default_worker_count())
+    parser.add_argument("--threads", type=int, default=default_thread_count())
+    args = parser.parse_args()
+
+    listener = listen(args.port)
+    if args.workers <= 1:
+        serve_worker(listener, args.threads)
+        return
+
+    def stop(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    # Workers inherit this too, so a terminate() from here (or a killpg) lands in their KeyboardInterrupt path.
+    signal.signal(signal.SIGTERM, stop)
+    processes = [
+        multiprocessing.Process(target=serve_worker, args=(listener, args.threads), daemon=True)
+        for _ in range(args.workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
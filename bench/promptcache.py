@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench import fixtures, harness
+from bench.stub_server import StubConfig, StubModelServer, stub_environment
+
+
+QUESTIONS = [
+    "What are the delivery terms?",
+    "Which penalties apply to late invoices?",
+    "Who is liable for damaged goods?",
+    "Summarize the warranty clause.",
+    "When does the notice period start?",
+    "What is the total contract amount?",
+    "Which annex covers the schedule?",
+    "How are disputes between the parties resolved?",
+    "What reporting does the supplier owe?",
+    "List the payment milestones.",
+]
+
+
+def _document_text(chars: int) -> bytes:
+    """Filler text with one section per question, so retrieval picks different chunks on every turn."""
+
+    segment = chars // len(QUESTIONS)
+    sections = [
+        f"Section {index + 1}: " + " ".join([f"topic{index}"] * 30) + "\n" + fixtures.build_text(segment, seed=index + 10).decode("utf-8")
+        for index in range(len(QUESTIONS))
+    ]
+    return "\n\n".join(sections).encode("utf-8")
+
+
+def _conversation(document_chars: int, layout: str, turns: int, config: StubConfig) -> dict[str, float]:
+    with StubModelServer(config) as server:
+        harness.apply_environment(stub_environment(server.url))
+        document = harness.load_function("document")
+        chat = harness.load_function("chat")
+
+        upload = document(
+            harness.make_request(
+                "POST",
+                "document",
+                body=json.dumps(fixtures.document_payload("contract.txt", _document_text(document_chars))).encode("utf-8"),
+            )
+        )
+        document_id = json.loads(upload.get_body())["documentId"]
+
+        history: list[dict[str, str]] = []
+        latencies: list[float] = []
+        prompt_tokens = cached_tokens = 0
+        for turn in range(turns):
+            body = {
+                "prompt": f"{QUESTIONS[turn % len(QUESTIONS)]} (topic{turn % len(QUESTIONS)})",
+                "model": "gpt-35-turbo",
+                "conversationHistory": history,
+                "documentId": document_id,
+                "promptLayout": layout,
+            }
+            started = time.perf_counter()
+            response = chat(harness.make_request("POST", "chat", body=json.dumps(body).encode("utf-8")))
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            payload = json.loads(response.get_body())
+            if response.status_code != 200:
+                raise RuntimeError(payload.get("error"))
+
+            history = payload["conversationHistory"]
+            usage = payload.get("usage") or {}
+            if turn:
+                latencies.append(elapsed_ms)
+                prompt_tokens += usage.get("prompt_tokens") or 0
+                cached_tokens += usage.get("cached_tokens") or 0
+
+    return {
+        "meanLatencyMs": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "promptTokens": prompt_tokens,
+        "cachedTokens": cached_tokens,
+        "cachedRatio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare prompt layouts for provider prefix caching in multi-turn document chat.")
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Stub base latency per call.")
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=80.0, help="Stub cost of uncached prompt tokens.")
+    parser.add_argument("--reply-chars", type=int, default=1200)
+    parser.add_argument("--json", dest="json_path", help="Write results to this file as JSON.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DOCUMENT_STORE_DIR", tempfile.mkdtemp(prefix="ti-ai-promptcache-"))
+    os.environ["HISTORY_COMPACTION_TOKENS"] = "0"
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        reply_chars=args.reply_chars,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+    )
+
+    cases = [("whole document (8k chars)", 8000), ("retrieved chunks (150k chars)", 150000)]
+    results = []
+    print(f"{'case':<32} {'layout':<8} {'mean ms':>9} {'prompt tok':>11} {'cached tok':>11} {'cached %':>9}")
+    for name, chars in cases:
+        for layout in ("legacy", "stable"):
+            row = {"case": name, "layout": layout, **_conversation(chars, layout, args.turns, config)}
+            results.append(row)
+            print(
+                f"{name:<32} {layout:<8} {row['meanLatencyMs']:>9.1f} {row['promptTokens']:>11} "
+                f"{row['cachedTokens']:>11} {row['cachedRatio'] * 100:>8.1f}%"
+            )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import fnmatch
+import json
+from typing import Any
+
+from bench import harness
+from bench.stub_server import StubConfig, StubModelServer, stub_environment
+
+
+COLUMNS = [
+    ("scenario", "scenario", 24),
+    ("requests", "n", 6),
+    ("errors", "err", 5),
+    ("throughputRps", "req/s", 9),
+    ("p50Ms", "p50 ms", 9),
+    ("p95Ms", "p95 ms", 9),
+    ("p99Ms", "p99 ms", 9),
+    ("meanMs", "mean ms", 9),
+]
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    header = "  ".join(label.ljust(width) if key == "scenario" else label.rjust(width) for key, label, width in COLUMNS)
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        cells = []
+        for key, _, width in COLUMNS:
+            value = str(row.get(key, ""))
+            cells.append(value.ljust(width) if key == "scenario" else value.rjust(width))
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the offline API benchmark suite against a stub model server.")
+    parser.add_argument("--scenario", action="append", default=[], help="Glob filter on scenario names (repeatable).")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub model latency per call.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--image-latency-ms", type=float, default=None)
+    parser.add_argument("--reply-chars", type=int, default=400)
+    parser.add_argument("--embedding-dim", type=int, default=3072)
+    parser.add_argument("--image-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--pdf-pages", type=int, default=120)
+    parser.add_argument("--docx-paragraphs", type=int, default=2500)
+    parser.add_argument("--history-turns", type=int, default=150)
+    parser.add_argument("--json", dest="json_path", default="", help="Also write results as JSON to this path.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        reply_chars=args.reply_chars,
+        embedding_dim=args.embedding_dim,
+        image_bytes=args.image_bytes,
+        image_latency_ms=args.image_latency_ms,
+    )
+
+    with StubModelServer(config) as stub:
+        harness.apply_environment(stub_environment(stub.url))
+        scenarios = harness.build_scenarios(
+            pdf_pages=args.pdf_pages,
+            docx_paragraphs=args.docx_paragraphs,
+            history_turns=args.history_turns,
+        )
+        if args.scenario:
+            scenarios = [s for s in scenarios if any(fnmatch.fnmatch(s.name, pattern) for pattern in args.scenario)]
+
+        rows: list[dict[str, Any]] = []
+        for scenario in scenarios:
+            result = harness.run_scenario(
+                scenario,
+                iterations=args.iterations,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+            )
+            rows.append(result.summary())
+
+        stub_calls = dict(stub.request_counts)
+
+    print(format_table(rows))
+    print(f"\nStub calls: {json.dumps(stub_calls, sort_keys=True)}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "config": vars(args),
+                    "results": rows,
+                    "stubCalls": stub_calls,
+                },
+                handle,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    reply_chars: int = 400
+    embedding_dim: int = 3072
+    image_bytes: int = 256 * 1024
+    ocr_chars: int = 2000
+    image_latency_ms: float | None = None
+    prefill_ms_per_1k_tokens: float = 0.0
+
+
+_VECTOR_POOL_SIZE = 64
+_PREFIX_CACHE_MIN_TOKENS = 1024
+_PREFIX_CACHE_BLOCK_TOKENS = 128
+_PREFIX_CACHE_SIZE = 100_000
+
+_WORDS = (
+    "contract invoice report delivery payment customer supplier clause "
+    "liability warranty schedule annex total amount period notice party"
+).split()
+
+
+def _filler_text(chars: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    parts: list[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(_WORDS)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)[:chars]
+
+
+class StubModelServer:
+    """Local stand-in for Azure OpenAI (chat/responses/embeddings/images) and Azure AI Vision OCR."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or StubConfig()
+        self._reply_text = _filler_text(self.config.reply_chars)
+        self._ocr_text = _filler_text(self.config.ocr_chars, seed=11)
+        self._image_b64 = base64.b64encode(random.Random(3).randbytes(self.config.image_bytes)).decode("ascii")
+        self._lock = threading.Lock()
+        self.request_counts: dict[str, int] = {}
+        self._vector_pools: dict[int, list[tuple[list[float], str]]] = {}
+        self._prefixes: set[str] = set()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubModelServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubModelServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    def _sleep(self, kind: str, payload: dict[str, Any]) -> None:
+        base = self.config.latency_ms
+        if kind == "images" and self.config.image_latency_ms is not None:
+            base = self.config.image_latency_ms
+        delay = base + (random.uniform(0, self.config.jitter_ms) if self.config.jitter_ms else 0.0)
+
+        usage = payload.get("usage") or {}
+        if self.config.prefill_ms_per_1k_tokens and "total_tokens" in usage:
+            prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0))
+            details = usage.get("prompt_tokens_details") or usage.get("input_tokens_details") or {}
+            uncached = prompt_tokens - (details.get("cached_tokens") or 0)
+            delay += uncached / 1000.0 * self.config.prefill_ms_per_1k_tokens
+
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _cached_tokens(self, prompt: str) -> int:
+        """Emulates provider prefix caching: identical prompt prefixes of 1024+ tokens hit in 128-token steps."""
+
+        block_chars = _PREFIX_CACHE_BLOCK_TOKENS * 4
+        digest = hashlib.sha256()
+        cached = 0
+        keys: list[str] = []
+        for start in range(0, len(prompt) - block_chars + 1, block_chars):
+            digest.update(prompt[start : start + block_chars].encode("utf-8"))
+            keys.append(digest.hexdigest())
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key not in self._prefixes:
+                    break
+                tokens = (index + 1) * _PREFIX_CACHE_BLOCK_TOKENS
+                if tokens >= _PREFIX_CACHE_MIN_TOKENS:
+                    cached = tokens
+            if len(self._prefixes) > _PREFIX_CACHE_SIZE:
+                self._prefixes.clear()
+            self._prefixes.update(keys)
+        return cached
+
+    def _usage(self, prompt: str) -> dict[str, Any]:
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(self._reply_text) // 4)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": self._cached_tokens(prompt)},
+        }
+
+    def chat_completion(self, body: dict[str, Any]) -> dict[str, Any]:
+        prompt = json.dumps(body.get("messages") or [])
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self._reply_text},
+                }
+            ],
+            "usage": self._usage(prompt),
+        }
+
+    def response(self, body: dict[str, Any]) -> dict[str, Any]:
+        usage = self._usage(json.dumps(body.get("input") or []))
+        return {
+            "id": "resp-stub",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model") or "stub",
+            "status": "completed",
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg-stub",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": self._reply_text, "annotations": []}],
+                }
+            ],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": usage["prompt_tokens"],
+                "output_tokens": usage["completion_tokens"],
+                "total_tokens": usage["total_tokens"],
+                "input_tokens_details": usage["prompt_tokens_details"],
+                "output_tokens_details": {"reasoning_tokens": 0},
+            },
+        }
+
+    def embeddings(self, body: dict[str, Any]) -> dict[str, Any]:
+        inputs = body.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        inputs = inputs or []
+        dim = int(body.get("dimensions") or self.config.embedding_dim)
+        as_base64 = body.get("encoding_format") == "base64"
+
+        pool = self._vector_pool(dim)
+        data = []
+        for index, text in enumerate(inputs):
+            vector, encoded = pool[zlib.crc32(str(text).encode("utf-8")) % len(pool)]
+            data.append({"object": "embedding", "index": index, "embedding": encoded if as_base64 else vector})
+
+        tokens = sum(len(str(text)) // 4 for text in inputs)
+        return {
+            "object": "list",
+            "model": body.get("model") or "stub",
+            "data": data,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _vector_pool(self, dim: int) -> list[tuple[list[float], str]]:
+        with self._lock:
+            pool = self._vector_pools.get(dim)
+            if pool is None:
+                rng = random.Random(dim)
+                pool = []
+                for _ in range(_VECTOR_POOL_SIZE):
+                    vector = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+                    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+                    vector = [v / norm for v in vector]
+                    encoded = base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode("ascii")
+                    pool.append((vector, encoded))
+                self._vector_pools[dim] = pool
+            return pool
+
+    def images(self, body: dict[str, Any]) -> dict[str, Any]:
+        return {"created": int(time.time()), "data": [{"b64_json": self._image_b64}]}
+
+    def ocr(self) -> dict[str, Any]:
+        return {"readResult": {"content": self._ocr_text}}
+
+    def route(self, path: str, body: dict[str, Any]) -> tuple[str, dict[str, Any]] | None:
+        if path.endswith("/chat/completions"):
+            return "chat", self.chat_completion(body)
+        if path.endswith("/responses"):
+            return "responses", self.response(body)
+        if path.endswith("/embeddings"):
+            return "embeddings", self.embeddings(body)
+        if path.endswith("/images/generations"):
+            return "images", self.images(body)
+        if path.endswith("/computervision/imageanalysis:analyze"):
+            return "ocr", self.ocr()
+        return None
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                path = self.path.split("?", 1)[0]
+
+                body: dict[str, Any] = {}
+                if raw and "json" in (self.headers.get("Content-Type") or ""):
+                    try:
+                        body = json.loads(raw)
+                    except ValueError:
+                        body = {}
+
+                routed = stub.route(path, body)
+                if routed is None:
+                    self._send(404, {"error": {"message": f"Stub has no route for {path}"}})
+                    return
+
+                kind, payload = routed
+                stub._count(kind)
+                stub._sleep(kind, payload)
+                self._send(200, payload)
+
+            def _send(self, status: int, payload: dict[str, Any]) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def stub_environment(base_url: str) -> dict[str, str]:
+    return {
+        "AZURE_OPENAI_ENDPOINT": base_url,
+        "AZURE_OPENAI_KEY": "stub-key",
+        "READ_DOC_EMBEDDING_DEPLOYMENT": "text-embedding-3-large",
+        "FLUX_ENDPOINT": base_url,
+        "FLUX_KEY": "stub-key",
+        "IMAGE_TO_TEXT_OCR_ENDPOINT": base_url,
+        "IMAGE_TO_TEXT_OCR_KEY": "stub-key",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the stub Azure OpenAI / Vision server.")
+    parser.add_argument("--port", type=int, default=7099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--image-latency-ms", type=float, default=None)
+    parser.add_argument("--reply-chars", type=int, default=400)
+    parser.add_argument("--embedding-dim", type=int, default=3072)
+    parser.add_argument("--image-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--ocr-chars", type=int, default=2000)
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        reply_chars=args.reply_chars,
+        embedding_dim=args.embedding_dim,
+        image_bytes=args.image_bytes,
+        ocr_chars=args.ocr_chars,
+        image_latency_ms=args.image_latency_ms,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+    )
+    server = StubModelServer(config, port=args.port)
+    print(f"Stub model server listening on {server.url}")
+    for name, value in stub_environment(server.url).items():
+        print(f"  {name}={value}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
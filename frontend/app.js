@@ -13,6 +13,8 @@ const readDocBtn = document.getElementById('readDocBtn');
 const docFileInput = document.getElementById('docFileInput');
 const imageToTextFileInput = document.getElementById('imageToTextFileInput');
 const docStatusEl = document.getElementById('docStatus');
+const wholeDocLabel = document.getElementById('wholeDocLabel');
+const wholeDocToggle = document.getElementById('wholeDocToggle');
 const clearHistoryBtn = document.getElementById('clearHistoryBtn');
 const signOutBtn = document.getElementById('signOutBtn');
 const robotAvatarEl = document.getElementById('robotAvatar');
@@ -22,7 +24,10 @@ let attachedDocument = null;
 let imageToTextFile = null;
 
 const MAX_UPLOAD_BYTES = 10 * 1024 * 1024;
+const MAX_SESSION_UPLOAD_BYTES = 512 * 1024 * 1024;
+const UPLOAD_PART_ATTEMPTS = 3;
 const MAX_CONTEXT_CHUNKS = 4;
+const JOB_POLL_WAIT_SECONDS = 20;
 const STREAM_CHUNK_SIZE = 3;
 const STREAM_CHUNK_DELAY_MS = 18;
 const ROBOT_VARIANTS = [
@@ -111,10 +116,19 @@ function addImageMessage(role, imageUrl) {
 
   const image = document.createElement('img');
   image.className = 'msg-image';
-  image.src = imageUrl;
+  image.src = imageUrl.startsWith('/api/images/') ? `${imageUrl}?variant=webp` : imageUrl;
   image.alt = 'Generated image';
 
-  node.appendChild(image);
+  if (imageUrl.startsWith('/api/images/')) {
+    const link = document.createElement('a');
+    link.href = imageUrl;
+    link.target = '_blank';
+    link.rel = 'noopener';
+    link.appendChild(image);
+    node.appendChild(link);
+  } else {
+    node.appendChild(image);
+  }
   chatEl.appendChild(node);
   chatEl.scrollTop = chatEl.scrollHeight;
 }
@@ -148,6 +162,11 @@ function isImageToTextSelected() {
   return modelId === 'read-doc' || modelId === 'image-to-text' || modelType === 'image-to-text';
 }
 
+function isPictureSelected() {
+  const { modelType } = getSelectedModelInfo();
+  return modelType === 'picture' || modelType === 'image';
+}
+
 function isReadDocSelected() {
   const { modelId } = getSelectedModelInfo();
   return modelId === 'read-doc';
@@ -166,6 +185,9 @@ function updateActionButtonsVisibility() {
   if (readDocBtn) {
     readDocBtn.hidden = !isImageToText;
   }
+  if (wholeDocLabel) {
+    wholeDocLabel.hidden = !isChat || !attachedDocument?.documentId;
+  }
 
   if (isPicture) {
     if (attachDocBtn) attachDocBtn.hidden = true;
@@ -181,6 +203,7 @@ function setDocumentStatus(text, isError = false) {
 
 function clearAttachedDocument() {
   attachedDocument = null;
+  if (wholeDocToggle) wholeDocToggle.checked = false;
   setDocumentStatus('');
   updateActionButtonsVisibility();
 }
@@ -264,12 +287,12 @@ function buildDocumentContext(prompt) {
   return `Document: ${attachedDocument.fileName}\n\n${chunksToUse.join('\n\n---\n\n')}`;
 }
 
-async function createEmbeddings(inputs) {
+async function createEmbeddings(inputs, documentId = null) {
   const response = await fetch('/api/embeddings', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     credentials: 'include',
-    body: JSON.stringify({ inputs }),
+    body: JSON.stringify(documentId ? { inputs, documentId } : { inputs }),
   });
 
   const data = await response.json().catch(() => ({}));
@@ -297,7 +320,7 @@ async function indexAttachedDocumentForReadDoc() {
   setDocumentStatus(`Indexing document for Read Doc${suffix}...`);
 
   try {
-    const embeddings = await createEmbeddings(chunks);
+    const embeddings = await createEmbeddings(chunks, attachedDocument.documentId);
     attachedDocument.readDocIndex = {
       chunks,
       embeddings,
@@ -308,6 +331,37 @@ async function indexAttachedDocumentForReadDoc() {
   }
 }
 
+function describeJobProgress(progress) {
+  if (progress.phase === 'map') return `Reading document: ${progress.completed}/${progress.total} sections`;
+  if (progress.phase === 'combine') return `Combining notes (round ${progress.round})`;
+  if (progress.phase === 'reduce') return 'Writing answer';
+  return '';
+}
+
+async function waitForJob(jobId, onProgress = null) {
+  let progressVersion = 0;
+  for (;;) {
+    const versionParam = onProgress ? `&progressVersion=${progressVersion}` : '';
+    const response = await fetch(`/api/jobs/${encodeURIComponent(jobId)}?wait=${JOB_POLL_WAIT_SECONDS}${versionParam}`, {
+      credentials: 'include',
+    });
+    const data = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      throw new Error(data.error || 'Job status request failed.');
+    }
+    if (onProgress && data.progress && data.progressVersion > progressVersion) {
+      progressVersion = data.progressVersion;
+      onProgress(data.progress);
+    }
+    if (data.status === 'succeeded') {
+      return data.result || {};
+    }
+    if (data.status === 'failed') {
+      throw new Error(data.error || 'Job failed.');
+    }
+  }
+}
+
 function fileToBase64(file) {
   return new Promise((resolve, reject) => {
     const reader = new FileReader();
@@ -321,48 +375,239 @@ function fileToBase64(file) {
   });
 }
 
+const SHA256_K = new Int32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+// crypto.subtle.digest needs the whole file in memory; this hashes it part by part as the parts are sent.
+function createSha256() {
+  const state = new Int32Array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+  ]);
+  const words = new Int32Array(64);
+  const pending = new Uint8Array(64);
+  let pendingBytes = 0;
+  let totalBytes = 0;
+
+  function compress(bytes, offset) {
+    for (let i = 0; i < 16; i += 1) {
+      const j = offset + i * 4;
+      words[i] = (bytes[j] << 24) | (bytes[j + 1] << 16) | (bytes[j + 2] << 8) | bytes[j + 3];
+    }
+    for (let i = 16; i < 64; i += 1) {
+      const w15 = words[i - 15];
+      const w2 = words[i - 2];
+      const s0 = ((w15 >>> 7) | (w15 << 25)) ^ ((w15 >>> 18) | (w15 << 14)) ^ (w15 >>> 3);
+      const s1 = ((w2 >>> 17) | (w2 << 15)) ^ ((w2 >>> 19) | (w2 << 13)) ^ (w2 >>> 10);
+      words[i] = (words[i - 16] + s0 + words[i - 7] + s1) | 0;
+    }
+
+    let a = state[0];
+    let b = state[1];
+    let c = state[2];
+    let d = state[3];
+    let e = state[4];
+    let f = state[5];
+    let g = state[6];
+    let h = state[7];
+    for (let i = 0; i < 64; i += 1) {
+      const s1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+      const t1 = (h + s1 + ((e & f) ^ (~e & g)) + SHA256_K[i] + words[i]) | 0;
+      const s0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+      const t2 = (s0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+      h = g;
+      g = f;
+      f = e;
+      e = (d + t1) | 0;
+      d = c;
+      c = b;
+      b = a;
+      a = (t1 + t2) | 0;
+    }
+    state[0] += a;
+    state[1] += b;
+    state[2] += c;
+    state[3] += d;
+    state[4] += e;
+    state[5] += f;
+    state[6] += g;
+    state[7] += h;
+  }
+
+  return {
+    update(bytes) {
+      totalBytes += bytes.length;
+      let offset = 0;
+      if (pendingBytes) {
+        offset = Math.min(64 - pendingBytes, bytes.length);
+        pending.set(bytes.subarray(0, offset), pendingBytes);
+        pendingBytes += offset;
+        if (pendingBytes < 64) return;
+        compress(pending, 0);
+        pendingBytes = 0;
+      }
+      for (; offset + 64 <= bytes.length; offset += 64) {
+        compress(bytes, offset);
+      }
+      pending.set(bytes.subarray(offset));
+      pendingBytes = bytes.length - offset;
+    },
+    hexDigest() {
+      const tail = new Uint8Array(pendingBytes < 56 ? 64 : 128);
+      tail.set(pending.subarray(0, pendingBytes));
+      tail[pendingBytes] = 0x80;
+      const view = new DataView(tail.buffer);
+      view.setUint32(tail.length - 8, Math.floor(totalBytes / 0x20000000));
+      view.setUint32(tail.length - 4, (totalBytes * 8) >>> 0);
+      for (let offset = 0; offset < tail.length; offset += 64) {
+        compress(tail, offset);
+      }
+      return Array.from(state, (word) => (word >>> 0).toString(16).padStart(8, '0')).join('');
+    },
+  };
+}
+
+async function uploadRequest(url, options) {
+  const response = await fetch(url, { credentials: 'include', ...options });
+  const data = await response.json().catch(() => ({}));
+  return { ok: response.ok, status: response.status, data };
+}
+
+async function openUploadSession(file, sessionKey) {
+  const savedId = localStorage.getItem(sessionKey);
+  if (savedId) {
+    const existing = await uploadRequest(`/api/uploads/${encodeURIComponent(savedId)}`, { method: 'GET' });
+    if (existing.ok) return existing.data;
+    localStorage.removeItem(sessionKey);
+  }
+
+  const created = await uploadRequest('/api/uploads', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ fileName: file.name, size: file.size }),
+  });
+  if (!created.ok) throw new Error(created.data.error || 'Failed to start upload.');
+  localStorage.setItem(sessionKey, created.data.uploadId);
+  return created.data;
+}
+
+async function uploadInParts(file) {
+  const sessionKey = `uploadSession:${file.name}:${file.size}:${file.lastModified}`;
+  const session = await openUploadSession(file, sessionKey);
+  const uploadUrl = `/api/uploads/${encodeURIComponent(session.uploadId)}`;
+  const hash = createSha256();
+  let hashed = 0;
+  let received = session.received || 0;
+  let failures = 0;
+
+  // Hashed in file order while each part is in flight, including parts the server already has from an earlier attempt.
+  const hashThrough = async (end) => {
+    while (hashed < end) {
+      const next = Math.min(end, hashed + session.partBytes);
+      hash.update(new Uint8Array(await file.slice(hashed, next).arrayBuffer()));
+      hashed = next;
+    }
+  };
+
+  while (received < file.size) {
+    setDocumentStatus(`Uploading ${file.name}... ${Math.floor((received / file.size) * 100)}%`);
+    const part = file.slice(received, received + session.partBytes);
+    const [result] = await Promise.all([
+      uploadRequest(`${uploadUrl}?offset=${received}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: part,
+      }).catch(() => ({ ok: false, status: 0, data: {} })),
+      hashThrough(received + part.size),
+    ]);
+
+    if (result.ok) {
+      received = result.data.received;
+      failures = 0;
+      continue;
+    }
+    if (result.status === 404) {
+      localStorage.removeItem(sessionKey);
+      throw new Error(result.data.error || 'Upload session expired.');
+    }
+    failures += 1;
+    if (failures >= UPLOAD_PART_ATTEMPTS) {
+      throw new Error(result.data.error || 'Upload interrupted. Attach the file again to resume.');
+    }
+    if (typeof result.data.received === 'number') {
+      received = result.data.received;
+    }
+  }
+
+  await hashThrough(file.size);
+  setDocumentStatus(`Processing ${file.name}...`);
+  const completed = await uploadRequest(`${uploadUrl}/complete`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ingest: true, sha256: hash.hexDigest() }),
+  });
+  if (completed.ok || completed.status === 404 || completed.status === 422) {
+    localStorage.removeItem(sessionKey);
+  }
+  if (!completed.ok) throw new Error(completed.data.error || 'Failed to process document.');
+  return completed.data;
+}
+
+async function uploadWhole(file) {
+  const fileContentBase64 = await fileToBase64(file);
+  const result = await uploadRequest('/api/document', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      fileName: file.name,
+      fileContentBase64,
+      ingest: true,
+    }),
+  });
+  if (!result.ok) throw new Error(result.data.error || 'Failed to process document.');
+  return result.data;
+}
+
 async function uploadDocument(file) {
   if (!file) return;
 
-  if (file.size > MAX_UPLOAD_BYTES) {
-    setDocumentStatus('File too large. Max size is 10 MB.', true);
+  if (file.size > MAX_SESSION_UPLOAD_BYTES) {
+    setDocumentStatus('File too large. Max size is 512 MB.', true);
     return;
   }
 
   setDocumentStatus(`Uploading ${file.name}...`);
 
+  let data;
   try {
-    const fileContentBase64 = await fileToBase64(file);
-    const response = await fetch('/api/document', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      credentials: 'include',
-      body: JSON.stringify({
-        fileName: file.name,
-        fileContentBase64,
-      }),
-    });
-
-    const data = await response.json().catch(() => ({}));
-    if (!response.ok) {
-      setDocumentStatus(data.error || 'Failed to process document.', true);
-      return;
-    }
-
-    attachedDocument = {
-      fileName: data.fileName || file.name,
-      chunks: Array.isArray(data.chunks) ? data.chunks : [],
-    };
+    data = file.size > MAX_UPLOAD_BYTES ? await uploadInParts(file) : await uploadWhole(file);
+  } catch (error) {
+    const networkError = error instanceof TypeError || !error?.message;
+    setDocumentStatus(networkError ? 'Network or server error while uploading document.' : error.message, true);
+    return;
+  }
 
-    if (!attachedDocument.chunks.length) {
-      setDocumentStatus('No usable text found in document.', true);
-      return;
-    }
+  attachedDocument = {
+    documentId: data.documentId || null,
+    fileName: data.fileName || file.name,
+    chunks: Array.isArray(data.chunks) ? data.chunks : [],
+  };
 
-    setDocumentStatus(`Attached ${attachedDocument.fileName} (${data.chunkCount || attachedDocument.chunks.length} chunks)`);
-  } catch {
-    setDocumentStatus('Network or server error while uploading document.', true);
+  if (!attachedDocument.chunks.length) {
+    setDocumentStatus('No usable text found in document.', true);
+    return;
   }
+
+  const indexedNote = data.embedded ? ', indexed' : '';
+  setDocumentStatus(`Attached ${attachedDocument.fileName} (${data.chunkCount || attachedDocument.chunks.length} chunks${indexedNote})`);
+  updateActionButtonsVisibility();
 }
 
 function renderSelectedModel() {
@@ -431,6 +676,17 @@ function buildModelMenu() {
   }
 }
 
+function pickDefaultModel(models) {
+  const chatModels = models.filter((model) => model.type === 'chat' && model.configured !== false);
+  const measured = chatModels
+    .filter((model) => model.health === 'healthy' && typeof model.p50Ms === 'number')
+    .sort((left, right) => left.p50Ms - right.p50Ms);
+  if (measured.length) return measured[0].id;
+
+  const available = chatModels.find((model) => model.health !== 'down');
+  return available ? available.id : '';
+}
+
 async function loadModels() {
   try {
     const response = await fetch('/api/models', { credentials: 'include' });
@@ -444,11 +700,16 @@ async function loadModels() {
       const typeLabel = formatModelType(model.type);
       option.dataset.typeLabel = typeLabel;
       option.dataset.modelTypeRaw = String(model.type || '');
-      option.dataset.modelName = model.label || model.id;
-      option.textContent = `${typeLabel} - ${model.label || model.id}`;
+      option.dataset.modelName = model.health === 'down' ? `${model.label || model.id} (unavailable)` : model.label || model.id;
+      option.textContent = `${typeLabel} - ${option.dataset.modelName}`;
       modelEl.appendChild(option);
     }
 
+    const defaultModel = pickDefaultModel(models);
+    if (defaultModel) {
+      modelEl.value = defaultModel;
+    }
+
     if (!modelEl.options.length) {
       const fallback = document.createElement('option');
       fallback.value = 'gpt-35-turbo';
@@ -560,6 +821,7 @@ form.addEventListener('submit', async (event) => {
       }
     }
 
+    const wholeDocument = Boolean(wholeDocToggle?.checked && attachedDocument?.documentId && !isPictureSelected());
     const response = await fetch('/api/chat', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -569,10 +831,13 @@ form.addEventListener('submit', async (event) => {
         model: modelEl.value,
         conversationHistory,
         documentContext,
+        documentId: attachedDocument?.documentId || undefined,
+        mode: wholeDocument ? 'map-reduce' : undefined,
+        async: isPictureSelected(),
       }),
     });
 
-    const data = await response.json().catch(() => ({}));
+    let data = await response.json().catch(() => ({}));
 
     if (!response.ok) {
       const details = [];
@@ -583,6 +848,19 @@ form.addEventListener('submit', async (event) => {
       return;
     }
 
+    if (data.replyType === 'job' && data.jobId) {
+      try {
+        data = await waitForJob(data.jobId, wholeDocument ? (progress) => setDocumentStatus(describeJobProgress(progress)) : null);
+      } catch (error) {
+        addMessage('system', error?.message || 'Request failed.');
+        return;
+      } finally {
+        if (wholeDocument && attachedDocument) {
+          setDocumentStatus(`Attached ${attachedDocument.fileName}`);
+        }
+      }
+    }
+
     const replyType = data.replyType || 'text';
     const reply = data.reply || '';
     const imageUrl = data.imageUrl || '';